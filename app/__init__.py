@@ -7,7 +7,8 @@ from flask import Flask
 def create_app():
     from app.config import (
         BASE_DIR, TEMPLATE_DIR, STATIC_DIR, DB_PATH,
-        SECRET_KEY, LOG_FILE, LOG_LEVEL
+        SECRET_KEY, LOG_FILE, LOG_LEVEL, METRICS_ENABLED, QUERY_PLAN_CHECK,
+        STATIC_MAX_AGE
     )
     
     mimetypes.add_type('text/css', '.css')
@@ -28,12 +29,23 @@ def create_app():
         format='%(asctime)s %(levelname)s: %(message)s'
     )
     
+    from app.assets import init_assets
+    init_assets(app, STATIC_DIR, STATIC_MAX_AGE)
+    
     with app.app_context():
         from app.routes import register_routes
         from app.models import init_db, close_connection
+        from app.commands import register_commands
         
         init_db()
         register_routes(app)
+        register_commands(app)
         app.teardown_appcontext(close_connection)
+        
+        if METRICS_ENABLED or QUERY_PLAN_CHECK != 'off':
+            from app.routes.debug_routes import debug_bp, register_metrics
+            app.register_blueprint(debug_bp)
+            if METRICS_ENABLED:
+                register_metrics(app)
     
     return app
@@ -0,0 +1,181 @@
+"""
+Static Assets
+Arquivos estáticos com hash do conteúdo no nome (bootstrap.min.<hash>.css),
+servidos pré-comprimidos (gzip/brotli) com cache imutável no navegador
+"""
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+import threading
+from flask import request, current_app, send_file, Response
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, apenas gzip
+    brotli = None
+
+
+HASH_LENGTH = 12
+COMPRESS_MIN_SIZE = 1024
+# Imagens já comprimidas (png, ico com png dentro) não ganham nada com gzip
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+_PRECOMPRESSED = re.compile(r'\.(gz|br)$')
+
+
+def _compressible(path, size):
+    mimetype = mimetypes.guess_type(path)[0] or ''
+    return size >= COMPRESS_MIN_SIZE and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class Asset:
+    __slots__ = ('filename', 'path', 'hashed', 'digest', 'mimetype', 'compressible', 'mtime')
+
+    def __init__(self, filename, path, digest, size, mtime):
+        root, ext = os.path.splitext(filename)
+        self.filename = filename
+        self.path = path
+        self.digest = digest
+        self.hashed = f"{root}.{digest}{ext}"
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.compressible = _compressible(filename, size)
+        self.mtime = mtime
+
+
+class AssetManifest:
+    """
+    Mapa nome original -> nome com hash dos arquivos de static_dir.
+
+    Montado uma vez na inicialização (só leitura e hash dos arquivos).
+    As versões comprimidas vêm dos arquivos .gz/.br gerados por
+    'flask build-assets' quando existem e estão atualizados; senão são
+    comprimidas no primeiro acesso e mantidas em memória.
+    """
+
+    def __init__(self, static_dir):
+        self.static_dir = static_dir
+        self.assets = {}
+        self.by_hashed = {}
+        self._compressed = {}
+        self._lock = threading.Lock()
+        self.scan()
+
+    def scan(self):
+        assets = {}
+        for root, _dirs, files in os.walk(self.static_dir):
+            for name in files:
+                if _PRECOMPRESSED.search(name):
+                    continue
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+                assets[filename] = Asset(filename, path, digest, len(data), os.path.getmtime(path))
+        self.assets = assets
+        self.by_hashed = {asset.hashed: asset for asset in assets.values()}
+        with self._lock:
+            self._compressed.clear()
+
+    def url_filename(self, filename):
+        """Nome com hash para usar na URL (o próprio nome se não for um asset conhecido)"""
+        asset = self.assets.get(filename)
+        return asset.hashed if asset else filename
+
+    def encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def compressed(self, asset, encoding):
+        """Conteúdo de asset comprimido com encoding (arquivo pré-comprimido ou memória)"""
+        key = (asset.hashed, encoding)
+        data = self._compressed.get(key)
+        if data is not None:
+            return data
+
+        precompressed = asset.path + PRECOMPRESSED_SUFFIXES[encoding]
+        if os.path.exists(precompressed) and os.path.getmtime(precompressed) >= asset.mtime:
+            with open(precompressed, 'rb') as f:
+                data = f.read()
+        else:
+            with open(asset.path, 'rb') as f:
+                data = _compress(f.read(), encoding)
+        with self._lock:
+            self._compressed[key] = data
+        return data
+
+
+def build_assets(static_dir):
+    """
+    Gera as versões .gz (e .br, com brotli instalado) ao lado de cada
+    arquivo comprimível. Usado antes de empacotar o executável.
+
+    Returns:
+        list: (arquivo, tamanho original, {encoding: tamanho comprimido})
+    """
+    manifest = AssetManifest(static_dir)
+    results = []
+    for asset in sorted(manifest.assets.values(), key=lambda a: a.filename):
+        if not asset.compressible:
+            continue
+        with open(asset.path, 'rb') as f:
+            data = f.read()
+        sizes = {}
+        for encoding in manifest.encodings():
+            compressed = _compress(data, encoding)
+            with open(asset.path + PRECOMPRESSED_SUFFIXES[encoding], 'wb') as f:
+                f.write(compressed)
+            sizes[encoding] = len(compressed)
+        results.append((asset.filename, len(data), sizes))
+    return results
+
+
+def init_assets(app, static_dir, max_age):
+    """
+    Reescreve url_for('static', ...) para o nome com hash e troca a view
+    de /static: nomes com hash recebem cache imutável e a melhor versão
+    comprimida aceita pelo navegador; nomes sem hash seguem o envio padrão.
+    """
+    manifest = AssetManifest(static_dir)
+    app.extensions['asset_manifest'] = manifest
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.url_filename(values['filename'])
+
+    def serve_static(filename):
+        asset = manifest.by_hashed.get(filename)
+        if asset is None:
+            return current_app.send_static_file(filename)
+
+        cache_control = f'public, max-age={int(max_age)}, immutable'
+        encoding = None
+        if asset.compressible:
+            accepted = request.accept_encodings
+            encoding = next((e for e in manifest.encodings() if accepted[e]), None)
+
+        if encoding is None:
+            response = send_file(asset.path, mimetype=asset.mimetype, conditional=True, etag=asset.digest)
+        else:
+            etag = f'{asset.digest}-{encoding}'
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = Response(manifest.compressed(asset, encoding), mimetype=asset.mimetype)
+                response.headers['Content-Encoding'] = encoding
+            response.set_etag(etag)
+        if asset.compressible:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+    app.view_functions['static'] = serve_static
+    return manifest
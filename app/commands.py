@@ -0,0 +1,225 @@
+"""
+Comandos de linha de comando (Flask CLI)
+Uso: flask --app app <comando>
+"""
+import click
+
+
+def register_commands(app):
+    @app.cli.command('migrate')
+    def migrate():
+        """Aplica as migrações pendentes do banco de dados."""
+        from app.models import get_db
+        from app.migrations import run_migrations, get_schema_version, LATEST_VERSION
+        db = get_db()
+        before = get_schema_version(db)
+        after = run_migrations(db)
+        click.echo(f"Schema na versão {after} (antes: {before}, mais recente: {LATEST_VERSION}).")
+
+    @app.cli.command('rebuild-rollup')
+    def rebuild_rollup():
+        """Recalcula o consolidado de vendas (sales_rollup) do dashboard."""
+        from app.models import get_partition_db, get_partitions
+        from app.services.dashboard_service import rebuild_sales_rollup
+        from app.services.archive_service import add_archived_rollup
+        rows = rebuild_sales_rollup(get_partition_db(0))
+        for number, _store, _path in get_partitions():
+            rows += rebuild_sales_rollup(get_partition_db(number))
+        archived = add_archived_rollup()
+        click.echo(f"Consolidado de vendas recalculado: {rows} linhas ({archived} ordens do arquivo).")
+
+    @app.cli.command('rebuild-receivables')
+    def rebuild_receivables_command():
+        """Gera de novo as parcelas a receber em aberto de todas as ordens."""
+        from app.models import get_partition_db, get_partitions
+        from app.services.receivable_service import rebuild_receivables
+        count = rebuild_receivables(get_partition_db(0))
+        for number, _store, _path in get_partitions():
+            count += rebuild_receivables(get_partition_db(number))
+        click.echo(f"Parcelas a receber em aberto: {count}.")
+
+    @app.cli.command('close-cash')
+    def close_cash():
+        """Registra os fechamentos diários do caixa até ontem."""
+        from datetime import datetime
+        from app.models import get_partition_db, get_partitions
+        from app.services.cashflow_service import close_days
+        today = datetime.now().strftime('%Y-%m-%d')
+        for number in [0] + [number for number, _store, _path in get_partitions()]:
+            last = close_days(today, db=get_partition_db(number))
+            click.echo(f"Banco {number}: último fechamento {last['date'] if last else '-'}.")
+
+    @app.cli.command('query-plans')
+    @click.option('--all', 'show_all', is_flag=True, help='Lista também os comandos que usam índice.')
+    def query_plans(show_all):
+        """Percorre as páginas principais e lista os comandos sem índice utilizável."""
+        from app.models import get_db, get_query_plan_analyzer
+        analyzer = get_query_plan_analyzer()
+        if not analyzer.enabled:
+            # Comando de diagnóstico: analisa mesmo com QUERY_PLAN_CHECK = 'off'
+            analyzer.mode = 'warn'
+
+        row = get_db().execute("SELECT id FROM orders WHERE deleted_at IS NULL ORDER BY id DESC LIMIT 1").fetchone()
+        order_id = row['id'] if row else 1
+        urls = [
+            '/', '/?status=Pendente', '/?store=Centro', '/?q=silva', '/api/orders', '/api/orders/search?q=silva',
+            '/dashboard', '/cashflow/', '/cashflow/balance', f'/cashflow/order-balance/{order_id}',
+            f'/details/{order_id}', f'/details/{order_id}/download', f'/print/order/{order_id}',
+            '/reports', '/reports/export?format=excel', '/reports/export?format=pdf',
+        ]
+        analyzer.reset()
+        client = app.test_client()
+        for url in urls:
+            response = client.get(url)
+            response.get_data()
+            response.close()
+
+        items = analyzer.report(only_scans=not show_all)
+        for item in items:
+            flag = f"SCAN {', '.join(item['scans'])}" if item['scans'] else 'ok'
+            click.echo(f"[{flag}] {item['sql']}")
+            for detail in item['plan']:
+                click.echo(f"    {detail}")
+        scans = sum(1 for item in items if item['scans'])
+        click.echo(f"{scans} comando(s) lendo tabelas grandes inteiras em {len(urls)} páginas.")
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Gera as versões comprimidas (.gz/.br) dos arquivos estáticos."""
+        from app.assets import build_assets
+        for filename, size, sizes in build_assets(app.static_folder):
+            compressed = ', '.join(f"{encoding} {length / 1024:.1f} KB" for encoding, length in sizes.items())
+            click.echo(f"{filename}: {size / 1024:.1f} KB -> {compressed}")
+
+    @app.cli.command('profile-startup')
+    @click.option('--top', default=15, help='Quantidade de módulos listados.')
+    def profile_startup_command(top):
+        """Mostra onde vai o tempo de inicialização (fases e imports mais caros)."""
+        from app.startup_profile import profile_startup
+        profile = profile_startup(top)
+        click.echo("Fases:")
+        for name, ms in profile['phases']:
+            click.echo(f"  {name:28s} {ms:9.1f} ms")
+        click.echo("Pacotes (tempo próprio dos módulos):")
+        for name, ms in profile['packages']:
+            click.echo(f"  {name:28s} {ms:9.1f} ms")
+        click.echo("Módulos mais caros (tempo acumulado / próprio):")
+        for name, cumulative, own in profile['modules']:
+            click.echo(f"  {name:40s} {cumulative:9.1f} ms {own:9.1f} ms")
+
+    @app.cli.command('import-orders')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--dry-run', is_flag=True, help='Só valida, sem gravar.')
+    @click.option('--max-errors', default=50, help='Erros listados na saída.')
+    def import_orders_command(path, dry_run, max_errors):
+        """Importa ordens e graus de uma planilha CSV ou XLSX."""
+        from app.services.import_service import read_rows, import_orders
+        with open(path, 'rb') as f:
+            result = import_orders(read_rows(f, path), dry_run=dry_run)
+        for line, error in result['errors'][:max_errors]:
+            click.echo(f"  linha {line}: {error}")
+        if len(result['errors']) > max_errors:
+            click.echo(f"  ... e mais {len(result['errors']) - max_errors} erros")
+        action = 'válidas (nada gravado)' if dry_run else 'importadas'
+        click.echo(f"{result['imported']} ordens {action}, {result['graus']} graus, "
+                   f"{len(result['errors'])} linhas com erro, em {result['seconds']}s.")
+
+    @app.cli.command('partition-stores')
+    @click.argument('stores', nargs=-1)
+    def partition_stores(stores):
+        """Move as ordens de cada loja (ou só de STORES) para um arquivo SQLite próprio."""
+        from app.config import STORE_PARTITIONS, STORE_PARTITIONS_DIR
+        from app.models import get_partition_db
+        from app.models.instrumentation import InstrumentedConnection
+        from app.models.partitions import create_partition, move_store_rows
+        db = get_partition_db(0)
+        if isinstance(db, InstrumentedConnection):
+            db = db.raw
+        if not stores:
+            stores = [row[0] for row in db.execute(
+                "SELECT DISTINCT store FROM orders WHERE COALESCE(store, '') != '' ORDER BY store"
+            )]
+        for store in stores:
+            number, path = create_partition(db, store, STORE_PARTITIONS_DIR)
+            moved = move_store_rows(db, number, store, path)
+            click.echo(f"Loja {store}: {moved} ordens movidas para {path}")
+        if not STORE_PARTITIONS:
+            click.echo("Defina STORE_PARTITIONS=true para usar as partições.")
+        click.echo("Reinicie a aplicação para carregar as partições.")
+
+    @app.cli.command('sync')
+    @click.argument('url')
+    @click.option('--token', envvar='SYNC_TOKEN', required=True, help='Token do par (padrão: SYNC_TOKEN).')
+    @click.option('--pull-only', is_flag=True, help='Só recebe as alterações do par.')
+    @click.option('--push-only', is_flag=True, help='Só envia as alterações daqui.')
+    def sync(url, token, pull_only, push_only):
+        """Troca com o nó em URL as alterações feitas desde a última sincronização."""
+        from app.services.sync_service import sync_with_peer, SyncError
+        try:
+            result = sync_with_peer(url, token, pull=not push_only, push=not pull_only)
+        except SyncError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Nó {result['node']} <-> {result['peer']}: {result['pulled']} registros recebidos, "
+                   f"{result['pushed']} enviados, {result['conflicts']} conflitos.")
+        if result['conflicts']:
+            click.echo("Conflitos não aplicados ficam na tabela sync_conflicts.")
+
+    @app.cli.command('sync-id-range')
+    @click.argument('number', type=click.IntRange(1, 9000))
+    def sync_id_range(number):
+        """Faz os novos registros daqui usarem ids a partir de NUMBER * 10^12."""
+        from app.models import get_partition_db
+        from app.services.sync_service import reserve_id_range
+        base = reserve_id_range(get_partition_db(0), number)
+        click.echo(f"Novos registros usam ids a partir de {base + 1}.")
+
+    @app.cli.command('backup')
+    @click.option('--list', 'show_list', is_flag=True, help='Só lista os snapshots existentes.')
+    def backup(show_list):
+        """Cria um snapshot verificado dos bancos (com a aplicação rodando ou não)."""
+        from app.services.backup_service import create_snapshot, apply_retention, list_snapshots
+        if not show_list:
+            manifest = create_snapshot()
+            removed = apply_retention()
+            size = sum(f['compressed_size'] for f in manifest['files'])
+            click.echo(f"Snapshot {manifest['name']}: {len(manifest['files'])} arquivo(s), "
+                       f"{size / 1024:.1f} KB comprimidos, em {manifest['seconds']}s.")
+            if removed:
+                click.echo(f"Removidos pela retenção: {', '.join(removed)}")
+            return
+        for snapshot in list_snapshots():
+            size = sum(f['compressed_size'] for f in snapshot['files'])
+            files = ', '.join(f['filename'] for f in snapshot['files'])
+            click.echo(f"{snapshot['name']}  {size / 1024:10.1f} KB  {files}")
+
+    @app.cli.command('restore-backup')
+    @click.argument('name')
+    @click.option('--yes', is_flag=True, help='Não pede confirmação.')
+    def restore_backup(name, yes):
+        """Restaura o snapshot NAME (ver 'backup --list') sobre os bancos atuais."""
+        from app.services.backup_service import restore_snapshot, BackupError
+        if not yes:
+            click.confirm(f"Os dados atuais serão substituídos pelo snapshot {name}. Continuar?", abort=True)
+        try:
+            restored = restore_snapshot(name)
+        except BackupError as e:
+            raise click.ClickException(str(e))
+        for path in restored:
+            click.echo(f"Restaurado: {path}")
+
+    @app.cli.command('archive')
+    @click.option('--year', type=int, help='Arquiva também as ordens pagas e o caixa até o fim deste ano.')
+    @click.option('--deleted-after-days', type=click.IntRange(0), default=None,
+                  help='Dias na lixeira antes de arquivar (padrão: ARCHIVE_DELETED_AFTER_DAYS).')
+    def archive(year, deleted_after_days):
+        """Move ordens excluídas e anos encerrados para o banco de arquivo."""
+        from app.config import ARCHIVE_DB_PATH, ARCHIVE_DELETED_AFTER_DAYS
+        from app.services.archive_service import archive as archive_rows, ArchiveError
+        if deleted_after_days is None:
+            deleted_after_days = ARCHIVE_DELETED_AFTER_DAYS
+        try:
+            moved = archive_rows(year, deleted_after_days)
+        except ArchiveError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"{moved['orders']} ordens, {moved['graus']} graus, {moved['partial_payments']} pagamentos "
+                   f"e {moved['cash_flow']} movimentações de caixa movidos para {ARCHIVE_DB_PATH}.")
@@ -16,26 +16,13 @@ if getattr(sys, 'frozen', False):
 
     TEMPLATE_DIR = os.path.join(INTERNAL_DIR, 'app', 'templates')
     STATIC_DIR = os.path.join(INTERNAL_DIR, 'app', 'static')
-    
-    try:
-        with open(os.path.join(BASE_DIR, 'debug_paths.txt'), 'w') as f:
-            f.write(f"Executable: {sys.executable}\n")
-            f.write(f"Base Dir: {BASE_DIR}\n")
-            f.write(f"Internal Dir: {INTERNAL_DIR}\n")
-            f.write(f"Static Dir: {STATIC_DIR}\n")
-            f.write(f"Template Dir: {TEMPLATE_DIR}\n")
-            if os.path.exists(STATIC_DIR):
-                f.write(f"Static contents: {os.listdir(STATIC_DIR)}\n")
-            else:
-                f.write("Static dir does not exist!\n")
-    except Exception as e:
-        pass
 else:
     BASE_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+    INTERNAL_DIR = BASE_DIR
     TEMPLATE_DIR = os.path.join(BASE_DIR, 'app', 'templates')
     STATIC_DIR = os.path.join(BASE_DIR, 'app', 'static')
 
-DB_PATH = os.path.join(BASE_DIR, 'data.db')
+DB_PATH = os.getenv('DB_PATH') or os.path.join(BASE_DIR, 'data.db')
 
 # Variáveis de segurança - ler de .env
 SECRET_KEY = os.getenv('SECRET_KEY')
@@ -48,3 +35,108 @@ HOST = '127.0.0.1'
 PORT = 5000
 DEBUG_MODE = not getattr(sys, 'frozen', False)
 
+# Servidor: 'production' (pool de threads, app/server.py) ou 'development'
+# (app.run do Flask). O executável usa produção por padrão.
+SERVER_MODE = (os.getenv('SERVER_MODE') or ('production' if getattr(sys, 'frozen', False) else 'development')).lower()
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', '16'))
+SERVER_QUEUE_LIMIT = int(os.getenv('SERVER_QUEUE_LIMIT', '64'))
+SERVER_KEEP_ALIVE = float(os.getenv('SERVER_KEEP_ALIVE', '2'))
+SERVER_SHUTDOWN_TIMEOUT = float(os.getenv('SERVER_SHUTDOWN_TIMEOUT', '30'))
+
+# Pool de conexões SQLite
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+DB_BUSY_TIMEOUT_MS = 5000
+DB_CACHE_SIZE_KB = 16000
+DB_MMAP_SIZE = 256 * 1024 * 1024
+
+# Métricas por requisição (latência e comandos SQL) em /debug/metrics,
+# desligadas por padrão; as rotas /debug exigem a permissão settings/manage
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+# Arquivos estáticos com hash no nome: cache imutável no navegador (1 ano)
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+# Cache de dados agregados (dashboard e resumo do caixa), invalidado pelo
+# PRAGMA data_version; 0 desliga o cache
+DATA_CACHE_SIZE = int(os.getenv('DATA_CACHE_SIZE', '64'))
+
+# Análise de planos (EXPLAIN QUERY PLAN) dos comandos SQL: 'off', 'warn' ou 'fail'
+# Em 'fail', leituras completas de tabelas grandes levantam FullTableScanError
+QUERY_PLAN_CHECK = (os.getenv('QUERY_PLAN_CHECK') or ('warn' if DEBUG_MODE else 'off')).lower()
+QUERY_PLAN_LARGE_TABLES = (
+    'orders', 'graus', 'partial_payments', 'cash_flow',
+    'accounts_payable', 'accounts_receivable'
+)
+
+# Paginação da listagem de ordens (keyset em orders.id)
+ORDERS_PAGE_SIZE = 50
+ORDERS_PAGE_SIZE_MAX = 200
+
+# Partições por loja: ordens, graus, pagamentos e caixa de cada loja num
+# arquivo SQLite próprio (criadas com 'flask --app app partition-stores')
+STORE_PARTITIONS = os.getenv('STORE_PARTITIONS', 'false').lower() in ('1', 'true', 'yes')
+STORE_PARTITIONS_DIR = os.getenv('STORE_PARTITIONS_DIR') or os.path.join(os.path.dirname(DB_PATH), 'lojas')
+
+# Backup online (Connection.backup em passos pequenos, sem parar a
+# aplicação): cópias comprimidas em BACKUP_DIR a cada BACKUP_INTERVAL_MINUTES
+# (0 desliga; ligado por padrão no executável). Mantém as BACKUP_KEEP_LAST
+# mais recentes, mais uma por dia e uma por mês nos períodos configurados.
+BACKUP_DIR = os.getenv('BACKUP_DIR') or os.path.join(os.path.dirname(DB_PATH), 'backups')
+BACKUP_INTERVAL_MINUTES = int(os.getenv('BACKUP_INTERVAL_MINUTES') or (60 if getattr(sys, 'frozen', False) else 0))
+BACKUP_KEEP_LAST = int(os.getenv('BACKUP_KEEP_LAST', '24'))
+BACKUP_KEEP_DAILY = int(os.getenv('BACKUP_KEEP_DAILY', '7'))
+BACKUP_KEEP_MONTHLY = int(os.getenv('BACKUP_KEEP_MONTHLY', '6'))
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_PAUSE_MS = 10
+
+# Contas a pagar: vencimentos dos próximos PAYABLES_UPCOMING_DAYS dias na
+# página do caixa; a conta do laboratório vence LAB_PAYABLE_DAYS dias após o lançamento
+PAYABLES_UPCOMING_DAYS = int(os.getenv('PAYABLES_UPCOMING_DAYS', '7'))
+LAB_PAYABLE_DAYS = int(os.getenv('LAB_PAYABLE_DAYS', '30'))
+
+# Arquivo: ordens excluídas há mais de ARCHIVE_DELETED_AFTER_DAYS dias e anos
+# encerrados saem das tabelas principais para este banco
+# ('flask --app app archive'); a lixeira (/trash) lista e restaura
+ARCHIVE_DB_PATH = os.getenv('ARCHIVE_DB_PATH') or os.path.join(os.path.dirname(DB_PATH), 'arquivo.db')
+ARCHIVE_DELETED_AFTER_DAYS = int(os.getenv('ARCHIVE_DELETED_AFTER_DAYS', '90'))
+
+# Sincronização entre lojas (/sync e 'flask --app app sync'): sem
+# SYNC_TOKEN os endpoints ficam desligados. SYNC_NODE_ID substitui a
+# identificação gerada (útil quando o banco foi copiado de outra loja).
+SYNC_TOKEN = os.getenv('SYNC_TOKEN', '')
+SYNC_NODE_ID = os.getenv('SYNC_NODE_ID', '')
+SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', '500'))
+
+# Role usada nas verificações de permissão quando a sessão não define uma
+# (sem tela de login, todos operam como administrador)
+DEFAULT_ROLE = os.getenv('DEFAULT_ROLE', 'admin')
+
+
+
+def write_debug_paths():
+    """
+    Grava debug_paths.txt com os caminhos usados pelo executável.
+    Roda só sob demanda (DEBUG_PATHS=1 ou 'Gestao_Otica.exe --diagnostics'),
+    não a cada inicialização.
+    """
+    path = os.path.join(BASE_DIR, 'debug_paths.txt')
+    with open(path, 'w') as f:
+        f.write(f"Executable: {sys.executable}\n")
+        f.write(f"Base Dir: {BASE_DIR}\n")
+        f.write(f"Internal Dir: {INTERNAL_DIR}\n")
+        f.write(f"Static Dir: {STATIC_DIR}\n")
+        f.write(f"Template Dir: {TEMPLATE_DIR}\n")
+        f.write(f"Database: {DB_PATH}\n")
+        if os.path.exists(STATIC_DIR):
+            f.write(f"Static contents: {os.listdir(STATIC_DIR)}\n")
+        else:
+            f.write("Static dir does not exist!\n")
+    return path
+
+
+if os.getenv('DEBUG_PATHS', '').lower() in ('1', 'true', 'yes'):
+    try:
+        write_debug_paths()
+    except Exception:
+        pass
@@ -0,0 +1,3 @@
+from .runner import run_migrations, get_schema_version, MIGRATIONS, LATEST_VERSION
+
+__all__ = ['run_migrations', 'get_schema_version', 'MIGRATIONS', 'LATEST_VERSION']
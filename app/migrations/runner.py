@@ -0,0 +1,89 @@
+"""
+Migration Runner
+Aplica as migrações versionadas usando PRAGMA user_version
+"""
+import logging
+from app.migrations import (
+    v001_base_schema,
+    v002_legacy_columns,
+    v003_performance_indexes,
+    v004_orders_fts,
+    v005_sales_rollup,
+    v006_cash_closings,
+    v007_order_versions,
+    v008_store_partitions,
+    v009_change_log,
+    v010_cash_archive_totals,
+    v011_receivables,
+    v012_payables,
+    v013_lab_paid_payables,
+    v014_order_lab_cost,
+    v015_lab_paid_settlement,
+    v016_trash_index,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# (versão, descrição, função de upgrade) - sempre em ordem crescente.
+# Nunca altere uma migração já publicada: crie uma nova versão.
+MIGRATIONS = [
+    (1, 'Schema base', v001_base_schema.upgrade),
+    (2, 'Colunas legadas (adicao, endereco, deleted_at, cash_flow_id)', v002_legacy_columns.upgrade),
+    (3, 'Índices de desempenho', v003_performance_indexes.upgrade),
+    (4, 'Pesquisa textual de ordens (FTS5)', v004_orders_fts.upgrade),
+    (5, 'Consolidado mensal de vendas', v005_sales_rollup.upgrade),
+    (6, 'Fechamento de caixa diário', v006_cash_closings.upgrade),
+    (7, 'Versão por ordem para ETags', v007_order_versions.upgrade),
+    (8, 'Registro de partições por loja', v008_store_partitions.upgrade),
+    (9, 'Log de alterações para sincronização', v009_change_log.upgrade),
+    (10, 'Totais do caixa arquivado', v010_cash_archive_totals.upgrade),
+    (11, 'Parcelas a receber', v011_receivables.upgrade),
+    (12, 'Contas a pagar', v012_payables.upgrade),
+    (13, 'Laboratório pago dá baixa na conta', v013_lab_paid_payables.upgrade),
+    (14, 'Custo do laboratório na ordem', v014_order_lab_cost.upgrade),
+    (15, 'Laboratório pago com saída no caixa', v015_lab_paid_settlement.upgrade),
+    (16, 'Índice da lixeira', v016_trash_index.upgrade),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(db):
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(db):
+    """
+    Aplica as migrações pendentes, cada uma na sua própria transação.
+    Com o schema em dia custa apenas a leitura do PRAGMA user_version.
+    
+    Returns:
+        int: versão do schema após a execução
+    """
+    version = get_schema_version(db)
+    if version >= LATEST_VERSION:
+        return version
+    
+    for number, description, upgrade in MIGRATIONS:
+        if number <= version:
+            continue
+        logger.info(f"Aplicando migração {number}: {description}")
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Outro processo pode ter aplicado a migração enquanto esperávamos o lock
+            if get_schema_version(db) >= number:
+                db.commit()
+                version = number
+                continue
+            upgrade(db)
+            # user_version é transacional: só muda se a migração inteira passar
+            db.execute(f"PRAGMA user_version = {int(number)}")
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception(f"Erro na migração {number}: {description}")
+            raise
+        version = number
+    
+    return version
@@ -0,0 +1,32 @@
+"""
+Funções auxiliares para as migrações
+"""
+import sqlite3
+
+
+def execute_script(db, script):
+    """
+    Executa um script SQL comando a comando, dentro da transação corrente.
+    (sqlite3.executescript faria COMMIT antes de começar.)
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            db.execute(statement)
+            statement = ''
+    if statement.strip():
+        db.execute(statement)
+
+
+def column_exists(db, table, column):
+    columns = [info[1] for info in db.execute(f"PRAGMA table_info({table})").fetchall()]
+    return column in columns
+
+
+def add_column_if_missing(db, table, column, definition):
+    """Adiciona a coluna se ela ainda não existir. Retorna True se adicionou."""
+    if column_exists(db, table, column):
+        return False
+    db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
@@ -0,0 +1,13 @@
+"""
+Migração 001: schema base (app/models/schema.sql)
+Em bancos antigos as tabelas já existem e nada é alterado.
+"""
+import os
+from app.migrations.utils import execute_script
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'schema.sql')
+
+
+def upgrade(db):
+    with open(SCHEMA_PATH, mode='r', encoding='utf-8') as f:
+        execute_script(db, f.read())
@@ -0,0 +1,14 @@
+"""
+Migração 002: colunas acrescentadas depois da primeira versão
+(antes feitas pelos scripts migrate_db.py, migrate_db_address.py e
+add_cashflow_id_column.py)
+"""
+from app.migrations.utils import add_column_if_missing
+
+
+def upgrade(db):
+    add_column_if_missing(db, 'graus', 'adicao', 'TEXT')
+    add_column_if_missing(db, 'orders', 'endereco', 'TEXT')
+    add_column_if_missing(db, 'orders', 'seller_id', 'INTEGER')
+    add_column_if_missing(db, 'orders', 'deleted_at', 'TEXT DEFAULT NULL')
+    add_column_if_missing(db, 'partial_payments', 'cash_flow_id', 'INTEGER')
@@ -0,0 +1,30 @@
+"""
+Migração 003: índices de desempenho de orders, cash_flow, graus e partial_payments
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Listagem de ordens (paginação keyset em id, filtros de status e loja)
+CREATE INDEX IF NOT EXISTS idx_orders_deleted_id ON orders(deleted_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_deleted_status_id ON orders(deleted_at, payment_status, id);
+CREATE INDEX IF NOT EXISTS idx_orders_deleted_store_id ON orders(deleted_at, store, id);
+CREATE INDEX IF NOT EXISTS idx_orders_deleted_store_status_id ON orders(deleted_at, store, payment_status, id);
+
+-- Relatórios por período (exam_date) e busca por número da OS
+CREATE INDEX IF NOT EXISTS idx_orders_exam_date ON orders(exam_date);
+CREATE INDEX IF NOT EXISTS idx_orders_os_number ON orders(os_number);
+
+-- Fluxo de caixa: somas por data/tipo, filtro por tipo e vínculo com a OS
+CREATE INDEX IF NOT EXISTS idx_cash_flow_date_type ON cash_flow(date, type, amount);
+CREATE INDEX IF NOT EXISTS idx_cash_flow_type_date ON cash_flow(type, date);
+CREATE INDEX IF NOT EXISTS idx_cash_flow_order_id ON cash_flow(order_id);
+
+-- Graus e pagamentos parciais de uma OS
+CREATE INDEX IF NOT EXISTS idx_graus_order_id ON graus(order_id);
+CREATE INDEX IF NOT EXISTS idx_partial_payments_order_date ON partial_payments(order_id, payment_date);
+CREATE INDEX IF NOT EXISTS idx_partial_payments_cash_flow_id ON partial_payments(cash_flow_id);
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
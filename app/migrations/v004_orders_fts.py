@@ -0,0 +1,51 @@
+"""
+Migração 004: índice de pesquisa textual (FTS5) das ordens
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Pesquisa textual das ordens (FTS5). Só ordens não deletadas entram no
+-- índice; remove_diacritics faz "joao" encontrar "João". As colunas *_digits
+-- guardam telefone e CPF só com dígitos, para buscas sem formatação.
+CREATE VIRTUAL TABLE IF NOT EXISTS orders_fts USING fts5(
+    os_number, client_name, phone, cpf, phone_digits, cpf_digits,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS orders_fts_ai AFTER INSERT ON orders
+WHEN NEW.deleted_at IS NULL
+BEGIN
+    INSERT INTO orders_fts (rowid, os_number, client_name, phone, cpf, phone_digits, cpf_digits)
+    VALUES (NEW.id, NEW.os_number, NEW.client_name, NEW.phone, NEW.cpf,
+            replace(replace(replace(replace(replace(replace(COALESCE(NEW.phone, ''), '.', ''), '-', ''), '(', ''), ')', ''), '/', ''), ' ', ''),
+            replace(replace(replace(replace(replace(replace(COALESCE(NEW.cpf, ''), '.', ''), '-', ''), '(', ''), ')', ''), '/', ''), ' ', ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS orders_fts_au AFTER UPDATE OF os_number, client_name, phone, cpf, deleted_at ON orders
+BEGIN
+    DELETE FROM orders_fts WHERE rowid = OLD.id;
+    INSERT INTO orders_fts (rowid, os_number, client_name, phone, cpf, phone_digits, cpf_digits)
+    SELECT NEW.id, NEW.os_number, NEW.client_name, NEW.phone, NEW.cpf,
+           replace(replace(replace(replace(replace(replace(COALESCE(NEW.phone, ''), '.', ''), '-', ''), '(', ''), ')', ''), '/', ''), ' ', ''),
+           replace(replace(replace(replace(replace(replace(COALESCE(NEW.cpf, ''), '.', ''), '-', ''), '(', ''), ')', ''), '/', ''), ' ', '')
+    WHERE NEW.deleted_at IS NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS orders_fts_ad AFTER DELETE ON orders
+BEGIN
+    DELETE FROM orders_fts WHERE rowid = OLD.id;
+END;
+
+-- Preenche o índice em bancos que já tinham ordens antes dele existir
+INSERT INTO orders_fts (rowid, os_number, client_name, phone, cpf, phone_digits, cpf_digits)
+SELECT id, os_number, client_name, phone, cpf,
+       replace(replace(replace(replace(replace(replace(COALESCE(phone, ''), '.', ''), '-', ''), '(', ''), ')', ''), '/', ''), ' ', ''),
+       replace(replace(replace(replace(replace(replace(COALESCE(cpf, ''), '.', ''), '-', ''), '(', ''), ')', ''), '/', ''), ' ', '')
+FROM orders
+WHERE deleted_at IS NULL AND NOT EXISTS (SELECT 1 FROM orders_fts);
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
@@ -0,0 +1,97 @@
+"""
+Migração 005: consolidado mensal de vendas do dashboard (sales_rollup)
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Consolidado mensal de vendas para o dashboard, mantido por triggers.
+-- month é o 'YYYY-MM' do exam_date ('' quando ausente ou inválido); só
+-- ordens não deletadas são contadas. sales_* considera apenas valor_pago > 0.
+CREATE TABLE IF NOT EXISTS sales_rollup (
+    month TEXT NOT NULL,
+    store TEXT NOT NULL,
+    lab TEXT NOT NULL,
+    payment_status TEXT NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    revenue REAL NOT NULL DEFAULT 0,
+    sales_count INTEGER NOT NULL DEFAULT 0,
+    sales_revenue REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, store, lab, payment_status)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS sales_rollup_ai AFTER INSERT ON orders
+BEGIN
+    INSERT INTO sales_rollup (month, store, lab, payment_status, order_count, revenue, sales_count, sales_revenue)
+    SELECT CASE WHEN date(NEW.exam_date) = NEW.exam_date THEN substr(NEW.exam_date, 1, 7) ELSE '' END,
+           COALESCE(NEW.store, ''), COALESCE(NEW.lab, ''), COALESCE(NEW.payment_status, ''),
+           1, COALESCE(NEW.valor_pago, 0),
+           COALESCE(NEW.valor_pago, 0) > 0, MAX(COALESCE(NEW.valor_pago, 0), 0)
+    WHERE NEW.deleted_at IS NULL
+    ON CONFLICT (month, store, lab, payment_status) DO UPDATE SET
+        order_count = order_count + excluded.order_count,
+        revenue = revenue + excluded.revenue,
+        sales_count = sales_count + excluded.sales_count,
+        sales_revenue = sales_revenue + excluded.sales_revenue;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sales_rollup_au AFTER UPDATE OF exam_date, store, lab, payment_status, valor_pago, deleted_at ON orders
+BEGIN
+    UPDATE sales_rollup SET
+        order_count = order_count - 1,
+        revenue = revenue - COALESCE(OLD.valor_pago, 0),
+        sales_count = sales_count - (COALESCE(OLD.valor_pago, 0) > 0),
+        sales_revenue = sales_revenue - MAX(COALESCE(OLD.valor_pago, 0), 0)
+    WHERE OLD.deleted_at IS NULL
+      AND month = CASE WHEN date(OLD.exam_date) = OLD.exam_date THEN substr(OLD.exam_date, 1, 7) ELSE '' END
+      AND store = COALESCE(OLD.store, '') AND lab = COALESCE(OLD.lab, '')
+      AND payment_status = COALESCE(OLD.payment_status, '');
+    DELETE FROM sales_rollup
+    WHERE order_count <= 0
+      AND month = CASE WHEN date(OLD.exam_date) = OLD.exam_date THEN substr(OLD.exam_date, 1, 7) ELSE '' END
+      AND store = COALESCE(OLD.store, '') AND lab = COALESCE(OLD.lab, '')
+      AND payment_status = COALESCE(OLD.payment_status, '');
+    INSERT INTO sales_rollup (month, store, lab, payment_status, order_count, revenue, sales_count, sales_revenue)
+    SELECT CASE WHEN date(NEW.exam_date) = NEW.exam_date THEN substr(NEW.exam_date, 1, 7) ELSE '' END,
+           COALESCE(NEW.store, ''), COALESCE(NEW.lab, ''), COALESCE(NEW.payment_status, ''),
+           1, COALESCE(NEW.valor_pago, 0),
+           COALESCE(NEW.valor_pago, 0) > 0, MAX(COALESCE(NEW.valor_pago, 0), 0)
+    WHERE NEW.deleted_at IS NULL
+    ON CONFLICT (month, store, lab, payment_status) DO UPDATE SET
+        order_count = order_count + excluded.order_count,
+        revenue = revenue + excluded.revenue,
+        sales_count = sales_count + excluded.sales_count,
+        sales_revenue = sales_revenue + excluded.sales_revenue;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sales_rollup_ad AFTER DELETE ON orders
+BEGIN
+    UPDATE sales_rollup SET
+        order_count = order_count - 1,
+        revenue = revenue - COALESCE(OLD.valor_pago, 0),
+        sales_count = sales_count - (COALESCE(OLD.valor_pago, 0) > 0),
+        sales_revenue = sales_revenue - MAX(COALESCE(OLD.valor_pago, 0), 0)
+    WHERE OLD.deleted_at IS NULL
+      AND month = CASE WHEN date(OLD.exam_date) = OLD.exam_date THEN substr(OLD.exam_date, 1, 7) ELSE '' END
+      AND store = COALESCE(OLD.store, '') AND lab = COALESCE(OLD.lab, '')
+      AND payment_status = COALESCE(OLD.payment_status, '');
+    DELETE FROM sales_rollup
+    WHERE order_count <= 0
+      AND month = CASE WHEN date(OLD.exam_date) = OLD.exam_date THEN substr(OLD.exam_date, 1, 7) ELSE '' END
+      AND store = COALESCE(OLD.store, '') AND lab = COALESCE(OLD.lab, '')
+      AND payment_status = COALESCE(OLD.payment_status, '');
+END;
+
+-- Preenche o consolidado em bancos que já tinham ordens antes dele existir
+INSERT INTO sales_rollup (month, store, lab, payment_status, order_count, revenue, sales_count, sales_revenue)
+SELECT CASE WHEN date(exam_date) = exam_date THEN substr(exam_date, 1, 7) ELSE '' END,
+       COALESCE(store, ''), COALESCE(lab, ''), COALESCE(payment_status, ''),
+       COUNT(*), SUM(COALESCE(valor_pago, 0)),
+       SUM(COALESCE(valor_pago, 0) > 0), SUM(MAX(COALESCE(valor_pago, 0), 0))
+FROM orders
+WHERE deleted_at IS NULL AND NOT EXISTS (SELECT 1 FROM sales_rollup)
+GROUP BY 1, 2, 3, 4;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
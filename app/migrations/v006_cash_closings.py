@@ -0,0 +1,37 @@
+"""
+Migração 006: fechamento de caixa diário (cash_closings)
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Fechamento de caixa: totais acumulados de entradas/saídas e saldo ao fim
+-- de cada dia com movimentação. O saldo atual é o último fechamento mais as
+-- movimentações posteriores. Qualquer escrita em cash_flow numa data já
+-- fechada invalida os fechamentos a partir dessa data.
+CREATE TABLE IF NOT EXISTS cash_closings (
+    date TEXT PRIMARY KEY,
+    total_entries REAL NOT NULL,
+    total_exits REAL NOT NULL,
+    balance REAL NOT NULL,
+    closed_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS cash_closings_ai AFTER INSERT ON cash_flow
+BEGIN
+    DELETE FROM cash_closings WHERE date >= NEW.date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS cash_closings_au AFTER UPDATE OF date, type, amount ON cash_flow
+BEGIN
+    DELETE FROM cash_closings WHERE date >= MIN(OLD.date, NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS cash_closings_ad AFTER DELETE ON cash_flow
+BEGIN
+    DELETE FROM cash_closings WHERE date >= OLD.date;
+END;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
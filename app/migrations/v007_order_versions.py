@@ -0,0 +1,69 @@
+"""
+Migração 007: versão por ordem (order_versions) para ETags
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Contador de versão de cada ordem, incrementado por qualquer escrita na
+-- ordem, nos seus graus ou nos seus pagamentos parciais. As páginas de
+-- detalhes, impressão e download usam (ordem, versão) como ETag.
+CREATE TABLE IF NOT EXISTS order_versions (
+    order_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TRIGGER IF NOT EXISTS order_versions_orders_ai AFTER INSERT ON orders
+BEGIN
+    INSERT INTO order_versions (order_id, version) VALUES (NEW.id, 1)
+    ON CONFLICT(order_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_versions_orders_au AFTER UPDATE ON orders
+BEGIN
+    INSERT INTO order_versions (order_id, version) VALUES (NEW.id, 1)
+    ON CONFLICT(order_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_versions_orders_ad AFTER DELETE ON orders
+BEGIN
+    UPDATE order_versions SET version = version + 1 WHERE order_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_versions_graus_ai AFTER INSERT ON graus
+BEGIN
+    UPDATE order_versions SET version = version + 1 WHERE order_id = NEW.order_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_versions_graus_au AFTER UPDATE ON graus
+BEGIN
+    UPDATE order_versions SET version = version + 1 WHERE order_id IN (OLD.order_id, NEW.order_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_versions_graus_ad AFTER DELETE ON graus
+BEGIN
+    UPDATE order_versions SET version = version + 1 WHERE order_id = OLD.order_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_versions_partial_payments_ai AFTER INSERT ON partial_payments
+BEGIN
+    UPDATE order_versions SET version = version + 1 WHERE order_id = NEW.order_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_versions_partial_payments_au AFTER UPDATE ON partial_payments
+BEGIN
+    UPDATE order_versions SET version = version + 1 WHERE order_id IN (OLD.order_id, NEW.order_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_versions_partial_payments_ad AFTER DELETE ON partial_payments
+BEGIN
+    UPDATE order_versions SET version = version + 1 WHERE order_id = OLD.order_id;
+END;
+
+-- Ordens já existentes começam na versão 1
+INSERT OR IGNORE INTO order_versions (order_id, version)
+SELECT id, 1 FROM orders;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
@@ -0,0 +1,21 @@
+"""
+Migração 008: registro das partições por loja (store_partitions)
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Lojas cujas ordens, graus, pagamentos e caixa ficam num arquivo SQLite
+-- próprio (modo STORE_PARTITIONS). id é o número da partição: o arquivo é
+-- anexado como loja<id> e os novos registros dessa loja usam ids a partir
+-- de id * 1.000.000.000. Só é usada no banco principal.
+CREATE TABLE IF NOT EXISTS store_partitions (
+    id INTEGER PRIMARY KEY,
+    store TEXT NOT NULL UNIQUE,
+    filename TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
@@ -0,0 +1,128 @@
+"""
+Migração 009: log de alterações (change_log) para a sincronização entre lojas
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Última alteração de cada registro de orders, graus, partial_payments e
+-- cash_flow. Cada escrita remove a entrada anterior do registro e cria uma
+-- nova com seq maior, então o log tem no máximo uma linha por registro e
+-- "seq > N" lista exatamente o que mudou desde N. origin é o nó de onde a
+-- alteração veio (NULL para alterações locais).
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    origin TEXT,
+    UNIQUE (table_name, row_id)
+);
+
+-- Identificação deste nó (criada na primeira sincronização)
+CREATE TABLE IF NOT EXISTS sync_node (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    node_id TEXT NOT NULL
+);
+
+-- Pares conhecidos: received_seq é o último seq do par aplicado aqui,
+-- sent_seq o último seq daqui confirmado pelo par
+CREATE TABLE IF NOT EXISTS sync_peers (
+    node_id TEXT PRIMARY KEY,
+    url TEXT,
+    received_seq INTEGER NOT NULL DEFAULT 0,
+    sent_seq INTEGER NOT NULL DEFAULT 0,
+    last_sync_at TEXT
+);
+
+-- Registros recebidos e não aplicados (kind: id, os_number, modified, constraint)
+CREATE TABLE IF NOT EXISTS sync_conflicts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    node_id TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    remote_row TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS change_log_orders_ai AFTER INSERT ON orders
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'orders' AND row_id = NEW.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('orders', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_orders_au AFTER UPDATE ON orders
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'orders' AND row_id = NEW.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('orders', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_orders_ad AFTER DELETE ON orders
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'orders' AND row_id = OLD.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('orders', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_graus_ai AFTER INSERT ON graus
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'graus' AND row_id = NEW.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('graus', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_graus_au AFTER UPDATE ON graus
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'graus' AND row_id = NEW.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('graus', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_graus_ad AFTER DELETE ON graus
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'graus' AND row_id = OLD.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('graus', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_partial_payments_ai AFTER INSERT ON partial_payments
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'partial_payments' AND row_id = NEW.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('partial_payments', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_partial_payments_au AFTER UPDATE ON partial_payments
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'partial_payments' AND row_id = NEW.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('partial_payments', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_partial_payments_ad AFTER DELETE ON partial_payments
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'partial_payments' AND row_id = OLD.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('partial_payments', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_cash_flow_ai AFTER INSERT ON cash_flow
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'cash_flow' AND row_id = NEW.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('cash_flow', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_cash_flow_au AFTER UPDATE ON cash_flow
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'cash_flow' AND row_id = NEW.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('cash_flow', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_cash_flow_ad AFTER DELETE ON cash_flow
+BEGIN
+    DELETE FROM change_log WHERE table_name = 'cash_flow' AND row_id = OLD.id;
+    INSERT INTO change_log (table_name, row_id) VALUES ('cash_flow', OLD.id);
+END;
+
+-- Registros já existentes entram no log (a primeira sincronização os envia)
+INSERT OR IGNORE INTO change_log (table_name, row_id) SELECT 'orders', id FROM orders;
+INSERT OR IGNORE INTO change_log (table_name, row_id) SELECT 'graus', id FROM graus;
+INSERT OR IGNORE INTO change_log (table_name, row_id) SELECT 'partial_payments', id FROM partial_payments;
+INSERT OR IGNORE INTO change_log (table_name, row_id) SELECT 'cash_flow', id FROM cash_flow;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
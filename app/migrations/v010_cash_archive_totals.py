@@ -0,0 +1,20 @@
+"""
+Migração 010: totais do caixa arquivado (cash_archive_totals)
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Entradas e saídas de cada ano cujas movimentações foram para o banco de
+-- arquivo (archive_service). O saldo do caixa soma esses totais aos
+-- fechamentos e movimentações que continuam em cash_flow.
+CREATE TABLE IF NOT EXISTS cash_archive_totals (
+    year TEXT PRIMARY KEY,
+    total_entries REAL NOT NULL DEFAULT 0,
+    total_exits REAL NOT NULL DEFAULT 0,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
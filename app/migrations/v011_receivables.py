@@ -0,0 +1,31 @@
+"""
+Migração 011: índices e gatilhos das parcelas a receber (accounts_receivable)
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Envelhecimento e projeção: só as parcelas em aberto, por vencimento
+-- (cobre valor e ordem, então as somas são lidas só do índice)
+CREATE INDEX IF NOT EXISTS idx_receivable_status_due ON accounts_receivable(status, due_date, amount, order_id);
+
+-- Cronograma de uma ordem
+CREATE INDEX IF NOT EXISTS idx_receivable_order ON accounts_receivable(order_id, installment_number);
+
+-- Ordem excluída: as parcelas em aberto saem do envelhecimento e voltam
+-- se a ordem for restaurada
+CREATE TRIGGER IF NOT EXISTS receivable_orders_deleted AFTER UPDATE OF deleted_at ON orders
+WHEN NEW.deleted_at IS NOT NULL AND OLD.deleted_at IS NULL
+BEGIN
+    UPDATE accounts_receivable SET status = 'Cancelada' WHERE order_id = NEW.id AND status = 'Pendente';
+END;
+
+CREATE TRIGGER IF NOT EXISTS receivable_orders_restored AFTER UPDATE OF deleted_at ON orders
+WHEN NEW.deleted_at IS NULL AND OLD.deleted_at IS NOT NULL
+BEGIN
+    UPDATE accounts_receivable SET status = 'Pendente' WHERE order_id = NEW.id AND status = 'Cancelada';
+END;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
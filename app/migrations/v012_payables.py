@@ -0,0 +1,30 @@
+"""
+Migração 012: índices e gatilhos das contas a pagar (accounts_payable)
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Contas em aberto por vencimento (próximos vencimentos na página do caixa)
+CREATE INDEX IF NOT EXISTS idx_payable_status_due ON accounts_payable(status, due_date);
+
+-- Contas de uma ordem (conta do laboratório)
+CREATE INDEX IF NOT EXISTS idx_payable_order ON accounts_payable(order_id, category);
+
+-- Ordem excluída: a conta do laboratório em aberto é cancelada e volta se
+-- a ordem for restaurada
+CREATE TRIGGER IF NOT EXISTS payable_orders_deleted AFTER UPDATE OF deleted_at ON orders
+WHEN NEW.deleted_at IS NOT NULL AND OLD.deleted_at IS NULL
+BEGIN
+    UPDATE accounts_payable SET status = 'Cancelada' WHERE order_id = NEW.id AND status = 'Pendente';
+END;
+
+CREATE TRIGGER IF NOT EXISTS payable_orders_restored AFTER UPDATE OF deleted_at ON orders
+WHEN NEW.deleted_at IS NULL AND OLD.deleted_at IS NOT NULL
+BEGIN
+    UPDATE accounts_payable SET status = 'Pendente' WHERE order_id = NEW.id AND status = 'Cancelada';
+END;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
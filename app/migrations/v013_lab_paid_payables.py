@@ -0,0 +1,24 @@
+"""
+Migração 013: laboratório pago fora das contas a pagar dá baixa na conta
+do laboratório em aberto
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- Ordem marcada com laboratório pago (edição da ordem, ação em lote): a
+-- conta do laboratório em aberto fica paga, sem nova saída de caixa, e sai
+-- dos próximos vencimentos. A baixa pelas contas a pagar marca a conta
+-- antes da ordem, então não passa por aqui.
+CREATE TRIGGER IF NOT EXISTS payable_orders_lab_paid AFTER UPDATE OF lab_paid ON orders
+WHEN NEW.lab_paid = 1 AND COALESCE(OLD.lab_paid, 0) != 1
+BEGIN
+    UPDATE accounts_payable
+    SET status = 'Pago', payment_date = date('now', 'localtime'),
+        notes = COALESCE(notes || ' - ', '') || 'Laboratório pago na ordem'
+    WHERE order_id = NEW.id AND category = 'Laboratório' AND status = 'Pendente';
+END;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
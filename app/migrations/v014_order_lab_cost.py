@@ -0,0 +1,9 @@
+"""
+Migração 014: custo do laboratório na ordem (orders.lab_cost), que gera a
+conta do laboratório em accounts_payable
+"""
+from app.migrations.utils import add_column_if_missing
+
+
+def upgrade(db):
+    add_column_if_missing(db, 'orders', 'lab_cost', 'REAL DEFAULT NULL')
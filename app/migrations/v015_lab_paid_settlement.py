@@ -0,0 +1,32 @@
+"""
+Migração 015: laboratório pago na ordem passa pela baixa das contas a
+pagar (com saída no caixa), e desmarcá-lo reabre a conta
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+-- A baixa sem saída no caixa da migração 013 sai: marcar o laboratório
+-- como pago (edição da ordem, ação em lote) dá baixa na conta em aberto
+-- por payable_service.settle_lab_payables, que lança a saída.
+DROP TRIGGER IF EXISTS payable_orders_lab_paid;
+
+-- Laboratório desmarcado: a saída lançada na baixa da conta sai do caixa
+-- e a conta volta a ficar em aberto.
+CREATE TRIGGER IF NOT EXISTS payable_orders_lab_unpaid AFTER UPDATE OF lab_paid ON orders
+WHEN COALESCE(NEW.lab_paid, 0) != 1 AND OLD.lab_paid = 1
+BEGIN
+    DELETE FROM cash_flow
+    WHERE order_id = NEW.id AND type = 'saida' AND category = 'Laboratório'
+      AND id IN (
+          SELECT c.id FROM cash_flow c
+          JOIN accounts_payable p ON p.order_id = c.order_id AND p.payment_date = c.date AND p.amount = c.amount
+          WHERE c.order_id = NEW.id AND p.category = 'Laboratório' AND p.status = 'Pago'
+      );
+    UPDATE accounts_payable SET status = 'Pendente', payment_date = NULL
+    WHERE order_id = NEW.id AND category = 'Laboratório' AND status = 'Pago';
+END;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
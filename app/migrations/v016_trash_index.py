@@ -0,0 +1,13 @@
+"""
+Migração 016: índice parcial das ordens excluídas, para a página da
+lixeira (ORDER BY id DESC sem percorrer as ordens ativas)
+"""
+from app.migrations.utils import execute_script
+
+SQL = """
+CREATE INDEX IF NOT EXISTS idx_orders_trash ON orders(id) WHERE deleted_at IS NOT NULL;
+"""
+
+
+def upgrade(db):
+    execute_script(db, SQL)
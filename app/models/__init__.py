@@ -1,3 +1,11 @@
-from .database import get_db, init_db, close_connection
+from .database import (
+    get_db, init_db, close_connection, get_pool, get_pool_stats, get_query_plan_analyzer,
+    get_partition_db, current_partition, get_partitions, get_db_schemas, get_data_version,
+    partition_for_store, locate_partitions, allocate_order_ids, reserve_order_ids, FEDERATED
+)
 
-__all__ = ['get_db', 'init_db', 'close_connection']
+__all__ = [
+    'get_db', 'init_db', 'close_connection', 'get_pool', 'get_pool_stats', 'get_query_plan_analyzer',
+    'get_partition_db', 'current_partition', 'get_partitions', 'get_db_schemas', 'get_data_version',
+    'partition_for_store', 'locate_partitions', 'allocate_order_ids', 'reserve_order_ids', 'FEDERATED'
+]
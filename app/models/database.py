@@ -2,33 +2,223 @@
 Database Module - SQLite Integration
 Fornece interface de banco de dados usando SQLite local
 """
-import sqlite3
 import os
 import sys
+import json
 import shutil
+import atexit
 import logging
-from flask import g
-from app.config import DB_PATH
+import threading
+from flask import g, request, has_request_context
+from app.config import (
+    DB_PATH, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE_KB, DB_MMAP_SIZE, METRICS_ENABLED,
+    QUERY_PLAN_CHECK, QUERY_PLAN_LARGE_TABLES,
+    STORE_PARTITIONS, STORE_PARTITIONS_DIR
+)
+from app.models.pool import ConnectionPool
+from app.models.instrumentation import InstrumentedConnection
+from app.models.query_plan import QueryPlanAnalyzer
+from app.models.partitions import load_partitions, attach_partitions, locate_sql, partition_schema
+from app.migrations import run_migrations
 
 
 logger = logging.getLogger(__name__)
 
+# Chave do pool de conexões ao banco principal com as partições anexadas
+FEDERATED = 'federated'
+
+# Argumentos de rota que identificam a partição dona do registro
+_ROUTED_ARGS = (('order_id', 'orders'), ('payment_id', 'partial_payments'), ('movement_id', 'cash_flow'))
+
+_pools = {}
+_pool_lock = threading.Lock()
+_partitions = []            # [(número, loja, caminho)], carregadas em init_db
+_analyzer = QueryPlanAnalyzer(QUERY_PLAN_CHECK, QUERY_PLAN_LARGE_TABLES)
+
+
+def get_pool(partition=0):
+    """
+    Retorna o pool de conexões da partição (0 é o banco principal;
+    FEDERATED, o principal com as partições anexadas), criando-o na
+    primeira chamada
+    """
+    pool = _pools.get(partition)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(partition)
+            if pool is None:
+                if partition == FEDERATED:
+                    path = DB_PATH
+                    partitions = list(_partitions)
+                    setup = lambda conn: attach_partitions(conn, partitions)
+                else:
+                    path = DB_PATH if partition == 0 else _partition_path(partition)
+                    setup = None
+                pool = ConnectionPool(
+                    path,
+                    max_size=DB_POOL_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    busy_timeout_ms=DB_BUSY_TIMEOUT_MS,
+                    cache_size_kb=DB_CACHE_SIZE_KB,
+                    mmap_size=DB_MMAP_SIZE,
+                    setup=setup
+                )
+                _pools[partition] = pool
+                atexit.register(pool.close_all)
+    return pool
+
+
+def _partition_path(number):
+    for partition, _store, path in _partitions:
+        if partition == number:
+            return path
+    raise KeyError(f"Partição {number} não registrada")
+
+
+def get_partitions():
+    """Partições por loja carregadas: [(número, loja, caminho)]"""
+    return list(_partitions)
+
+
+def partition_for_store(store):
+    """Número da partição da loja (0 se ela não tiver partição própria)"""
+    for number, partition_store, _path in _partitions:
+        if partition_store == store:
+            return number
+    return 0
+
+
+def get_data_version():
+    """
+    Versão dos dados para caches: o PRAGMA data_version do banco principal,
+    ou de todos os arquivos quando há partições
+    """
+    if not _partitions:
+        return get_pool().data_version()
+    return tuple(get_pool(number).data_version() for number in [0] + [p[0] for p in _partitions])
+
+
+def get_pool_stats():
+    """
+    Retorna as estatísticas do pool de conexões
+    """
+    return get_pool().stats()
+
+
+def get_query_plan_analyzer():
+    """
+    Retorna o analisador de planos de consulta do processo
+    """
+    return _analyzer
+
 
 def get_db():
     """
     Retorna a instância do Banco de Dados (SQLite)
+    A conexão vem do pool e é devolvida no teardown da requisição.
+    Com METRICS_ENABLED, os comandos executados ficam em g.sql_queries;
+    com QUERY_PLAN_CHECK, o plano de cada formato de comando é analisado.
+    Com partições por loja, é a conexão da partição da requisição
+    (ver current_partition).
     """
     if 'db' not in g:
-        g.db = sqlite3.connect(DB_PATH)
-        g.db.row_factory = sqlite3.Row
+        g.db = get_partition_db(current_partition())
     return g.db
 
 
+def get_partition_db(partition):
+    """Conexão da requisição a uma partição específica (ou FEDERATED)"""
+    connections = g.setdefault('partition_dbs', {})
+    if partition not in connections:
+        conn = get_pool(partition).acquire()
+        if METRICS_ENABLED or _analyzer.enabled:
+            analyzer = _analyzer if _analyzer.enabled else None
+            conn = InstrumentedConnection(conn, g.setdefault('sql_queries', []), analyzer)
+        connections[partition] = conn
+    return connections[partition]
+
+
+def current_partition():
+    """
+    Partição usada pela requisição:
+    - rotas de um registro (order_id, payment_id, movement_id): a partição dona dele;
+    - parâmetro store de uma loja com partição: a partição da loja;
+    - demais leituras (GET): FEDERATED, todas as lojas pelas views;
+    - demais escritas: o banco principal.
+    Sem partições, ou fora de uma requisição, é sempre o banco principal (0).
+    """
+    if 'partition' in g:
+        return g.partition
+    partition = 0
+    if STORE_PARTITIONS and _partitions and has_request_context():
+        view_args = request.view_args or {}
+        routed = [(arg, table) for arg, table in _ROUTED_ARGS if arg in view_args]
+        store = request.values.get('store', '').strip()
+        if routed:
+            arg, table = routed[0]
+            partition = locate_partitions(table, [view_args[arg]]).get(view_args[arg], 0)
+        elif store and store != 'all':
+            partition = partition_for_store(store)
+        elif request.method in ('GET', 'HEAD'):
+            partition = FEDERATED
+    g.partition = partition
+    return partition
+
+
+def get_db_schemas():
+    """Schemas com dados de ordens na conexão da requisição (main e, nas leituras federadas, as partições)"""
+    if current_partition() == FEDERATED:
+        return ['main'] + [partition_schema(number) for number, _, _ in _partitions]
+    return ['main']
+
+
+def locate_partitions(table, ids):
+    """{id: número da partição} das linhas de table (orders, graus, partial_payments ou cash_flow)"""
+    if not _partitions:
+        return {row_id: 0 for row_id in ids}
+    numbers = [0] + [number for number, _, _ in _partitions]
+    ids_json = json.dumps(list(ids))
+    rows = get_partition_db(FEDERATED).execute(locate_sql(table, numbers), [ids_json] * len(numbers))
+    return {row[0]: row[1] for row in rows}
+
+
+def allocate_order_ids(count=1):
+    """
+    Reserva count ids de ordem na sequência do banco principal, para
+    ordens gravadas numa partição (os ids seguem crescentes em todas as
+    lojas). Retorna o primeiro id.
+    """
+    db = get_partition_db(0)
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        start = db.execute("""
+            SELECT MAX(COALESCE((SELECT MAX(id) FROM orders), 0),
+                       COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'orders'), 0)) + 1
+        """).fetchone()[0]
+        reserve_order_ids(db, start + count - 1)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return start
+
+
+def reserve_order_ids(db, last_id):
+    """Avança a sequência de ordens do banco principal até last_id (na transação de db)"""
+    updated = db.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'orders'", (last_id,)
+    ).rowcount
+    if not updated:
+        db.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('orders', ?)", (last_id,))
+
+
 def init_db():
     """
     Inicializa o banco de dados.
     Se estiver rodando como executável e o banco não existir,
     copia o banco embutido para a pasta do executável.
+    Em seguida aplica as migrações pendentes (app/migrations).
     """
     
     # Se o arquivo do banco não existe
@@ -43,39 +233,49 @@ def init_db():
                     # Copia o banco embutido para o local de uso (DB_PATH)
                     shutil.copy2(bundled_db, DB_PATH)
                     logger.info(f"Banco de dados inicializado a partir do executável: {DB_PATH}")
-                    return  # Já copiamos o banco pronto, não precisa fazer mais nada
                 except Exception as e:
                     logger.error(f"Erro ao copiar banco de dados: {e}")
     
-    # Se chegou aqui, ou o banco já existe, ou falhou a cópia, ou não é executável
-    # Continua com a verificação padrão
-    db = get_db()
-    
-    # Verificar se as tabelas já existem
-    cursor = db.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = [row[0] for row in cursor.fetchall()]
-    
-    # Se o banco já tem tabelas, não fazer nada
-    if tables:
-        logger.info(f"Banco de dados já inicializado. Tabelas encontradas: {len(tables)}")
-        return
-    
-    # Caso contrário, criar estrutura a partir do schema
+    # Banco copiado, já existente ou novo: aplica as migrações pendentes
+    db = get_partition_db(0)
+    if isinstance(db, InstrumentedConnection):
+        # Backfills das migrações leem tabelas inteiras de propósito
+        db = db.raw
     try:
-        schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-        with open(schema_path, mode='r', encoding='utf-8') as f:
-            db.executescript(f.read())
-        db.commit()
-        logger.info("Tabelas criadas com sucesso via schema.sql")
+        version = run_migrations(db)
+        logger.info(f"Banco de dados na versão {version} do schema")
     except Exception as e:
-        logger.error(f"Erro ao criar tabelas: {e}")
+        logger.error(f"Erro ao aplicar migrações: {e}")
+        return
+
+    if STORE_PARTITIONS:
+        load_store_partitions(db)
+
+
+def load_store_partitions(db):
+    """Carrega o registro de partições e aplica as migrações pendentes em cada arquivo"""
+    global _partitions
+    partitions = load_partitions(db, STORE_PARTITIONS_DIR)
+    for number, store, path in partitions:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Partição da loja {store} não encontrada: {path}")
+    _partitions = partitions
+    for number, store, _path in partitions:
+        conn = get_partition_db(number)
+        try:
+            run_migrations(conn.raw if isinstance(conn, InstrumentedConnection) else conn)
+        except Exception as e:
+            logger.error(f"Erro ao aplicar migrações na partição da loja {store}: {e}")
 
 
 def close_connection(exception):
     """
-    Fecha a conexão com o banco de dados
+    Devolve as conexões com o banco de dados aos pools
     """
-    db = g.pop('db', None)
-    if db is not None:
-        db.close()
+    g.pop('db', None)
+    g.pop('partition', None)
+    for partition, db in g.pop('partition_dbs', {}).items():
+        if isinstance(db, InstrumentedConnection):
+            db = db.raw
+        get_pool(partition).release(db)
 
@@ -0,0 +1,117 @@
+"""
+SQL Instrumentation
+Envolve a conexão SQLite para registrar cada comando executado
+(texto, duração e quantidade de linhas)
+"""
+import re
+import time
+
+_WHITESPACE = re.compile(r'\s+')
+MAX_STATEMENT_LENGTH = 500
+
+
+def normalize_sql(sql):
+    """Texto do comando em uma linha, para agrupar execuções iguais"""
+    return _WHITESPACE.sub(' ', sql).strip()[:MAX_STATEMENT_LENGTH]
+
+
+class QueryRecord:
+    __slots__ = ('sql', 'duration_ms', 'rows')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.duration_ms = 0.0
+        self.rows = 0
+
+    def as_dict(self):
+        return {'sql': self.sql, 'duration_ms': round(self.duration_ms, 3), 'rows': self.rows}
+
+
+class InstrumentedCursor:
+    """
+    Cursor que soma ao registro o tempo gasto lendo as linhas.
+    No SQLite a maior parte do trabalho acontece durante o fetch.
+    """
+
+    def __init__(self, cursor, record):
+        self._cursor = cursor
+        self._record = record
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        result = fetch(*args)
+        self._record.duration_ms += (time.perf_counter() - started) * 1000
+        return result
+
+    def fetchone(self):
+        row = self._timed_fetch(self._cursor.fetchone)
+        if row is not None:
+            self._record.rows += 1
+        return row
+
+    def fetchall(self):
+        rows = self._timed_fetch(self._cursor.fetchall)
+        self._record.rows += len(rows)
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = self._timed_fetch(self._cursor.fetchmany, size or self._cursor.arraysize)
+        self._record.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """
+    Proxy de sqlite3.Connection que registra os comandos em queries
+    (uma lista por requisição). Os demais atributos são repassados à conexão.
+    Com um analyzer (QueryPlanAnalyzer), o plano de cada comando é
+    verificado antes da execução.
+    """
+
+    def __init__(self, conn, queries, analyzer=None):
+        self._conn = conn
+        self.queries = queries
+        self.analyzer = analyzer
+
+    @property
+    def raw(self):
+        """Conexão sqlite3 original"""
+        return self._conn
+
+    def _run(self, method, sql, *args):
+        record = QueryRecord(normalize_sql(sql))
+        self.queries.append(record)
+        started = time.perf_counter()
+        try:
+            cursor = method(sql, *args)
+        finally:
+            record.duration_ms += (time.perf_counter() - started) * 1000
+        if cursor.description is None and cursor.rowcount > 0:
+            record.rows = cursor.rowcount
+        return InstrumentedCursor(cursor, record)
+
+    def execute(self, sql, parameters=()):
+        if self.analyzer is not None:
+            self.analyzer.check(self._conn, sql, parameters)
+        return self._run(self._conn.execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(self._conn.executemany, sql, seq_of_parameters)
+
+    def executescript(self, script):
+        return self._run(self._conn.executescript, script)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
@@ -0,0 +1,166 @@
+"""
+Store Partitions - SQLite
+Ordens, graus, pagamentos parciais e caixa de cada loja num arquivo SQLite
+próprio. As páginas de uma loja usam só o arquivo dela; as visões de todas
+as lojas anexam (ATTACH) os arquivos e leem por views UNION ALL.
+"""
+import os
+import re
+import sqlite3
+import unicodedata
+
+# Partição N: novos graus, pagamentos e movimentações começam em N * SPAN,
+# então os ids continuam únicos entre os arquivos. Ordens usam a sequência
+# do banco principal (ids crescentes em todas as lojas).
+PARTITION_ID_SPAN = 1_000_000_000
+
+# Limite de bancos anexados do SQLite (SQLITE_MAX_ATTACHED)
+MAX_PARTITIONS = 10
+
+PARTITIONED_TABLES = ('orders', 'graus', 'partial_payments', 'cash_flow')
+
+# Tabelas lidas pelas páginas de todas as lojas, substituídas por views
+# temporárias (o schema temp tem precedência sobre main)
+FEDERATED_TABLES = PARTITIONED_TABLES + ('order_versions', 'sales_rollup')
+
+
+def partition_schema(number):
+    """Nome do schema anexado da partição (0 é o banco principal)"""
+    return 'main' if number == 0 else f'loja{int(number)}'
+
+
+def _slugify(text):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return re.sub(r'[^a-z0-9]+', '_', text).strip('_') or 'loja'
+
+
+def load_partitions(db, directory):
+    """Partições registradas: [(número, loja, caminho)]"""
+    rows = db.execute("SELECT id, store, filename FROM store_partitions ORDER BY id").fetchall()
+    return [(row[0], row[1], os.path.join(directory, row[2])) for row in rows]
+
+
+def _columns(db, schema, table):
+    return [info[1] for info in db.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def attach_partitions(conn, partitions):
+    """
+    Anexa as partições à conexão do banco principal e cria as views
+    temporárias que unem main e partições. Colunas são listadas pelo nome:
+    bancos antigos podem ter colunas legadas em outra posição.
+    """
+    for number, _store, path in partitions:
+        schema = partition_schema(number)
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+        conn.execute(f"PRAGMA {schema}.synchronous = NORMAL")
+    schemas = ['main'] + [partition_schema(number) for number, _, _ in partitions]
+    for table in FEDERATED_TABLES:
+        columns = ', '.join(_columns(conn, 'main', table))
+        union = ' UNION ALL '.join(f"SELECT {columns} FROM {schema}.{table}" for schema in schemas)
+        conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {table} AS {union}")
+    return schemas
+
+
+def locate_sql(table, numbers):
+    """
+    SELECT (id, número da partição) das linhas de table cujo id está na
+    lista JSON passada como parâmetro (um parâmetro por partição)
+    """
+    return ' UNION ALL '.join(
+        f"SELECT id, {int(number)} FROM {partition_schema(number)}.{table} "
+        f"WHERE id IN (SELECT value FROM json_each(?))"
+        for number in numbers
+    )
+
+
+def _init_partition_file(path, number):
+    """Cria o arquivo da partição com o schema completo e as sequências de ids"""
+    from app.migrations import run_migrations
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        run_migrations(conn)
+        base = number * PARTITION_ID_SPAN
+        for table in PARTITIONED_TABLES:
+            updated = conn.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (base, table)
+            ).rowcount
+            if not updated:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, base))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def create_partition(db, store, directory):
+    """
+    Registra a partição da loja no banco principal e cria o arquivo.
+
+    Returns:
+        tuple: (número, caminho)
+    """
+    row = db.execute("SELECT id, filename FROM store_partitions WHERE store = ?", (store,)).fetchone()
+    if row:
+        return row[0], os.path.join(directory, row[1])
+    count = db.execute("SELECT COUNT(*) FROM store_partitions").fetchone()[0]
+    if count >= MAX_PARTITIONS:
+        raise ValueError(f"No máximo {MAX_PARTITIONS} lojas podem ter partição própria")
+
+    os.makedirs(directory, exist_ok=True)
+    number = db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM store_partitions").fetchone()[0]
+    filename = f"{number:02d}_{_slugify(store)}.db"
+    path = os.path.join(directory, filename)
+    _init_partition_file(path, number)
+    db.execute(
+        "INSERT INTO store_partitions (id, store, filename) VALUES (?, ?, ?)",
+        (number, store, filename)
+    )
+    db.commit()
+    return number, path
+
+
+def move_store_rows(db, number, store, path):
+    """
+    Move as ordens da loja (com graus, pagamentos parciais, parcelas a
+    receber, contas a pagar e movimentações de caixa ligadas a elas) do
+    banco principal para a partição, mantendo
+    os ids. Os gatilhos de cada arquivo (pesquisa, consolidado, versões e
+    fechamentos de caixa) acompanham a mudança.
+
+    Returns:
+        int: ordens movidas
+    """
+    schema = partition_schema(number)
+    db.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+    try:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DROP TABLE IF EXISTS temp.moving_orders")
+            db.execute(
+                "CREATE TEMP TABLE moving_orders AS SELECT id FROM main.orders WHERE store = ?", (store,)
+            )
+            moved = db.execute("SELECT COUNT(*) FROM temp.moving_orders").fetchone()[0]
+            # Ordens antes dos filhos (chaves estrangeiras); filhos antes na remoção
+            for table, key in (('orders', 'id'), ('graus', 'order_id'),
+                               ('partial_payments', 'order_id'), ('cash_flow', 'order_id'),
+                               ('accounts_receivable', 'order_id'), ('accounts_payable', 'order_id')):
+                source = set(_columns(db, 'main', table))
+                columns = ', '.join(c for c in _columns(db, schema, table) if c in source)
+                db.execute(f"""
+                    INSERT INTO {schema}.{table} ({columns})
+                    SELECT {columns} FROM main.{table}
+                    WHERE {key} IN (SELECT id FROM temp.moving_orders)
+                """)
+            for table, key in (('accounts_payable', 'order_id'), ('accounts_receivable', 'order_id'),
+                               ('cash_flow', 'order_id'), ('partial_payments', 'order_id'),
+                               ('graus', 'order_id'), ('orders', 'id')):
+                db.execute(f"DELETE FROM main.{table} WHERE {key} IN (SELECT id FROM temp.moving_orders)")
+            db.execute("DROP TABLE temp.moving_orders")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    finally:
+        db.execute(f"DETACH DATABASE {schema}")
+    return moved
@@ -0,0 +1,179 @@
+"""
+Connection Pool - SQLite
+Mantém conexões SQLite abertas e configuradas entre as requisições
+"""
+import sqlite3
+import threading
+import time
+import queue
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(RuntimeError):
+    """Nenhuma conexão ficou livre dentro do tempo de espera"""
+
+
+class ConnectionPool:
+    """
+    Pool de conexões SQLite de longa duração.
+
+    Cada conexão é emprestada a uma única thread por vez (acquire/release),
+    por isso são abertas com check_same_thread=False. As conexões livres
+    ficam numa pilha (LIFO), então as mais recentes - com cache de páginas
+    quente - são reaproveitadas primeiro.
+    """
+
+    def __init__(self, path, max_size=8, timeout=10.0, busy_timeout_ms=5000,
+                 cache_size_kb=16000, mmap_size=256 * 1024 * 1024, setup=None):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        # Chamado com cada conexão nova, depois dos PRAGMAs (ex.: ATTACH)
+        self.setup = setup
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._in_use = {}
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+        self._stats = {
+            'connections_created': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'wait_time_ms': 0.0,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if self.setup:
+            self.setup(conn)
+        return conn
+
+    def acquire(self):
+        """Empresta uma conexão; cria uma nova se houver espaço no pool"""
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._stats['connections_created'] < self.max_size
+                if create:
+                    self._stats['connections_created'] += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._stats['connections_created'] -= 1
+                    raise
+            else:
+                started = time.perf_counter()
+                with self._lock:
+                    self._stats['waits'] += 1
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"Nenhuma conexão livre no pool após {self.timeout}s "
+                        f"({self.max_size} em uso)"
+                    )
+                finally:
+                    with self._lock:
+                        self._stats['wait_time_ms'] += (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._in_use[id(conn)] = threading.current_thread().name
+        return conn
+
+    def release(self, conn):
+        """Devolve a conexão ao pool, desfazendo transações não confirmadas"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            # Conexão inutilizável: descarta e libera a vaga no pool
+            logger.error(f"Descartando conexão do pool: {e}")
+            with self._lock:
+                self._in_use.pop(id(conn), None)
+                self._stats['connections_created'] -= 1
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return
+
+        with self._lock:
+            self._in_use.pop(id(conn), None)
+        self._idle.put(conn)
+
+    def data_version(self):
+        """
+        Contador de alterações do banco (PRAGMA data_version).
+
+        O valor só muda quando outra conexão confirma uma escrita, por isso
+        é lido numa conexão dedicada que nunca escreve: qualquer commit das
+        conexões do pool (ou de outro processo) é percebido aqui.
+        """
+        with self._watcher_lock:
+            if self._watcher is None:
+                self._watcher = sqlite3.connect(
+                    self.path,
+                    timeout=self.busy_timeout_ms / 1000,
+                    check_same_thread=False
+                )
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def stats(self):
+        """Estatísticas do pool"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_use'] = len(self._in_use)
+            stats['in_use_by_thread'] = sorted(self._in_use.values())
+        stats['idle'] = self._idle.qsize()
+        stats['max_size'] = self.max_size
+        stats['avg_wait_ms'] = round(stats['wait_time_ms'] / stats['waits'], 3) if stats['waits'] else 0.0
+        stats['wait_time_ms'] = round(stats['wait_time_ms'], 3)
+        return stats
+
+    def close_all(self):
+        """Fecha as conexões livres (chamado ao encerrar o processo)"""
+        with self._watcher_lock:
+            if self._watcher is not None:
+                try:
+                    self._watcher.close()
+                except sqlite3.Error:
+                    pass
+                self._watcher = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            with self._lock:
+                self._stats['connections_created'] -= 1
@@ -0,0 +1,145 @@
+"""
+Query Plan Analyzer
+Roda EXPLAIN QUERY PLAN uma vez por formato de comando e sinaliza
+leituras completas (SCAN) de tabelas grandes
+"""
+import re
+import sqlite3
+import logging
+import warnings
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+# Comandos que podem ler tabelas (INSERT ... VALUES, PRAGMA, DDL etc. são ignorados)
+_ANALYZED = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\s+.*\bSELECT\b)', re.IGNORECASE | re.DOTALL)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+_SCAN = re.compile(r'^SCAN (\w+)(.*)$')
+# Views e subconsultas lidas como co-rotina: o SCAN é do resultado, e as
+# tabelas de dentro aparecem no plano com seus próprios SEARCH/SCAN
+_SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+_NOT_ALIAS = {
+    'where', 'join', 'left', 'right', 'inner', 'outer', 'cross', 'on', 'using', 'group', 'order',
+    'limit', 'set', 'values', 'union', 'except', 'intersect', 'natural', 'having', 'window', 'select',
+    'default', 'as', 'returning'
+}
+
+# Marca para leituras completas intencionais (ex.: relatórios, recálculos)
+ALLOW_SCAN_MARKER = '/* scan-ok */'
+
+MODES = ('off', 'warn', 'fail')
+
+
+class FullTableScanError(RuntimeError):
+    """Comando lê uma tabela grande inteira (QUERY_PLAN_CHECK = 'fail')"""
+
+
+class FullTableScanWarning(UserWarning):
+    """Comando lê uma tabela grande inteira (QUERY_PLAN_CHECK = 'warn')"""
+
+
+def statement_shape(sql):
+    """
+    Formato do comando: literais viram ? e listas IN (?, ?, ...) viram (?),
+    para que variações do mesmo comando sejam analisadas uma única vez
+    """
+    shape = _STRING.sub('?', sql)
+    shape = _NUMBER.sub('?', shape)
+    shape = _WHITESPACE.sub(' ', shape).strip()
+    return _IN_LIST.sub('(?)', shape)
+
+
+def _table_aliases(sql):
+    """Mapeia nome ou alias usado no plano -> tabela"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+class QueryPlanAnalyzer:
+    """
+    Analisa o plano de cada formato de comando na primeira execução.
+
+    mode:
+        'off'  - não analisa
+        'warn' - registra um aviso no log
+        'fail' - levanta FullTableScanError antes de executar o comando
+    """
+
+    def __init__(self, mode='off', large_tables=()):
+        if mode not in MODES:
+            raise ValueError(f"QUERY_PLAN_CHECK inválido: {mode!r} (use {', '.join(MODES)})")
+        self.mode = mode
+        self.large_tables = {t.lower() for t in large_tables}
+        self._lock = threading.Lock()
+        self._shapes = {}
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def check(self, conn, sql, parameters=()):
+        """Analisa o comando (uma vez por formato) antes da execução"""
+        if not self.enabled or not _ANALYZED.match(sql):
+            return
+        shape = statement_shape(sql)
+        with self._lock:
+            entry = self._shapes.get(shape)
+            if entry is not None:
+                entry['executions'] += 1
+        if entry is None:
+            entry = self._analyze(conn, sql, shape, parameters)
+            if entry is None:
+                return
+            with self._lock:
+                entry = self._shapes.setdefault(shape, entry)
+            if entry['scans']:
+                message = (f"Leitura completa de {', '.join(entry['scans'])} em: {shape} | "
+                           f"plano: {' / '.join(entry['plan'])}")
+                logger.warning(message)
+                warnings.warn(message, FullTableScanWarning, stacklevel=4)
+        if entry['scans'] and self.mode == 'fail':
+            raise FullTableScanError(
+                f"Leitura completa de {', '.join(entry['scans'])} sem índice utilizável: {shape}"
+            )
+
+    def _analyze(self, conn, sql, shape, parameters):
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        except sqlite3.Error:
+            # O comando em si vai falhar (ou não aceita EXPLAIN); deixa o erro real aparecer
+            return None
+        plan = [row[3] for row in rows]
+        scans = []
+        if ALLOW_SCAN_MARKER not in sql:
+            aliases = _table_aliases(sql)
+            subqueries = {m.group(1).lower() for m in map(_SUBQUERY.match, plan) if m}
+            for detail in plan:
+                match = _SCAN.match(detail)
+                if not match or 'VIRTUAL TABLE' in match.group(2) or match.group(1).lower() in subqueries:
+                    continue
+                table = aliases.get(match.group(1).lower(), match.group(1).lower())
+                if table in self.large_tables and table not in scans:
+                    scans.append(table)
+        return {'plan': plan, 'scans': scans, 'executions': 1}
+
+    def report(self, only_scans=True):
+        """Formatos analisados (por padrão, só os que leem tabelas grandes inteiras)"""
+        with self._lock:
+            items = [dict(entry, sql=shape) for shape, entry in self._shapes.items()]
+        if only_scans:
+            items = [item for item in items if item['scans']]
+        items.sort(key=lambda item: item['executions'], reverse=True)
+        return items
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
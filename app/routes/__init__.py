@@ -4,6 +4,11 @@ from .dashboard_routes import dashboard_bp
 from .report_routes import report_bp
 from .print_routes import print_bp
 from .cashflow_routes import cashflow_bp
+from .import_routes import import_bp
+from .sync_routes import sync_bp
+from .trash_routes import trash_bp
+from .receivable_routes import receivable_bp
+from .payable_routes import payable_bp
 
 def register_routes(app):
     app.register_blueprint(main_bp)
@@ -12,3 +17,8 @@ def register_routes(app):
     app.register_blueprint(report_bp)
     app.register_blueprint(print_bp)
     app.register_blueprint(cashflow_bp)
+    app.register_blueprint(import_bp)
+    app.register_blueprint(sync_bp)
+    app.register_blueprint(trash_bp)
+    app.register_blueprint(receivable_bp)
+    app.register_blueprint(payable_bp)
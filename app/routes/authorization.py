@@ -0,0 +1,26 @@
+"""
+Authorization
+Verificação de permissões nas rotas pela matriz compilada do
+permission_service (sem consultas ao banco por requisição)
+"""
+from functools import wraps
+from flask import session, abort
+from app.config import DEFAULT_ROLE
+from app.services.permission_service import has_permission
+
+
+def current_role():
+    """Role da sessão, ou DEFAULT_ROLE quando não há uma"""
+    return session.get('role') or DEFAULT_ROLE
+
+
+def require_permission(resource, action):
+    """Responde 403 quando a role atual não tem a permissão resource/action"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not has_permission(current_role(), resource, action):
+                abort(403)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -3,8 +3,8 @@ Cash Flow Routes
 Handles routes for cash flow management
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from app.services import cashflow_service
-from app.utils import validate_amount, validate_date, is_safe_redirect
+from app.services import cashflow_service, payable_service
+from app.utils import safe_int, validate_amount, validate_date, is_safe_redirect
 from datetime import datetime, timedelta
 
 cashflow_bp = Blueprint('cashflow', __name__, url_prefix='/cashflow')
@@ -38,14 +38,15 @@ def index():
         filters['category'] = category
     
     # Get data
-    balance_data = cashflow_service.calculate_balance()
+    balance_data = cashflow_service.cached_balance()
     movements = cashflow_service.get_movements(filters)
     
     # Get summary for current month
     today = datetime.now()
     month_start = today.replace(day=1).strftime('%Y-%m-%d')
     month_end = today.strftime('%Y-%m-%d')
-    monthly_summary = cashflow_service.get_summary(month_start, month_end)
+    monthly_summary = cashflow_service.cached_summary(month_start, month_end)
+    upcoming = payable_service.get_upcoming_payables()
     
     return render_template(
         'cashflow.html',
@@ -54,6 +55,7 @@ def index():
         total_exits=balance_data['total_exits'],
         movements=movements,
         monthly_summary=monthly_summary,
+        upcoming=upcoming,
         filter_type=filter_type,
         start_date=start_date,
         end_date=end_date,
@@ -84,7 +86,7 @@ def add_entry():
             'description': request.form.get('description', ''),
             'amount': amount,
             'payment_method': request.form.get('payment_method', ''),
-            'order_id': request.form.get('order_id')
+            'order_id': safe_int(request.form.get('order_id')) or None
         }
         
         cashflow_service.add_entry(data)
@@ -170,6 +172,18 @@ def edit_movement(movement_id):
     return redirect(url_for('cashflow.index'))
 
 
+@cashflow_bp.route('/delete/<int:movement_id>', methods=['POST'])
+def delete_movement(movement_id):
+    """Delete a cash flow movement"""
+    try:
+        cashflow_service.delete_movement(movement_id)
+        flash('Movimentação excluída com sucesso!', 'success')
+    except Exception as e:
+        flash(f'Erro ao excluir movimentação: {str(e)}', 'error')
+    
+    return redirect(url_for('cashflow.index'))
+
+
 @cashflow_bp.route('/partial-payment/<int:order_id>', methods=['POST'])
 def add_partial_payment(order_id):
     """Add partial payment for an order"""
@@ -270,5 +284,5 @@ def get_order_balance(order_id):
 @cashflow_bp.route('/balance')
 def get_balance():
     """Get current balance (API endpoint)"""
-    balance_data = cashflow_service.calculate_balance()
+    balance_data = cashflow_service.cached_balance()
     return jsonify(balance_data)
@@ -0,0 +1,66 @@
+"""
+Conditional GET
+ETags das páginas de uma ordem (detalhes, impressão e download)
+baseados na versão mantida em order_versions
+"""
+import hashlib
+import secrets
+from datetime import date
+from functools import wraps
+from flask import request, session, make_response
+from app.models import get_db
+
+# Muda a cada inicialização: templates e código novos (ou um banco
+# restaurado) nunca reaproveitam ETags emitidas por outro processo
+_PROCESS_TOKEN = secrets.token_hex(8)
+
+
+def get_order_version(db, order_id):
+    """Versão atual da ordem, ou None se ela não tiver registro"""
+    row = db.execute(
+        "SELECT version FROM order_versions WHERE order_id = ?", (order_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _order_etag(order_id, version, daily=False):
+    # A URL completa entra no hash: ?format=txt e ?format=json são representações diferentes
+    key = f"{_PROCESS_TOKEN}:{request.endpoint}:{request.full_path}:{order_id}:{version}"
+    if daily:
+        key += f":{date.today().isoformat()}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def order_etag(renders_flashes=False, daily=False):
+    """
+    Responde 304 quando o If-None-Match confere com a versão atual da
+    ordem, sem executar a view (consultas e template). A view deve receber
+    order_id. Com renders_flashes, requisições com mensagens flash
+    pendentes são sempre renderizadas, para que a mensagem seja exibida
+    e consumida. Com daily, a data de hoje entra na ETag: páginas que
+    mostram a data atual (impressão sem data de exame, data padrão do
+    pagamento) não voltam como 304 no dia seguinte.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(order_id, *args, **kwargs):
+            version = get_order_version(get_db(), order_id)
+            if version is None:
+                return view(order_id, *args, **kwargs)
+
+            etag = _order_etag(order_id, version, daily)
+            fresh_render = renders_flashes and '_flashes' in session
+            if not fresh_render and request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+
+            response = make_response(view(order_id, *args, **kwargs))
+            if response.status_code == 200 and not fresh_render:
+                response.set_etag(etag)
+                # O navegador guarda a página mas revalida a cada acesso
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,88 @@
+"""
+Debug Routes
+Handles the /debug/metrics and /debug/query-plans endpoints
+and the per-request metrics middleware
+"""
+import time
+from flask import Blueprint, jsonify, request, g, current_app, abort
+from app.config import DEBUG_MODE, METRICS_ENABLED
+from app.models import get_pool_stats, get_query_plan_analyzer
+from app.services.metrics_service import metrics
+from app.services.cache_service import data_cache
+from app.routes.authorization import require_permission
+
+debug_bp = Blueprint('debug', __name__, url_prefix='/debug')
+
+
+@debug_bp.before_request
+def require_debug_mode():
+    """
+    As rotas /debug mostram texto de SQL e tempos: só existem em modo de
+    desenvolvimento (DEBUG_MODE) ou com METRICS_ENABLED ligado no .env,
+    além da permissão settings/manage de cada rota
+    """
+    if not (DEBUG_MODE or METRICS_ENABLED):
+        abort(404)
+
+
+def register_metrics(app):
+    """Mede a latência de cada requisição e os comandos SQL executados nela"""
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def keep_status(response):
+        g.response_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(exception):
+        # Em respostas com stream_with_context o teardown só roda ao fim do
+        # stream, então a latência inclui a geração do corpo
+        started = g.pop('request_started', None)
+        if started is None or request.blueprint == 'debug':
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        status = 500 if exception is not None else g.get('response_status', 500)
+        route = request.endpoint or '<não encontrada>'
+        metrics.record_request(route, status, duration_ms, g.get('sql_queries', []))
+
+
+@debug_bp.route('/metrics')
+@require_permission('settings', 'manage')
+def show_metrics():
+    """Percentis por rota, comandos mais lentos, pool, cache de dados, servidor e backup"""
+    snapshot = metrics.snapshot()
+    snapshot['pool'] = get_pool_stats()
+    snapshot['data_cache'] = data_cache.stats()
+    server = current_app.extensions.get('wsgi_server')
+    if server is not None:
+        snapshot['server'] = server.stats()
+    scheduler = current_app.extensions.get('backup_scheduler')
+    if scheduler is not None:
+        snapshot['backup'] = scheduler.stats()
+    return jsonify(snapshot)
+
+
+@debug_bp.route('/metrics/reset', methods=['POST'])
+@require_permission('settings', 'manage')
+def reset_metrics():
+    """Zera as métricas acumuladas"""
+    metrics.reset()
+    return jsonify({'success': True})
+
+
+@debug_bp.route('/query-plans')
+@require_permission('settings', 'manage')
+def show_query_plans():
+    """
+    Comandos que leem tabelas grandes inteiras (QUERY_PLAN_CHECK).
+    Use ?all=1 para listar todos os formatos analisados.
+    """
+    analyzer = get_query_plan_analyzer()
+    return jsonify({
+        'mode': analyzer.mode,
+        'statements': analyzer.report(only_scans=request.args.get('all') != '1'),
+    })
@@ -0,0 +1,42 @@
+"""
+Import Routes
+Handles bulk import of legacy orders from CSV/XLSX spreadsheets
+"""
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from app.services import import_service
+from app.routes.authorization import require_permission
+
+import_bp = Blueprint('importer', __name__, url_prefix='/import')
+
+# Erros exibidos na página (o total aparece no resumo)
+MAX_ERRORS_SHOWN = 200
+
+
+@import_bp.route('/', methods=['GET', 'POST'])
+@require_permission('orders', 'create')
+def index():
+    """Upload form and import summary"""
+    if request.method == 'GET':
+        return render_template('import.html', result=None)
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Selecione um arquivo .csv ou .xlsx.', 'error')
+        return redirect(url_for('importer.index'))
+
+    dry_run = request.form.get('dry_run') == 'on'
+    try:
+        rows = import_service.read_rows(upload.stream, upload.filename)
+        result = import_service.import_orders(rows, dry_run=dry_run)
+    except Exception as e:
+        flash(f'Erro na importação: {e}', 'error')
+        return redirect(url_for('importer.index'))
+
+    if result['imported'] and not dry_run:
+        flash(f"{result['imported']} ordens importadas.", 'success')
+    return render_template(
+        'import.html',
+        result=result,
+        filename=upload.filename,
+        errors=result['errors'][:MAX_ERRORS_SHOWN]
+    )
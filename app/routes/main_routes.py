@@ -1,23 +1,38 @@
 import os
 import time
+import sqlite3
+import logging
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
-from app.models import get_db
+from app.models import get_db, get_partitions
+from app.utils import safe_int, is_safe_redirect
+from app.services.search_service import build_match_query, search_orders, fts_source
+from app.services.order_service import BULK_ACTIONS
+from app.config import ORDERS_PAGE_SIZE, ORDERS_PAGE_SIZE_MAX
 
 main_bp = Blueprint('main', __name__)
 
-@main_bp.route('/')
-def index():
-    db = get_db()
-    q = request.args.get('q', '')
-    status = request.args.get('status', 'all')
-    filter_store = request.args.get('store', 'all')
-
+def fetch_orders_page(db, q='', status='all', filter_store='all', before=None, limit=ORDERS_PAGE_SIZE):
+    """
+    Busca uma página da listagem de ordens usando paginação keyset em id.
+    
+    Args:
+        db: Conexão do banco de dados
+        q: Texto de pesquisa (OS, cliente, telefone ou CPF)
+        status: Filtro de status ('all', 'Pendente', 'pago_dinheiro', 'pago_cartao')
+        filter_store: Loja a filtrar ('all' para todas)
+        before: Cursor - retorna apenas ordens com id menor que este
+        limit: Quantidade máxima de ordens na página
+        
+    Returns:
+        tuple: (ordens: list, próximo cursor: int ou None)
+    """
     sql = "SELECT * FROM orders WHERE deleted_at IS NULL"
     params = []
-    if q:
-        sql += " AND (os_number LIKE ? OR client_name LIKE ? OR phone LIKE ?)"
-        qv = f"%{q}%"
-        params.extend([qv, qv, qv])
+    match = build_match_query(q)
+    if match:
+        source, count = fts_source()
+        sql += f" AND id IN ({source})"
+        params.extend([match] * count)
     if status and status != 'all':
         if status == 'pago_dinheiro':
             sql += " AND payment_status = 'Pago' AND payment_method = 'Dinheiro'"
@@ -29,19 +44,89 @@ def index():
     if filter_store and filter_store != 'all':
         sql += " AND store = ?"
         params.append(filter_store)
-    sql += " ORDER BY id DESC"
+    if before:
+        sql += " AND id < ?"
+        params.append(before)
+    # Busca um registro a mais só para saber se existe próxima página
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
 
     orders = db.execute(sql, params).fetchall()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = orders[-1]['id']
+    return orders, next_cursor
+
+
+def _listing_args():
+    """Lê os filtros e o cursor da listagem a partir da query string"""
+    q = request.args.get('q', '')
+    status = request.args.get('status', 'all')
+    filter_store = request.args.get('store', 'all')
+    before = safe_int(request.args.get('before')) or None
+    return q, status, filter_store, before
+
+
+@main_bp.route('/')
+def index():
+    db = get_db()
+    q, status, filter_store, before = _listing_args()
+
+    orders, next_cursor = fetch_orders_page(db, q, status, filter_store, before)
     stores = [r[0] for r in db.execute("SELECT DISTINCT store FROM orders WHERE store IS NOT NULL AND deleted_at IS NULL").fetchall()]
-    return render_template('index.html', orders=orders, q=q, status=status, stores=stores, filter_store=filter_store)
+    # Na página de uma loja com partição, as demais lojas vêm do registro
+    stores += [store for _, store, _ in get_partitions() if store not in stores]
+    return render_template('index.html', orders=orders, q=q, status=status, stores=stores, filter_store=filter_store,
+                           before=before, next_cursor=next_cursor, bulk_actions=BULK_ACTIONS)
+
+
+@main_bp.route('/api/orders')
+def api_orders():
+    """Listagem de ordens em JSON, com os mesmos filtros e cursor da página inicial"""
+    db = get_db()
+    q, status, filter_store, before = _listing_args()
+    limit = max(1, min(safe_int(request.args.get('limit'), ORDERS_PAGE_SIZE), ORDERS_PAGE_SIZE_MAX))
+
+    orders, next_cursor = fetch_orders_page(db, q, status, filter_store, before, limit)
+    return jsonify({
+        'orders': [{k: o[k] for k in o.keys()} for o in orders],
+        'next_cursor': next_cursor
+    })
+
+
+@main_bp.route('/api/orders/search')
+def api_search_orders():
+    """Pesquisa rápida de ordens (OS, cliente, telefone ou CPF) em JSON"""
+    q = request.args.get('q', '')
+    limit = max(1, min(safe_int(request.args.get('limit'), 20), ORDERS_PAGE_SIZE_MAX))
+    results = search_orders(q, limit)
+    return jsonify({'results': [{k: r[k] for k in r.keys()} for r in results]})
 
 @main_bp.context_processor
 def inject_now():
     return {'now': int(time.time())}
 
+@main_bp.app_errorhandler(sqlite3.IntegrityError)
+def integrity_error(e):
+    """
+    Chaves estrangeiras são verificadas nas conexões do pool: gravar um
+    grau, pagamento ou movimentação de uma ordem que não existe (ou
+    violar outra restrição) volta para a página de origem com o aviso,
+    em vez de um erro interno
+    """
+    logging.warning(f'Restrição do banco violada em {request.path}: {e}')
+    message = 'Operação recusada: registro relacionado não encontrado ou dados duplicados.'
+    if request.is_json:
+        return jsonify({'error': message}), 400
+    flash(message, 'error')
+    target = request.referrer
+    if not is_safe_redirect(target, request.host):
+        target = url_for('main.index')
+    return redirect(target)
+
 @main_bp.app_errorhandler(500)
 def internal_error(e):
-    import logging
     logging.exception('Server error')
     flash('Ocorreu um erro interno.', 'danger')
     return render_template('500.html'), 500
@@ -1,7 +1,11 @@
 import json
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
-from app.models import get_db
-from app.utils import safe_int, safe_float, validate_amount, validate_date, soft_delete_order
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, abort
+from app.models import get_db, current_partition, allocate_order_ids
+from app.utils import safe_int, safe_float, validate_amount, validate_date, soft_delete_order, is_safe_redirect
+from app.routes.conditional import order_etag
+from app.services import order_service, receivable_service, payable_service
+from app.routes.authorization import require_permission, current_role
+from app.services.permission_service import has_permission
 
 order_bp = Blueprint('order', __name__)
 
@@ -21,6 +25,13 @@ def new_order():
                 flash(f'Entrada inválida: {error_entrada}', 'error')
                 return redirect(url_for('order.new_order'))
             
+            lab_cost = None
+            if request.form.get('lab_cost', '').strip():
+                valid_lab_cost, lab_cost, error_lab_cost = validate_amount(request.form.get('lab_cost'), allow_zero=True)
+                if not valid_lab_cost:
+                    flash(f'Custo do Laboratório inválido: {error_lab_cost}', 'error')
+                    return redirect(url_for('order.new_order'))
+
             # Validar datas se fornecidas
             exam_date = request.form.get('exam_date', '')
             if exam_date:
@@ -69,12 +80,17 @@ def new_order():
                 entrada,
                 valor_retirada,
                 request.form.get('nome_doutor_otica','').strip(),
-                request.form.get('endereco','').strip()
+                request.form.get('endereco','').strip(),
+                lab_cost
             )
-            db.execute('''INSERT INTO orders (
-                os_number, client_name, phone, purchase_type, store, lab, payment_status, payment_method, installments, lab_paid, exam_date, delivery_date,
-                cpf, receita_fora, nome_doutor_fora, valor_pago, entrada, valor_retirada, nome_doutor_otica, endereco
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)''', data)
+            # Loja com partição própria: o id vem da sequência do banco principal
+            order_id = allocate_order_ids() if current_partition() else None
+            cursor = db.execute('''INSERT INTO orders (
+                id, os_number, client_name, phone, purchase_type, store, lab, payment_status, payment_method, installments, lab_paid, exam_date, delivery_date,
+                cpf, receita_fora, nome_doutor_fora, valor_pago, entrada, valor_retirada, nome_doutor_otica, endereco, lab_cost
+            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)''', (order_id, *data))
+            receivable_service.schedule_receivables(db, [order_id or cursor.lastrowid])
+            payable_service.sync_lab_payables(db, [order_id or cursor.lastrowid])
             db.commit()
             flash('Ordem criada com sucesso.', 'success')
             return redirect(url_for('main.index'))
@@ -97,7 +113,8 @@ def edit_order(order_id):
         valor_retirada = safe_float(request.form.get('valor_retirada')) if pagamento_retirada else 0.0
         db.execute('''UPDATE orders SET
             os_number=?, client_name=?, phone=?, purchase_type=?, store=?, lab=?, payment_status=?, payment_method=?, installments=?, lab_paid=?, exam_date=?, delivery_date=?,
-            cpf=?, receita_fora=?, nome_doutor_fora=?, valor_pago=?, entrada=?, valor_retirada=?, nome_doutor_otica=?, endereco=?
+            cpf=?, receita_fora=?, nome_doutor_fora=?, valor_pago=?, entrada=?, valor_retirada=?, nome_doutor_otica=?, endereco=?,
+            lab_cost=?
             WHERE id=?''', (
             request.form.get('os_number',''),
             request.form.get('client_name',''),
@@ -119,8 +136,12 @@ def edit_order(order_id):
             valor_retirada,
             request.form.get('nome_doutor_otica',''),
             request.form.get('endereco',''),
+            round(safe_float(request.form.get('lab_cost')), 2) if request.form.get('lab_cost', '').strip() else None,
             order_id
         ))
+        receivable_service.schedule_receivables(db, [order_id])
+        payable_service.sync_lab_payables(db, [order_id])
+        payable_service.settle_lab_payables(db, [order_id])
         db.commit()
         flash('Ordem atualizada com sucesso.', 'success')
         return redirect(url_for('order.edit_order', order_id=order_id))
@@ -146,6 +167,47 @@ def delete_order(order_id):
     return redirect(url_for('main.index'))
 
 
+@order_bp.route('/orders/bulk', methods=['POST'])
+@require_permission('orders', 'update')
+def bulk_orders():
+    """
+    Aplica uma ação a várias ordens de uma vez.
+    JSON: {"action": ..., "ids": [...], "payment_method": ...} -> resultado em JSON.
+    Formulário (seleção da página inicial): ids repetidos, flash e volta para a listagem.
+    """
+    data = request.get_json(silent=True) if request.is_json else None
+    action = data.get('action') if data is not None else request.form.get('action')
+    if action == 'delete' and not has_permission(current_role(), 'orders', 'delete'):
+        abort(403)
+    if data is not None:
+        try:
+            result = order_service.bulk_update_orders(
+                data.get('ids'), data.get('action'),
+                payment_method=data.get('payment_method'), payment_date=data.get('payment_date')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
+
+    next_url = request.form.get('next')
+    if not is_safe_redirect(next_url, request.host):
+        next_url = url_for('main.index')
+    try:
+        result = order_service.bulk_update_orders(
+            request.form.getlist('ids'), request.form.get('action'),
+            payment_method=request.form.get('payment_method')
+        )
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(next_url)
+
+    message = f"{result['updated']} ordens atualizadas"
+    if result['cash_entries']:
+        message += f", {result['cash_entries']} lançamentos no caixa (R$ {result['cash_total']:.2f})"
+    flash(message + '.', 'success')
+    return redirect(next_url)
+
+
 @order_bp.route('/order/<int:order_id>/grau/new', methods=['POST'])
 def new_grau(order_id):
     db = get_db()
@@ -207,6 +269,7 @@ def delete_grau(order_id, grau_id):
     return redirect(url_for('order.edit_order', order_id=order_id))
 
 @order_bp.route('/details/<int:order_id>')
+@order_etag(renders_flashes=True, daily=True)
 def details(order_id):
     db = get_db()
     order = db.execute('SELECT * FROM orders WHERE id = ?', (order_id,)).fetchone()
@@ -232,6 +295,7 @@ def details(order_id):
                          partial_payments=partial_payments, total_paid=total_paid)
 
 @order_bp.route('/details/<int:order_id>/download')
+@order_etag()
 def download_order(order_id):
     db = get_db()
     order = db.execute('SELECT * FROM orders WHERE id = ?', (order_id,)).fetchone()
@@ -0,0 +1,124 @@
+"""
+Payable Routes
+Contas a pagar: conta do laboratório por ordem, contas avulsas e baixa em
+lote com lançamento no caixa (ver payable_service)
+"""
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from app.utils import validate_amount, validate_date, is_safe_redirect
+from app.services import payable_service
+from app.routes.authorization import require_permission
+
+payable_bp = Blueprint('payables', __name__, url_prefix='/payables')
+
+
+@payable_bp.route('/')
+@require_permission('cashflow', 'read')
+def index():
+    """Contas em aberto por vencimento"""
+    payables = payable_service.get_open_payables()
+    return render_template(
+        'payables.html',
+        payables=payables,
+        open_count=payables[0]['open_count'] if payables else 0,
+        open_total=payables[0]['open_total'] if payables else 0
+    )
+
+
+@payable_bp.route('/new', methods=['POST'])
+@require_permission('cashflow', 'create')
+def new_payable():
+    """Conta avulsa, ou a conta do laboratório quando a OS é informada"""
+    valid, amount, error = validate_amount(request.form.get('amount'))
+    if not valid:
+        flash(f'Valor inválido: {error}', 'error')
+        return redirect(url_for('payables.index'))
+    due_date = request.form.get('due_date', '')
+    if due_date:
+        valid_date, date_error = validate_date(due_date)
+        if not valid_date:
+            flash(f'Vencimento inválido: {date_error}', 'error')
+            return redirect(url_for('payables.index'))
+
+    os_number = request.form.get('os_number', '').strip()
+    if os_number:
+        order_id = payable_service.find_order_id(os_number)
+        if not order_id:
+            flash(f'OS #{os_number} não encontrada.', 'error')
+        elif payable_service.create_lab_payables([(order_id, amount)], due_date or None):
+            flash(f'Conta do laboratório da OS #{os_number} lançada.', 'success')
+        else:
+            flash(f'A OS #{os_number} já tem conta do laboratório ou o laboratório já foi pago.', 'error')
+        return redirect(url_for('payables.index'))
+
+    description = request.form.get('description', '').strip()
+    if not description or not due_date:
+        flash('Descrição e vencimento são obrigatórios.', 'error')
+        return redirect(url_for('payables.index'))
+    payable_service.add_payable({
+        'description': description,
+        'supplier': request.form.get('supplier', '').strip(),
+        'amount': amount,
+        'due_date': due_date,
+        'category': request.form.get('category', '').strip(),
+        'notes': request.form.get('notes', '').strip(),
+    })
+    flash('Conta lançada.', 'success')
+    return redirect(url_for('payables.index'))
+
+
+@payable_bp.route('/lab', methods=['POST'])
+@require_permission('cashflow', 'create')
+def lab_payables():
+    """
+    Contas do laboratório em lote.
+    JSON: {"orders": [{"id": ..., "amount": ...}], "due_date": ...} -> {"created": n}
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        entries = [(item['id'], item['amount']) for item in data.get('orders') or []]
+        if data.get('due_date'):
+            valid, error = validate_date(data['due_date'])
+            if not valid:
+                raise ValueError(error)
+        created = payable_service.create_lab_payables(entries, data.get('due_date'))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'created': created})
+
+
+@payable_bp.route('/settle', methods=['POST'])
+@require_permission('cashflow', 'create')
+def settle():
+    """
+    Baixa em lote das contas selecionadas, com as saídas no caixa.
+    JSON: {"keys": ["0:12", ...], "payment_date": ..., "payment_method": ...} -> resultado em JSON.
+    Formulário: keys repetidas, flash e volta para a página de origem.
+    """
+    data = request.get_json(silent=True) if request.is_json else None
+    if data is not None:
+        try:
+            result = payable_service.settle_payables(
+                data.get('keys'), data.get('payment_date'), data.get('payment_method')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
+
+    next_url = request.form.get('next')
+    if not is_safe_redirect(next_url, request.host):
+        next_url = url_for('payables.index')
+    payment_date = request.form.get('payment_date') or None
+    if payment_date:
+        valid, error = validate_date(payment_date)
+        if not valid:
+            flash(f'Data inválida: {error}', 'error')
+            return redirect(next_url)
+    try:
+        result = payable_service.settle_payables(
+            request.form.getlist('keys'), payment_date, request.form.get('payment_method')
+        )
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(next_url)
+    flash(f"{result['settled']} conta(s) paga(s): R$ {result['total']:.2f} lançados no caixa.", 'success')
+    return redirect(next_url)
@@ -1,9 +1,12 @@
+from datetime import date
 from flask import Blueprint, render_template, redirect, url_for, flash
 from app.models import get_db
+from app.routes.conditional import order_etag
 
 print_bp = Blueprint('print', __name__)
 
 @print_bp.route('/print/order/<int:order_id>')
+@order_etag(daily=True)
 def print_order(order_id):
     db = get_db()
     order = db.execute('SELECT * FROM orders WHERE id = ?', (order_id,)).fetchone()
@@ -14,4 +17,4 @@ def print_order(order_id):
         
     graus = db.execute('SELECT * FROM graus WHERE order_id = ?', (order_id,)).fetchall()
     
-    return render_template('print_order.html', order=order, graus=graus)
+    return render_template('print_order.html', order=order, graus=graus, today=date.today().strftime('%d/%m/%Y'))
@@ -0,0 +1,55 @@
+"""
+Receivable Routes
+Contas a receber: envelhecimento das parcelas, projeção de entradas e
+recebimento de parcelas (ver receivable_service)
+"""
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from app.models import get_db
+from app.utils import safe_int, validate_date
+from app.services import receivable_service
+from app.routes.authorization import require_permission
+
+receivable_bp = Blueprint('receivables', __name__, url_prefix='/receivables')
+
+
+@receivable_bp.route('/')
+@require_permission('reports', 'read')
+def index():
+    """Envelhecimento, projeção mensal e parcelas vencidas ou a vencer"""
+    months = max(1, min(safe_int(request.args.get('months'), 12), 36))
+    days = max(0, min(safe_int(request.args.get('days'), 30), 365))
+    aging = receivable_service.get_aging()
+    return render_template(
+        'receivables.html',
+        aging=aging,
+        aging_total=sum(bucket['amount'] for bucket in aging),
+        projection=receivable_service.get_projection(months),
+        installments=receivable_service.get_due_installments(days),
+        months=months,
+        days=days
+    )
+
+
+@receivable_bp.route('/order/<int:order_id>/receive', methods=['POST'])
+@require_permission('cashflow', 'create')
+def receive(order_id):
+    """Recebe as parcelas selecionadas da ordem (entrada no caixa)"""
+    ids = [safe_int(value) for value in request.form.getlist('ids') if safe_int(value) > 0]
+    payment_date = request.form.get('payment_date') or None
+    if payment_date:
+        valid, error = validate_date(payment_date)
+        if not valid:
+            flash(f'Data inválida: {error}', 'error')
+            return redirect(url_for('receivables.index'))
+    if not ids:
+        flash('Nenhuma parcela selecionada.', 'error')
+        return redirect(url_for('receivables.index'))
+
+    count, total = receivable_service.receive_installments(
+        get_db(), order_id, ids, payment_date, request.form.get('payment_method')
+    )
+    if count:
+        flash(f'{count} parcela(s) recebida(s): R$ {total:.2f} lançados no caixa.', 'success')
+    else:
+        flash('Parcela não encontrada ou já recebida.', 'error')
+    return redirect(url_for('receivables.index'))
@@ -1,6 +1,6 @@
-from flask import Blueprint, render_template, request, send_file
+import tempfile
+from flask import Blueprint, render_template, request, send_file, Response, stream_with_context
 from app.models import get_db
-from app.services.report_service import generate_excel_report, generate_pdf_report
 from datetime import datetime
 
 report_bp = Blueprint('report', __name__)
@@ -19,7 +19,11 @@ def export():
     status = request.args.get('status')
     fmt = request.args.get('format', 'excel')
     
-    sql = "SELECT * FROM orders WHERE 1=1"
+    sql = """
+        SELECT os_number, client_name, phone, store, lab, exam_date, payment_status,
+               valor_pago, entrada, valor_retirada
+        FROM orders WHERE 1=1
+    """
     params = []
     
     if start_date:
@@ -32,18 +36,24 @@ def export():
         sql += " AND payment_status = ?"
         params.append(status)
         
-    orders = db.execute(sql, params).fetchall()
-    
     if fmt == 'pdf':
-        output = generate_pdf_report(orders)
-        return send_file(
-            output,
+        # Serviço importado só na exportação (o app inicia sem carregar as bibliotecas de relatório)
+        from app.services.report_service import stream_pdf_report
+        # As páginas são enviadas ao navegador conforme são geradas
+        pages = stream_pdf_report(db.execute(sql, params))
+        filename = f'relatorio_{datetime.now().strftime("%Y%m%d")}.pdf'
+        return Response(
+            stream_with_context(pages),
             mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'relatorio_{datetime.now().strftime("%Y%m%d")}.pdf'
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
     else:
-        output = generate_excel_report(orders)
+        from app.services.report_service import write_excel_report
+        # Gera a planilha direto do cursor num arquivo temporário em disco;
+        # send_file envia o arquivo em blocos e o fecha ao final da resposta
+        output = tempfile.TemporaryFile()
+        write_excel_report(db.execute(sql, params), output)
+        output.seek(0)
         return send_file(
             output,
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
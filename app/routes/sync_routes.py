@@ -0,0 +1,79 @@
+"""
+Sync Routes
+Endpoints da sincronização incremental entre lojas (ver sync_service),
+autenticados pelo token compartilhado SYNC_TOKEN
+"""
+import gzip
+import hmac
+import json
+from flask import Blueprint, request, jsonify, abort, make_response
+from app.config import SYNC_TOKEN
+from app.utils import safe_int
+from app.services import sync_service
+from app.services.sync_service import SyncError
+
+sync_bp = Blueprint('sync', __name__, url_prefix='/sync')
+
+# Respostas menores que isso não compensam a compressão
+GZIP_MIN_SIZE = 1024
+
+
+@sync_bp.before_request
+def check_token():
+    if not SYNC_TOKEN:
+        abort(404)
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not hmac.compare_digest(token.encode('utf-8'), SYNC_TOKEN.encode('utf-8')):
+        abort(401)
+
+
+def _json_response(data):
+    body = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    response = make_response(body)
+    response.mimetype = 'application/json'
+    if len(body) >= GZIP_MIN_SIZE and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(gzip.compress(body))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+@sync_bp.route('/status')
+def status():
+    try:
+        return _json_response(sync_service.sync_status())
+    except SyncError as e:
+        return jsonify({'error': str(e)}), 409
+
+
+@sync_bp.route('/changes', methods=['GET'])
+def pull_changes():
+    """Alterações daqui desde since, para o nó node"""
+    since = max(safe_int(request.args.get('since')), 0)
+    # LIMIT negativo no SQLite não tem limite: o lote fica entre 1 e SYNC_BATCH_SIZE
+    limit = max(1, min(safe_int(request.args.get('limit')) or sync_service.SYNC_BATCH_SIZE,
+                       sync_service.SYNC_BATCH_SIZE))
+    try:
+        return _json_response(sync_service.serve_changes(since, request.args.get('node') or None, limit))
+    except SyncError as e:
+        return jsonify({'error': str(e)}), 409
+
+
+@sync_bp.route('/changes', methods=['POST'])
+def push_changes():
+    """Aplica um lote enviado por outro nó"""
+    body = request.get_data()
+    try:
+        if request.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+    except (OSError, ValueError):
+        payload = None
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Corpo inválido'}), 400
+    try:
+        return _json_response(sync_service.receive_changes(payload))
+    except SyncError as e:
+        return jsonify({'error': str(e)}), 409
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Lote inválido'}), 400
@@ -0,0 +1,53 @@
+"""
+Trash Routes
+Lixeira: ordens excluídas e ordens levadas ao banco de arquivo
+(archive_service), com restauração
+"""
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from app.config import ORDERS_PAGE_SIZE
+from app.models import get_db
+from app.utils import safe_int, restore_order
+from app.services import archive_service
+from app.services.archive_service import ArchiveError
+from app.routes.authorization import require_permission
+
+trash_bp = Blueprint('trash', __name__, url_prefix='/trash')
+
+SOURCES = {'archive': 'Arquivo', 'deleted': 'Excluídas'}
+
+
+@trash_bp.route('/')
+def index():
+    """Página da lixeira (paginação keyset em id, como a listagem de ordens)"""
+    source = request.args.get('source', 'archive')
+    if source not in SOURCES:
+        source = 'archive'
+    before = safe_int(request.args.get('before')) or None
+    try:
+        orders, next_cursor = archive_service.fetch_trash_page(source, before, ORDERS_PAGE_SIZE)
+    except ArchiveError as e:
+        flash(str(e), 'error')
+        orders, next_cursor = [], None
+    return render_template('trash.html', orders=orders, source=source, sources=SOURCES,
+                           before=before, next_cursor=next_cursor)
+
+
+@trash_bp.route('/<int:order_id>/restore', methods=['POST'])
+@require_permission('orders', 'update')
+def restore(order_id):
+    """Restaura a ordem do arquivo ou desfaz a exclusão de uma ordem do banco principal"""
+    source = request.form.get('source', 'archive')
+    try:
+        if source == 'deleted':
+            # get_db: a partição dona da ordem (order_id da rota)
+            restored = restore_order(get_db(), order_id)
+        else:
+            restored = archive_service.restore_archived_order(order_id)
+    except ArchiveError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('trash.index', source=source))
+    if restored:
+        flash('Ordem restaurada com sucesso.', 'success')
+        return redirect(url_for('order.edit_order', order_id=order_id))
+    flash('Ordem não encontrada na lixeira.', 'error')
+    return redirect(url_for('trash.index', source=source))
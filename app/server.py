@@ -0,0 +1,155 @@
+"""
+Production Server
+Servidor WSGI multi-thread sobre o servidor do Werkzeug, com pool fixo de
+threads, limite de fila, keep-alive e encerramento gracioso
+"""
+import io
+import signal
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+logger = logging.getLogger(__name__)
+
+_OVERLOADED_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain; charset=utf-8\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"Content-Length: 34\r\n"
+    b"\r\n"
+    b"Servidor ocupado, tente novamente."
+)
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """
+    HTTP/1.1 mantém a conexão aberta entre requisições do mesmo navegador.
+    timeout fecha conexões ociosas, liberando a thread que as atende.
+    """
+    protocol_version = 'HTTP/1.1'
+    timeout = 2
+    keep_alive = False
+
+    def run_wsgi(self):
+        # O Werkzeug 3 fecha toda conexão ("Connection: close") e, no fim,
+        # descarta o que sobrou no socket, o que consumiria a próxima
+        # requisição. Requisições sem corpo (GET/HEAD, a maioria) não têm o
+        # que descartar: ficam com a conexão aberta e um rfile vazio.
+        headers = self.headers
+        self.keep_alive = (self.request_version == 'HTTP/1.1' and not self.close_connection
+                           and headers.get('Content-Length', '0') in ('', '0')
+                           and 'Transfer-Encoding' not in headers)
+        if not self.keep_alive:
+            return super().run_wsgi()
+        rfile, self.rfile = self.rfile, io.BytesIO()
+        try:
+            return super().run_wsgi()
+        finally:
+            self.rfile = rfile
+            self.keep_alive = False
+
+    def send_header(self, keyword, value):
+        if self.keep_alive and keyword.lower() == 'connection' and value == 'close':
+            return
+        super().send_header(keyword, value)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    Atende cada conexão numa thread de um pool fixo (ThreadPoolExecutor).
+
+    Conexões além de threads + queue_limit em espera recebem 503 na hora,
+    em vez de acumular sem limite. Em shutdown(), o servidor para de aceitar
+    conexões e espera as requisições em andamento terminarem.
+    """
+
+    def __init__(self, host, port, app, threads=16, queue_limit=64, keep_alive=2,
+                 shutdown_timeout=30):
+        handler = type('RequestHandler', (KeepAliveRequestHandler,), {'timeout': keep_alive or None})
+        if not keep_alive:
+            handler.protocol_version = 'HTTP/1.0'
+        super().__init__(host, port, app, handler=handler)
+        self.threads = threads
+        self.queue_limit = queue_limit
+        self.shutdown_timeout = shutdown_timeout
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._pending = 0
+        self._stats = {'accepted': 0, 'rejected': 0}
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            if self._pending >= self.threads + self.queue_limit:
+                self._stats['rejected'] += 1
+                overloaded = True
+            else:
+                self._pending += 1
+                self._stats['accepted'] += 1
+                overloaded = False
+        if overloaded:
+            self._reject(request)
+            return
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._lock:
+                self._pending -= 1
+                self._done.notify_all()
+
+    def _reject(self, request):
+        try:
+            request.sendall(_OVERLOADED_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending
+        stats['threads'] = self.threads
+        stats['queue_limit'] = self.queue_limit
+        return stats
+
+    def server_close(self):
+        """Fecha o socket e espera as requisições em andamento (até shutdown_timeout)"""
+        super().server_close()
+        with self._lock:
+            finished = self._done.wait_for(lambda: self._pending == 0, timeout=self.shutdown_timeout)
+        if not finished:
+            logger.error(f"Encerrando com {self._pending} requisições ainda em andamento")
+        self._executor.shutdown(wait=finished, cancel_futures=not finished)
+
+
+def serve(app, host, port, threads=16, queue_limit=64, keep_alive=2, shutdown_timeout=30):
+    """
+    Sobe o servidor de produção e bloqueia até SIGINT/SIGTERM.
+    O sinal interrompe a aceitação de conexões; as requisições em
+    andamento terminam antes de o processo sair.
+    """
+    server = PooledWSGIServer(host, port, app, threads=threads, queue_limit=queue_limit,
+                              keep_alive=keep_alive, shutdown_timeout=shutdown_timeout)
+    app.extensions['wsgi_server'] = server
+
+    def stop(signum, frame):
+        # shutdown() espera serve_forever terminar: precisa rodar em outra thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    if threading.current_thread() is threading.main_thread():
+        for name in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), stop)
+
+    logger.info(f"Servidor de produção em http://{host}:{port} ({threads} threads, fila {queue_limit})")
+    server.serve_forever()
+    return server
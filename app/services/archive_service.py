@@ -0,0 +1,328 @@
+"""
+Archive Service
+Banco de arquivo (ARCHIVE_DB_PATH): ordens excluídas há mais de
+ARCHIVE_DELETED_AFTER_DAYS dias e os anos encerrados de ordens e caixa saem
+das tabelas principais, com graus, pagamentos parciais, contas e
+movimentações de caixa. A lixeira lista o arquivo e restaura ordens dele.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from app.config import ARCHIVE_DB_PATH, ARCHIVE_DELETED_AFTER_DAYS
+from app.models import get_partition_db, get_partitions, FEDERATED
+from app.utils import restore_order
+
+# Schema do banco de arquivo anexado à conexão do banco principal
+ARCHIVE_SCHEMA = 'arquivo'
+
+# Tabelas que acompanham a ordem, com a coluna que aponta para ela (ordens
+# antes dos filhos na cópia; filhos antes na remoção). O caixa é tratado à
+# parte: movimentações sem ordem também vão para o arquivo com o ano.
+ORDER_TABLES = (
+    ('orders', 'id'),
+    ('graus', 'order_id'),
+    ('partial_payments', 'order_id'),
+    ('accounts_receivable', 'order_id'),
+    ('accounts_payable', 'order_id'),
+)
+
+
+class ArchiveError(RuntimeError):
+    """Arquivamento ou restauração que não pode ser feito"""
+
+
+def _columns(db, schema, table):
+    return [info[1] for info in db.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def _copy_rows(db, source, target, table, where):
+    """Copia as linhas de source.table que atendem where para target.table (colunas em comum)"""
+    source_columns = set(_columns(db, source, table))
+    columns = ', '.join(c for c in _columns(db, target, table) if c in source_columns)
+    return db.execute(f"""
+        INSERT INTO {target}.{table} ({columns})
+        SELECT {columns} FROM {source}.{table} WHERE {where}
+    """).rowcount
+
+
+# Arquivos de arquivo já criados/migrados neste processo
+_ready_paths = set()
+_ready_lock = threading.Lock()
+
+
+def _init_archive_file(path):
+    """
+    Cria (ou atualiza) o arquivo com o mesmo schema do banco principal,
+    uma vez por processo (ou de novo se o arquivo sumir)
+    """
+    if path in _ready_paths and os.path.exists(path):
+        return
+    from app.migrations import run_migrations
+    with _ready_lock:
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            run_migrations(conn)
+        finally:
+            conn.close()
+        _ready_paths.add(path)
+
+
+@contextmanager
+def _archive_attached(path=ARCHIVE_DB_PATH):
+    """
+    Conexão do banco principal com o arquivo anexado como ARCHIVE_SCHEMA.
+    A conexão volta ao pool, então o arquivo é desanexado no fim. Chaves
+    estrangeiras ficam desligadas enquanto isso: as tabelas de referência
+    (vendedores) existem só no banco principal.
+    """
+    if get_partitions():
+        raise ArchiveError("O arquivo não suporta partições por loja (STORE_PARTITIONS)")
+    _init_archive_file(path)
+    db = get_partition_db(0)
+    db.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    db.execute("PRAGMA foreign_keys = OFF")
+    try:
+        yield db
+    finally:
+        db.execute("PRAGMA foreign_keys = ON")
+        db.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+
+
+def _add_cash_totals(db, source, sign):
+    """Soma (sign=1) ou subtrai (sign=-1) de cash_archive_totals as movimentações de temp.moving_cash"""
+    db.execute(f"""
+        INSERT INTO main.cash_archive_totals (year, total_entries, total_exits, updated_at)
+        SELECT substr(date, 1, 4),
+               ? * COALESCE(SUM(CASE WHEN type = 'entrada' THEN amount END), 0),
+               ? * COALESCE(SUM(CASE WHEN type = 'saida' THEN amount END), 0),
+               CURRENT_TIMESTAMP
+        FROM {source}.cash_flow WHERE id IN (SELECT id FROM temp.moving_cash)
+        GROUP BY substr(date, 1, 4)
+        ON CONFLICT(year) DO UPDATE SET
+            total_entries = total_entries + excluded.total_entries,
+            total_exits = total_exits + excluded.total_exits,
+            updated_at = excluded.updated_at
+    """, (sign, sign))
+    db.execute("DELETE FROM main.cash_archive_totals WHERE ABS(total_entries) < 0.005 AND ABS(total_exits) < 0.005")
+
+
+def _last_change(db):
+    return db.execute("SELECT COALESCE(MAX(seq), 0) FROM main.change_log").fetchone()[0]
+
+
+def _forget_changes(db, since):
+    """
+    Tira do change_log o que a movimentação registrou depois de since: mover
+    linhas entre o banco principal e o arquivo não é alteração de dados, e
+    a sincronização não pode repassar as remoções aos pares
+    """
+    db.execute("DELETE FROM main.change_log WHERE seq > ?", (since,))
+
+
+def _add_rollup(db, source, sign):
+    """
+    Soma (sign=1) ou subtrai (sign=-1) de main.sales_rollup as ordens de
+    temp.moving_orders em source: os gatilhos do consolidado tiram as
+    ordens arquivadas do dashboard (e as contam de novo na restauração),
+    então o arquivamento desfaz esse efeito, como cash_archive_totals faz
+    com o caixa
+    """
+    db.execute(f"""
+        INSERT INTO main.sales_rollup
+            (month, store, lab, payment_status, order_count, revenue, sales_count, sales_revenue)
+        SELECT CASE WHEN date(exam_date) = exam_date THEN substr(exam_date, 1, 7) ELSE '' END,
+               COALESCE(store, ''), COALESCE(lab, ''), COALESCE(payment_status, ''),
+               ? * COUNT(*), ? * SUM(COALESCE(valor_pago, 0)),
+               ? * SUM(COALESCE(valor_pago, 0) > 0), ? * SUM(MAX(COALESCE(valor_pago, 0), 0))
+        FROM {source}.orders
+        WHERE id IN (SELECT id FROM temp.moving_orders) AND deleted_at IS NULL
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (month, store, lab, payment_status) DO UPDATE SET
+            order_count = order_count + excluded.order_count,
+            revenue = revenue + excluded.revenue,
+            sales_count = sales_count + excluded.sales_count,
+            sales_revenue = sales_revenue + excluded.sales_revenue
+    """, (sign, sign, sign, sign))
+    db.execute("DELETE FROM main.sales_rollup WHERE order_count <= 0")
+
+
+def add_archived_rollup(path=ARCHIVE_DB_PATH):
+    """
+    Soma ao consolidado de vendas as ordens do arquivo (depois de
+    rebuild_sales_rollup, que só vê as ordens do banco principal)
+
+    Returns:
+        int: ordens do arquivo somadas
+    """
+    if get_partitions() or not os.path.exists(path):
+        return 0
+    with _archive_attached(path) as db:
+        try:
+            db.execute("DROP TABLE IF EXISTS temp.moving_orders")
+            db.execute(f"CREATE TEMP TABLE moving_orders AS SELECT id FROM {ARCHIVE_SCHEMA}.orders")
+            count = db.execute("SELECT COUNT(*) FROM temp.moving_orders").fetchone()[0]
+            _add_rollup(db, ARCHIVE_SCHEMA, 1)
+            db.execute("DROP TABLE temp.moving_orders")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return count
+
+
+def archive(year=None, deleted_after_days=ARCHIVE_DELETED_AFTER_DAYS, path=ARCHIVE_DB_PATH):
+    """
+    Move para o arquivo as ordens excluídas há mais de deleted_after_days
+    dias e, com year, as ordens pagas e as movimentações de caixa até o fim
+    de year (que precisa estar encerrado). Uma ordem só sai se todas as suas
+    movimentações de caixa saírem junto e se não tiver parcelas a receber
+    nem contas a pagar em aberto; os totais do caixa arquivado ficam em
+    cash_archive_totals e as ordens continuam no consolidado do
+    dashboard, então saldo e faturamento não mudam. As remoções não entram
+    no change_log (não são enviadas aos pares na sincronização).
+
+    Returns:
+        dict: orders, cash_flow (linhas movidas)
+    """
+    cutoff = None
+    if year is not None:
+        if int(year) >= datetime.now().year:
+            raise ArchiveError(f"O ano {year} ainda não foi encerrado")
+        cutoff = f"{int(year):04d}-12-31"
+    deleted_before = (datetime.now() - timedelta(days=deleted_after_days)).isoformat()
+
+    with _archive_attached(path) as db:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            last_change = _last_change(db)
+            db.execute("DROP TABLE IF EXISTS temp.moving_orders")
+            db.execute("DROP TABLE IF EXISTS temp.moving_cash")
+            # Datas fora do formato AAAA-MM-DD não entram pelo ano
+            db.execute("""
+                CREATE TEMP TABLE moving_orders AS
+                SELECT id FROM main.orders o
+                WHERE (o.deleted_at < :deleted_before
+                       OR (o.deleted_at IS NULL AND o.payment_status = 'Pago'
+                           AND o.exam_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+                           AND o.exam_date <= :cutoff))
+                  AND NOT EXISTS (
+                      SELECT 1 FROM main.cash_flow c
+                      WHERE c.order_id = o.id AND (:cutoff IS NULL OR c.date > :cutoff)
+                  )
+                  AND NOT EXISTS (
+                      SELECT 1 FROM main.accounts_receivable r WHERE r.order_id = o.id AND r.status = 'Pendente'
+                  )
+                  AND NOT EXISTS (
+                      SELECT 1 FROM main.accounts_payable p WHERE p.order_id = o.id AND p.status = 'Pendente'
+                  )
+            """, {'deleted_before': deleted_before, 'cutoff': cutoff})
+            db.execute("""
+                CREATE TEMP TABLE moving_cash AS
+                SELECT id FROM main.cash_flow
+                WHERE order_id IN (SELECT id FROM temp.moving_orders)
+                   OR (order_id IS NULL AND date <= :cutoff)
+            """, {'cutoff': cutoff})
+
+            moved = {table: _copy_rows(db, 'main', ARCHIVE_SCHEMA, table,
+                                       f"{key} IN (SELECT id FROM temp.moving_orders)")
+                     for table, key in ORDER_TABLES}
+            moved['cash_flow'] = _copy_rows(db, 'main', ARCHIVE_SCHEMA, 'cash_flow',
+                                            "id IN (SELECT id FROM temp.moving_cash)")
+            _add_cash_totals(db, 'main', 1)
+
+            db.execute("DELETE FROM main.cash_flow WHERE id IN (SELECT id FROM temp.moving_cash)")
+            for table, key in reversed(ORDER_TABLES):
+                db.execute(f"DELETE FROM main.{table} WHERE {key} IN (SELECT id FROM temp.moving_orders)")
+            _add_rollup(db, ARCHIVE_SCHEMA, 1)
+            _forget_changes(db, last_change)
+            db.execute("DROP TABLE temp.moving_orders")
+            db.execute("DROP TABLE temp.moving_cash")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return moved
+
+
+def restore_archived_order(order_id, path=ARCHIVE_DB_PATH):
+    """
+    Traz a ordem do arquivo de volta ao banco principal (com graus,
+    pagamentos, contas e movimentações de caixa) e desfaz a exclusão com
+    restore_order.
+
+    Returns:
+        bool: True se a ordem estava no arquivo
+    """
+    with _archive_attached(path) as db:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            found = db.execute(
+                f"SELECT 1 FROM {ARCHIVE_SCHEMA}.orders WHERE id = ?", (order_id,)
+            ).fetchone()
+            if not found:
+                db.rollback()
+                return False
+            if db.execute("SELECT 1 FROM main.orders WHERE id = ?", (order_id,)).fetchone():
+                raise ArchiveError(f"A ordem {order_id} já existe no banco principal")
+            last_change = _last_change(db)
+            db.execute("DROP TABLE IF EXISTS temp.moving_orders")
+            db.execute("DROP TABLE IF EXISTS temp.moving_cash")
+            db.execute("CREATE TEMP TABLE moving_orders AS SELECT ? AS id", (order_id,))
+            db.execute(
+                f"CREATE TEMP TABLE moving_cash AS SELECT id FROM {ARCHIVE_SCHEMA}.cash_flow WHERE order_id = ?",
+                (order_id,)
+            )
+            # Já contada no consolidado: o gatilho de inserção soma de novo
+            _add_rollup(db, ARCHIVE_SCHEMA, -1)
+            for table, key in ORDER_TABLES:
+                _copy_rows(db, ARCHIVE_SCHEMA, 'main', table, f"{key} = {int(order_id)}")
+            _copy_rows(db, ARCHIVE_SCHEMA, 'main', 'cash_flow', "id IN (SELECT id FROM temp.moving_cash)")
+            _add_cash_totals(db, 'main', -1)
+            _forget_changes(db, last_change)
+
+            db.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.cash_flow WHERE id IN (SELECT id FROM temp.moving_cash)")
+            for table, key in reversed(ORDER_TABLES):
+                db.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.{table} WHERE {key} = ?", (order_id,))
+            db.execute("DROP TABLE temp.moving_orders")
+            db.execute("DROP TABLE temp.moving_cash")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return restore_order(db, order_id)
+
+
+def fetch_trash_page(source='archive', before=None, limit=50, path=ARCHIVE_DB_PATH):
+    """
+    Página da lixeira com paginação keyset em id: ordens do arquivo
+    (source='archive') ou excluídas que ainda estão no banco principal ou
+    nas partições por loja (source='deleted').
+
+    Returns:
+        tuple: (ordens: list, próximo cursor: int ou None)
+    """
+    sql = "SELECT * FROM {table} WHERE {where}"
+    params = []
+    if before:
+        sql += " AND id < ?"
+        params.append(before)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    if source == 'deleted':
+        # Com partições, a view federada de orders une todas as lojas. O
+        # SCAN é do índice parcial idx_orders_trash: lê só as excluídas
+        db = get_partition_db(FEDERATED if get_partitions() else 0)
+        sql = sql.replace('SELECT', 'SELECT /* scan-ok */', 1)
+        orders = db.execute(sql.format(table='orders', where='deleted_at IS NOT NULL'), params).fetchall()
+    else:
+        with _archive_attached(path) as db:
+            orders = db.execute(sql.format(table=f'{ARCHIVE_SCHEMA}.orders', where='1'), params).fetchall()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = orders[-1]['id']
+    return orders, next_cursor
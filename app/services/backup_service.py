@@ -0,0 +1,339 @@
+"""
+Backup Service
+Backup online dos bancos SQLite (principal e partições por loja) com a API
+de backup do SQLite, verificação de integridade, compressão, retenção e
+restauração
+"""
+import os
+import re
+import gzip
+import json
+import time
+import shutil
+import logging
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from app.config import (
+    DB_PATH, STORE_PARTITIONS_DIR, ARCHIVE_DB_PATH, BACKUP_DIR, BACKUP_KEEP_LAST, BACKUP_KEEP_DAILY,
+    BACKUP_KEEP_MONTHLY, BACKUP_STEP_PAGES, BACKUP_STEP_PAUSE_MS
+)
+from app.models import get_partitions
+from app.services.metrics_service import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Nome da pasta de cada snapshot (data e hora da cópia)
+SNAPSHOT_NAME = re.compile(r'^\d{8}-\d{6}$')
+MANIFEST = 'manifest.json'
+
+# Reinícios tolerados (escritas de outras conexões reiniciam a cópia em
+# passos) antes de copiar o restante num passo só
+MAX_RESTARTS = 3
+
+# Primeira cópia do agendador, depois da inicialização
+FIRST_BACKUP_DELAY = 60
+
+
+class BackupError(RuntimeError):
+    """Cópia que não passou na verificação ou snapshot inválido"""
+
+
+class _Restarted(Exception):
+    pass
+
+
+def database_files():
+    """Arquivos copiados: [(tipo, nome do arquivo, caminho)] - o principal, as partições e o arquivo"""
+    files = [('main', os.path.basename(DB_PATH), DB_PATH)]
+    files += [('partition', os.path.basename(path), path) for _number, _store, path in get_partitions()]
+    if os.path.exists(ARCHIVE_DB_PATH):
+        files.append(('archive', os.path.basename(ARCHIVE_DB_PATH), ARCHIVE_DB_PATH))
+    return files
+
+
+def _copy_online(source_path, target_path, pages=BACKUP_STEP_PAGES, pause_ms=BACKUP_STEP_PAUSE_MS):
+    """
+    Copia o banco com Connection.backup em passos de pages páginas, com uma
+    pausa entre eles para não disputar disco e GIL com as requisições. Cada
+    passo segura só uma leitura curta: em WAL as escritas continuam.
+
+    Returns:
+        dict: pages, steps, restarts
+    """
+    info = {'pages': 0, 'steps': 0, 'restarts': 0}
+    last = [None]
+
+    def progress(status, remaining, total):
+        info['steps'] += 1
+        info['pages'] = total
+        if last[0] is not None and remaining > last[0]:
+            info['restarts'] += 1
+            if info['restarts'] > MAX_RESTARTS:
+                raise _Restarted()
+        last[0] = remaining
+        if remaining and pause_ms:
+            time.sleep(pause_ms / 1000)
+
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        try:
+            source.backup(target, pages=pages, progress=progress)
+        except _Restarted:
+            # Banco muito escrito: o restante vai num passo só (uma leitura
+            # consistente, que em WAL não bloqueia as escritas)
+            source.backup(target, pages=-1)
+    finally:
+        target.close()
+        source.close()
+    return info
+
+
+def check_integrity(path):
+    """Resultado de PRAGMA integrity_check do arquivo (['ok'] quando íntegro)"""
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+    except sqlite3.DatabaseError as e:
+        # Cabeçalho ou páginas ilegíveis: nem chega a rodar a verificação
+        return [str(e)]
+    finally:
+        conn.close()
+
+
+def _compress(source_path, target_path):
+    with open(source_path, 'rb') as source, gzip.open(target_path, 'wb', compresslevel=6) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+
+
+def create_snapshot(directory=BACKUP_DIR):
+    """
+    Copia todos os bancos para uma pasta nova em directory: cada cópia é
+    verificada com integrity_check antes de ser comprimida; a pasta só
+    ganha o nome final (data e hora) quando todas passaram.
+
+    Returns:
+        dict: manifesto do snapshot (name, created_at, seconds, files)
+    """
+    started = time.perf_counter()
+    name = datetime.now().strftime('%Y%m%d-%H%M%S')
+    os.makedirs(directory, exist_ok=True)
+    work = tempfile.mkdtemp(prefix=f'.tmp-{name}-', dir=directory)
+    try:
+        files = []
+        for kind, filename, path in database_files():
+            copy_path = os.path.join(work, filename)
+            copy = _copy_online(path, copy_path)
+            result = check_integrity(copy_path)
+            if result != ['ok']:
+                raise BackupError(f"Cópia de {filename} falhou na verificação: {'; '.join(result[:5])}")
+            _compress(copy_path, copy_path + '.gz')
+            os.remove(copy_path)
+            files.append({
+                'kind': kind,
+                'filename': filename,
+                'size': os.path.getsize(path),
+                'compressed_size': os.path.getsize(copy_path + '.gz'),
+                **copy,
+            })
+        manifest = {
+            'name': name,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'seconds': round(time.perf_counter() - started, 3),
+            'files': files,
+        }
+        with open(os.path.join(work, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        target = os.path.join(directory, name)
+        if os.path.exists(target):
+            raise BackupError(f"Snapshot {name} já existe")
+        os.replace(work, target)
+    except Exception:
+        shutil.rmtree(work, ignore_errors=True)
+        raise
+    return manifest
+
+
+def list_snapshots(directory=BACKUP_DIR):
+    """Manifestos dos snapshots em directory, do mais recente ao mais antigo"""
+    if not os.path.isdir(directory):
+        return []
+    snapshots = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        manifest_path = os.path.join(directory, name, MANIFEST)
+        if SNAPSHOT_NAME.match(name) and os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+    return snapshots
+
+
+def select_expired(names, keep_last=BACKUP_KEEP_LAST, keep_daily=BACKUP_KEEP_DAILY,
+                   keep_monthly=BACKUP_KEEP_MONTHLY):
+    """
+    Snapshots fora das regras de retenção: ficam os keep_last mais recentes,
+    o mais recente de cada um dos últimos keep_daily dias e o mais recente
+    de cada um dos últimos keep_monthly meses (que tenham snapshots)
+    """
+    ordered = sorted(names, reverse=True)
+    keep = set(ordered[:keep_last])
+    for length, count in ((8, keep_daily), (6, keep_monthly)):
+        periods = []
+        for name in ordered:
+            period = name[:length]
+            if period not in periods:
+                periods.append(period)
+                if len(periods) > count:
+                    break
+                keep.add(name)
+    return [name for name in ordered if name not in keep]
+
+
+def apply_retention(directory=BACKUP_DIR):
+    """Remove os snapshots expirados e sobras de cópias interrompidas. Returns: removidos"""
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if SNAPSHOT_NAME.match(name)]
+    expired = select_expired(names)
+    for name in expired:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    day_ago = time.time() - 24 * 3600
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith('.tmp-') and os.path.getmtime(path) < day_ago:
+            shutil.rmtree(path, ignore_errors=True)
+    return expired
+
+
+def _restore_target(entry):
+    if entry['kind'] == 'main':
+        return DB_PATH
+    if entry['kind'] == 'archive':
+        return ARCHIVE_DB_PATH
+    return os.path.join(STORE_PARTITIONS_DIR, entry['filename'])
+
+
+def restore_snapshot(name, directory=BACKUP_DIR):
+    """
+    Restaura os bancos do snapshot name. Cada arquivo é descomprimido e
+    verificado antes; a gravação usa a API de backup no sentido inverso,
+    então conexões abertas passam a ver o conteúdo restaurado de uma vez.
+
+    Returns:
+        list: caminhos restaurados
+    """
+    if not SNAPSHOT_NAME.match(name or ''):
+        raise BackupError(f"Snapshot inválido: {name}")
+    manifest_path = os.path.join(directory, name, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise BackupError(f"Snapshot {name} não encontrado em {directory}")
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    work = tempfile.mkdtemp(prefix='.restore-', dir=directory)
+    try:
+        copies = []
+        for entry in manifest['files']:
+            copy_path = os.path.join(work, entry['filename'])
+            with gzip.open(os.path.join(directory, name, entry['filename'] + '.gz'), 'rb') as source, \
+                    open(copy_path, 'wb') as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            result = check_integrity(copy_path)
+            if result != ['ok']:
+                raise BackupError(f"{entry['filename']} do snapshot {name} está corrompido")
+            copies.append((copy_path, _restore_target(entry)))
+
+        restored = []
+        for copy_path, target_path in copies:
+            os.makedirs(os.path.dirname(target_path) or '.', exist_ok=True)
+            source = sqlite3.connect(copy_path)
+            target = sqlite3.connect(target_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            restored.append(target_path)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return restored
+
+
+class BackupScheduler(threading.Thread):
+    """
+    Thread de fundo que cria um snapshot a cada interval_minutes e aplica a
+    retenção. Duração e resultado de cada cópia ficam em stats() (exibido
+    em /debug/metrics); durante a cópia, a latência das requisições é
+    medida à parte (metrics_service).
+    """
+
+    def __init__(self, interval_minutes, directory=BACKUP_DIR, first_delay=FIRST_BACKUP_DELAY):
+        super().__init__(name='backup', daemon=True)
+        self.interval = interval_minutes * 60
+        self.directory = directory
+        self.first_delay = first_delay
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            'runs': 0,
+            'failures': 0,
+            'running': False,
+            'last_snapshot': None,
+            'last_started_at': None,
+            'last_seconds': None,
+            'last_compressed_bytes': None,
+            'last_error': None,
+        }
+
+    def run(self):
+        delay = self.first_delay
+        while not self._stop_event.wait(delay):
+            self.run_once()
+            delay = self.interval
+
+    def run_once(self):
+        """Cria um snapshot agora (erros são registrados, não propagados)"""
+        with self._lock:
+            self._stats['running'] = True
+            self._stats['last_started_at'] = datetime.now().isoformat(timespec='seconds')
+        metrics.set_backup_running(True)
+        try:
+            manifest = create_snapshot(self.directory)
+            apply_retention(self.directory)
+        except Exception as e:
+            logger.exception("Erro no backup")
+            with self._lock:
+                self._stats['failures'] += 1
+                self._stats['last_error'] = str(e)
+            manifest = None
+        finally:
+            metrics.set_backup_running(False)
+            with self._lock:
+                self._stats['running'] = False
+                self._stats['runs'] += 1
+        if manifest:
+            with self._lock:
+                self._stats.update(
+                    last_snapshot=manifest['name'],
+                    last_seconds=manifest['seconds'],
+                    last_compressed_bytes=sum(f['compressed_size'] for f in manifest['files']),
+                    last_error=None,
+                )
+        return manifest
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, interval_minutes=self.interval / 60, directory=self.directory)
+
+
+def start_backup_scheduler(app, interval_minutes):
+    """Inicia o agendador em segundo plano e o registra em app.extensions"""
+    scheduler = BackupScheduler(interval_minutes)
+    app.extensions['backup_scheduler'] = scheduler
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,68 @@
+"""
+Cache Service
+Cache em memória de dados agregados (dashboard e resumo do caixa),
+invalidado automaticamente quando o banco muda
+"""
+import threading
+from collections import OrderedDict
+from app.config import DATA_CACHE_SIZE
+from app.models import get_data_version
+
+
+class VersionedCache:
+    """
+    Cache LRU cujas entradas valem para uma versão do banco.
+
+    A versão é o PRAGMA data_version lido pelo pool (de cada arquivo, com
+    partições por loja): qualquer escrita confirmada a altera, e a próxima
+    leitura recalcula o valor. Guarda dados (dicts e linhas), não HTML,
+    porque os templates também exibem as mensagens flash de cada requisição.
+    """
+
+    def __init__(self, max_entries=64, version=None):
+        self.max_entries = max_entries
+        self._version = version or get_data_version
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get_or_compute(self, key, compute):
+        """Retorna o valor em cache para key ou o calcula com compute()"""
+        if self.max_entries <= 0:
+            return compute()
+
+        version = self._version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+
+        # Calcula fora do lock; duas requisições simultâneas podem calcular
+        # o mesmo valor, o que é mais barato que serializá-las
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+data_cache = VersionedCache(DATA_CACHE_SIZE)
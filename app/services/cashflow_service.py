@@ -2,32 +2,117 @@
 Cash Flow Service
 Handles business logic for cash flow management
 """
-from app.models import get_db
+from app.models import get_db, get_db_schemas, current_partition
+from app.services.cache_service import data_cache
+from app.services.receivable_service import schedule_receivables
 from datetime import datetime
 
 
+def _daily_totals(db, after_date, before_date=None, schema='main'):
+    """Sum entries and exits per day for after_date < date (< before_date)"""
+    query = f"""
+        SELECT date,
+               COALESCE(SUM(CASE WHEN type = 'entrada' THEN amount END), 0) AS entries,
+               COALESCE(SUM(CASE WHEN type = 'saida' THEN amount END), 0) AS exits
+        FROM {schema}.cash_flow
+        WHERE date > ?
+    """
+    params = [after_date]
+    if before_date:
+        query += " AND date < ?"
+        params.append(before_date)
+    query += " GROUP BY date ORDER BY date"
+    return db.execute(query, params).fetchall()
+
+
+def _last_closing(db, schema='main'):
+    """Most recent daily closing of schema, or None"""
+    return db.execute(
+        f"SELECT * FROM {schema}.cash_closings ORDER BY date DESC LIMIT 1"
+    ).fetchone()
+
+
+def close_days(until_date, schema='main', db=None):
+    """
+    Record daily closings (fechamento de caixa) for every day before
+    until_date that has movements and is not closed yet.
+
+    Closings are cumulative, so each new one starts from the last existing
+    snapshot. Returns the last closing row, or None if nothing is closed.
+    Each database file keeps its own closings (schema selects an attached
+    store partition; db a partition connection). This writes, so it runs
+    from write paths (cash movements and the close-cash command), never
+    from balance reads.
+    """
+    db = db or get_db()
+    last = _last_closing(db, schema)
+
+    total_entries = last['total_entries'] if last else 0
+    total_exits = last['total_exits'] if last else 0
+    closings = []
+    for day in _daily_totals(db, last['date'] if last else '', until_date, schema):
+        total_entries += day['entries']
+        total_exits += day['exits']
+        closings.append((day['date'], total_entries, total_exits, total_entries - total_exits))
+
+    if closings:
+        db.executemany(f"""
+            INSERT OR REPLACE INTO {schema}.cash_closings (date, total_entries, total_exits, balance)
+            VALUES (?, ?, ?, ?)
+        """, closings)
+        db.commit()
+        last = _last_closing(db, schema)
+    return last
+
+
 def calculate_balance():
-    """Calculate current cash balance (entries - exits)"""
+    """
+    Calculate current cash balance (entries - exits)
+
+    Uses the last daily closing plus the movements after it, so only the
+    days since the last close are summed, plus the totals of movements
+    moved to the archive database (cash_archive_totals). Federated reads
+    add up the balance of every store partition. Read-only: closings are
+    recorded by close_days on the write paths.
+    """
     db = get_db()
-    
-    # Sum all entries
-    entries = db.execute(
-        "SELECT COALESCE(SUM(amount), 0) as total FROM cash_flow WHERE type = 'entrada'"
-    ).fetchone()
-    
-    # Sum all exits
-    exits = db.execute(
-        "SELECT COALESCE(SUM(amount), 0) as total FROM cash_flow WHERE type = 'saida'"
-    ).fetchone()
-    
-    balance = entries['total'] - exits['total']
+    total_entries = 0
+    total_exits = 0
+    for schema in get_db_schemas():
+        archived = db.execute(f"""
+            SELECT COALESCE(SUM(total_entries), 0), COALESCE(SUM(total_exits), 0)
+            FROM {schema}.cash_archive_totals
+        """).fetchone()
+        total_entries += archived[0]
+        total_exits += archived[1]
+        last = _last_closing(db, schema)
+        total_entries += last['total_entries'] if last else 0
+        total_exits += last['total_exits'] if last else 0
+        for day in _daily_totals(db, last['date'] if last else '', schema=schema):
+            total_entries += day['entries']
+            total_exits += day['exits']
+
     return {
-        'balance': balance,
-        'total_entries': entries['total'],
-        'total_exits': exits['total']
+        'balance': total_entries - total_exits,
+        'total_entries': total_entries,
+        'total_exits': total_exits
     }
 
 
+def cached_balance():
+    """calculate_balance() served from the data cache until the database changes"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    return data_cache.get_or_compute(('cash_balance', current_partition(), today), calculate_balance)
+
+
+def cached_summary(start_date=None, end_date=None):
+    """get_summary() served from the data cache until the database changes"""
+    return data_cache.get_or_compute(
+        ('cash_summary', current_partition(), start_date, end_date),
+        lambda: get_summary(start_date, end_date)
+    )
+
+
 def get_movements(filters=None):
     """Get cash flow movements with optional filters"""
     db = get_db()
@@ -75,6 +160,7 @@ def add_entry(data):
         data.get('order_id')
     ))
     db.commit()
+    close_days(datetime.now().strftime('%Y-%m-%d'))
     return cursor.lastrowid
 
 
@@ -92,6 +178,7 @@ def add_exit(data):
         data.get('payment_method')
     ))
     db.commit()
+    close_days(datetime.now().strftime('%Y-%m-%d'))
     return cursor.lastrowid
 
 
@@ -126,6 +213,9 @@ def add_partial_payment(order_id, data):
     
     # Update partial_payment with cash_flow_id
     db.execute("UPDATE partial_payments SET cash_flow_id = ? WHERE id = ?", (cash_flow_id, cursor.lastrowid))
+
+    # Open installments cover only what is left after the payment
+    schedule_receivables(db, [order_id])
     
     db.commit()
     return cursor.lastrowid
@@ -165,6 +255,8 @@ def edit_partial_payment(payment_id, data):
             data.get('payment_method'),
             payment['cash_flow_id']
         ))
+
+    schedule_receivables(db, [payment['order_id']])
         
     db.commit()
 
@@ -184,10 +276,24 @@ def delete_partial_payment(payment_id):
         
     # Delete partial payment
     db.execute("DELETE FROM partial_payments WHERE id = ?", (payment_id,))
+    schedule_receivables(db, [payment['order_id']])
     
     db.commit()
 
 
+def delete_movement(movement_id):
+    """Delete a cash flow movement (and the partial payment linked to it)"""
+    db = get_db()
+    order_ids = [row[0] for row in db.execute(
+        "SELECT order_id FROM partial_payments WHERE cash_flow_id = ?", (movement_id,)
+    )]
+    db.execute("DELETE FROM partial_payments WHERE cash_flow_id = ?", (movement_id,))
+    db.execute("DELETE FROM cash_flow WHERE id = ?", (movement_id,))
+    if order_ids:
+        schedule_receivables(db, order_ids)
+    db.commit()
+
+
 def get_order_balance(order_id):
     """Get payment balance for a specific order"""
     db = get_db()
@@ -0,0 +1,100 @@
+"""
+Dashboard Service
+Reads dashboard statistics from the sales_rollup table
+"""
+from app.models import get_db, current_partition
+from app.services.cache_service import data_cache
+from datetime import datetime
+
+
+def get_totals():
+    """Get total orders, total revenue and pending orders (non-deleted only)"""
+    db = get_db()
+    row = db.execute("""
+        SELECT
+            COALESCE(SUM(order_count), 0) AS total_orders,
+            COALESCE(SUM(revenue), 0) AS total_revenue,
+            COALESCE(SUM(CASE WHEN payment_status = 'Pendente' THEN order_count ELSE 0 END), 0) AS pending_orders
+        FROM sales_rollup
+    """).fetchone()
+    return {
+        'total_orders': row['total_orders'],
+        'total_revenue': row['total_revenue'],
+        'pending_orders': row['pending_orders']
+    }
+
+
+def get_sales_by_month(months=6):
+    """Get (labels, values) for the last months with sales, oldest first"""
+    db = get_db()
+    rows = db.execute("""
+        SELECT month, SUM(sales_revenue) AS total
+        FROM sales_rollup
+        WHERE month != ''
+        GROUP BY month
+        HAVING SUM(sales_count) > 0
+        ORDER BY month DESC
+        LIMIT ?
+    """, (months,)).fetchall()
+    rows = list(reversed(rows))
+    labels = [datetime.strptime(r['month'], '%Y-%m').strftime('%b/%Y') for r in rows]
+    values = [round(r['total'], 2) for r in rows]
+    return labels, values
+
+
+def get_top_labs(limit=5):
+    """Get labs with the most orders"""
+    db = get_db()
+    return db.execute("""
+        SELECT lab, SUM(order_count) AS count
+        FROM sales_rollup
+        WHERE lab != ''
+        GROUP BY lab
+        ORDER BY count DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
+
+
+def get_recent_orders(limit=5):
+    """Get the latest non-deleted orders"""
+    db = get_db()
+    return db.execute(
+        "SELECT * FROM orders WHERE deleted_at IS NULL ORDER BY id DESC LIMIT ?",
+        (limit,)
+    ).fetchall()
+
+
+def get_dashboard_data():
+    """
+    All dashboard figures, served from the data cache until the
+    database changes
+    """
+    def compute():
+        chart_labels, chart_data = get_sales_by_month(6)
+        return {
+            'totals': get_totals(),
+            'chart_labels': chart_labels,
+            'chart_data': chart_data,
+            'top_labs': get_top_labs(5),
+            'recent_orders': get_recent_orders(5),
+        }
+    return data_cache.get_or_compute(('dashboard', current_partition()), compute)
+
+
+def rebuild_sales_rollup(db=None):
+    """Recompute sales_rollup from scratch from the orders table (of db, default get_db())"""
+    db = db or get_db()
+    db.execute("DELETE FROM sales_rollup")
+    db.execute("""
+        /* scan-ok */
+        INSERT INTO sales_rollup (month, store, lab, payment_status, order_count, revenue, sales_count, sales_revenue)
+        SELECT CASE WHEN date(exam_date) = exam_date THEN substr(exam_date, 1, 7) ELSE '' END,
+               COALESCE(store, ''), COALESCE(lab, ''), COALESCE(payment_status, ''),
+               COUNT(*), SUM(COALESCE(valor_pago, 0)),
+               SUM(COALESCE(valor_pago, 0) > 0), SUM(MAX(COALESCE(valor_pago, 0), 0))
+        FROM orders
+        WHERE deleted_at IS NULL
+        GROUP BY 1, 2, 3, 4
+    """)
+    db.commit()
+    return db.execute("SELECT COUNT(*) FROM sales_rollup").fetchone()[0]
@@ -0,0 +1,321 @@
+"""
+Import Service
+Importação em lote de ordens (e graus) a partir de planilhas CSV/XLSX
+"""
+import io
+import re
+import csv
+import time
+import unicodedata
+from datetime import datetime, date
+from app.models import get_partition_db, partition_for_store, reserve_order_ids
+from app.utils import validate_amount, validate_date
+from app.services.receivable_service import schedule_receivables
+from app.services.payable_service import sync_lab_payables
+
+IMPORT_BATCH_SIZE = 5000
+
+ORDER_COLUMNS = [
+    'os_number', 'client_name', 'phone', 'purchase_type', 'store', 'lab',
+    'payment_status', 'payment_method', 'installments', 'lab_paid', 'exam_date',
+    'delivery_date', 'cpf', 'receita_fora', 'nome_doutor_fora', 'valor_pago',
+    'entrada', 'valor_retirada', 'nome_doutor_otica', 'endereco', 'lab_cost'
+]
+GRAU_FIELDS = ['esf', 'cil', 'eixo', 'dnp', 'indice', 'lens_type', 'adicao']
+GRAU_EYES = ('OD', 'OE')
+
+# Cabeçalhos aceitos (sem acento, minúsculos) -> coluna. Inclui os
+# cabeçalhos do relatório Excel exportado pelo sistema.
+HEADER_ALIASES = {
+    'os': 'os_number', 'n os': 'os_number', 'numero os': 'os_number', 'numero da os': 'os_number',
+    'cliente': 'client_name', 'nome': 'client_name', 'nome do cliente': 'client_name',
+    'telefone': 'phone', 'celular': 'phone',
+    'tipo de compra': 'purchase_type', 'tipo': 'purchase_type',
+    'loja': 'store',
+    'laboratorio': 'lab', 'lab': 'lab',
+    'status': 'payment_status', 'status pagamento': 'payment_status', 'status do pagamento': 'payment_status',
+    'forma de pagamento': 'payment_method', 'pagamento': 'payment_method',
+    'parcelas': 'installments',
+    'lab pago': 'lab_paid', 'laboratorio pago': 'lab_paid',
+    'data exame': 'exam_date', 'data do exame': 'exam_date',
+    'data entrega': 'delivery_date', 'data de entrega': 'delivery_date',
+    'receita fora': 'receita_fora', 'doutor fora': 'nome_doutor_fora',
+    # 'Valor Total' do relatório exportado soma pago + entrada + retirada;
+    # na importação ele é tratado como o valor da ordem
+    'valor': 'valor_pago', 'valor pago': 'valor_pago', 'valor total': 'valor_pago',
+    'valor retirada': 'valor_retirada', 'doutor otica': 'nome_doutor_otica',
+    'endereco': 'endereco',
+    'custo do laboratorio': 'lab_cost', 'custo laboratorio': 'lab_cost', 'custo lab': 'lab_cost',
+}
+
+_TRUE_VALUES = {'1', 'sim', 's', 'yes', 'y', 'true', 'x', 'on'}
+
+
+class ImportFormatError(ValueError):
+    """Arquivo em formato não suportado ou sem as colunas obrigatórias"""
+
+
+def _normalize_header(header):
+    text = unicodedata.normalize('NFKD', str(header or '')).encode('ascii', 'ignore').decode()
+    return ' '.join(text.lower().replace('_', ' ').replace('.', ' ').split())
+
+
+def _map_headers(headers):
+    """Índice de cada coluna conhecida na planilha ({coluna: posição})"""
+    known = set(ORDER_COLUMNS) | {f'{eye.lower()}_{field}' for eye in GRAU_EYES for field in GRAU_FIELDS}
+    mapping = {}
+    for position, header in enumerate(headers):
+        name = _normalize_header(header)
+        column = name.replace(' ', '_') if name.replace(' ', '_') in known else HEADER_ALIASES.get(name)
+        if column and column not in mapping:
+            mapping[column] = position
+    missing = [c for c in ('os_number', 'client_name') if c not in mapping]
+    if missing:
+        raise ImportFormatError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+    return mapping
+
+
+def _read_csv(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    first = text.readline()
+    dialect = csv.excel
+    try:
+        dialect = csv.Sniffer().sniff(first, delimiters=';,\t')
+    except csv.Error:
+        pass
+    yield next(csv.reader([first], dialect))
+    yield from csv.reader(text, dialect)
+
+
+def _read_xlsx(stream):
+    from openpyxl import load_workbook
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def read_rows(stream, filename):
+    """Linhas da planilha (a primeira é o cabeçalho), lidas sob demanda"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return _read_csv(stream)
+    if extension in ('xlsx', 'xlsm'):
+        return _read_xlsx(stream)
+    raise ImportFormatError("Formato não suportado: use .csv ou .xlsx")
+
+
+# 1.234 ou 12.345.678: pontos só como separador de milhar
+_THOUSANDS = re.compile(r'^-?\d{1,3}(\.\d{3})+$')
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _date(value):
+    """Data ISO a partir de datetime, AAAA-MM-DD ou DD/MM/AAAA"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    text = _text(value)
+    if '/' in text:
+        try:
+            return datetime.strptime(text.split()[0], '%d/%m/%Y').strftime('%Y-%m-%d')
+        except ValueError:
+            return text
+    return text[:10] if len(text) > 10 and text[10] in ' T' else text
+
+
+def _amount(value):
+    """
+    Texto numérico aceitando o formato brasileiro (1.234,56 e 1.234) e o
+    americano (1,234.56): com os dois separadores, o último é o decimal;
+    pontos em grupos de três dígitos sem vírgula são separador de milhar.
+    """
+    if isinstance(value, (int, float)):
+        return value
+    text = _text(value).replace('R$', '').replace(' ', '').replace('\xa0', '')
+    if ',' in text and '.' in text:
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        text = text.replace(',', '.') if text.count(',') == 1 else text.replace(',', '')
+    elif _THOUSANDS.match(text):
+        text = text.replace('.', '')
+    return text
+
+
+def _flag(value):
+    return 1 if _text(value).lower() in _TRUE_VALUES else 0
+
+
+def parse_row(values, mapping):
+    """
+    Converte e valida uma linha da planilha.
+
+    Returns:
+        tuple: (ordem como tupla em ORDER_COLUMNS, [graus], erro)
+    """
+    def get(column):
+        position = mapping.get(column)
+        return values[position] if position is not None and position < len(values) else None
+
+    os_number = _text(get('os_number'))
+    client_name = _text(get('client_name'))
+    if not os_number:
+        return None, None, "Número da OS é obrigatório"
+    if not client_name:
+        return None, None, "Nome do Cliente é obrigatório"
+
+    valid, valor_pago, error = validate_amount(_amount(get('valor_pago')))
+    if not valid:
+        return None, None, f"Valor Pago inválido: {error}"
+
+    amounts = {}
+    for column in ('entrada', 'valor_retirada', 'lab_cost'):
+        raw = _amount(get(column))
+        if raw in ('', None):
+            # Sem custo do laboratório, a ordem fica sem a conta a pagar
+            amounts[column] = None if column == 'lab_cost' else 0.0
+            continue
+        valid, amounts[column], error = validate_amount(raw, allow_zero=True)
+        if not valid:
+            return None, None, f"{column} inválido: {error}"
+
+    dates = {}
+    for column in ('exam_date', 'delivery_date'):
+        dates[column] = _date(get(column))
+        if dates[column]:
+            valid, error = validate_date(dates[column])
+            if not valid:
+                return None, None, f"{column} inválida: {error}"
+
+    installments = _text(get('installments'))
+    try:
+        installments = int(float(installments.replace(',', '.'))) if installments else 0
+    except ValueError:
+        return None, None, f"Parcelas inválidas: {installments}"
+
+    order = (
+        os_number, client_name, _text(get('phone')), _text(get('purchase_type')),
+        _text(get('store')), _text(get('lab')), _text(get('payment_status')),
+        _text(get('payment_method')), installments, _flag(get('lab_paid')),
+        dates['exam_date'], dates['delivery_date'], _text(get('cpf')), _flag(get('receita_fora')),
+        _text(get('nome_doutor_fora')), valor_pago, amounts['entrada'], amounts['valor_retirada'],
+        _text(get('nome_doutor_otica')), _text(get('endereco')), amounts['lab_cost']
+    )
+
+    graus = []
+    for eye in GRAU_EYES:
+        grau = [_text(get(f'{eye.lower()}_{field}')) for field in GRAU_FIELDS]
+        if any(grau):
+            graus.append((eye, *grau))
+    return order, graus, None
+
+
+def import_orders(rows, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importa ordens e graus de rows (cabeçalho + linhas, ver read_rows).
+
+    Linhas inválidas são puladas e relatadas; as válidas são gravadas com
+    executemany em lotes, com ids explícitos (os graus referenciam a ordem
+    sem depender de lastrowid), junto com as parcelas a receber e as
+    contas do laboratório (coluna de custo do laboratório) de cada lote,
+    tudo numa única transação: ou o arquivo inteiro entra, ou nada entra. Com partições por loja, cada ordem vai
+    para o arquivo da sua loja (uma transação por arquivo, confirmadas no
+    final) e os ids seguem a sequência do banco principal.
+
+    Returns:
+        dict: imported, graus, errors [(linha, mensagem)], seconds
+    """
+    started = time.perf_counter()
+    rows = iter(rows)
+    try:
+        mapping = _map_headers(next(rows))
+    except StopIteration:
+        raise ImportFormatError("Arquivo vazio")
+
+    errors = []
+    imported = 0
+    graus_count = 0
+    targets = {}
+    store_index = ORDER_COLUMNS.index('store')
+
+    def target(partition):
+        if partition not in targets:
+            db = get_partition_db(partition)
+            if not dry_run:
+                db.execute("BEGIN IMMEDIATE")
+            targets[partition] = {'db': db, 'orders': [], 'graus': []}
+        return targets[partition]
+
+    def flush(batch):
+        batch['db'].executemany(f"""
+            INSERT INTO orders (id, {', '.join(ORDER_COLUMNS)})
+            VALUES ({', '.join('?' * (len(ORDER_COLUMNS) + 1))})
+        """, batch['orders'])
+        batch['db'].executemany("""
+            INSERT INTO graus (order_id, lens_for, eye, esf, cil, eixo, dnp, indice, lens_type, adicao)
+            VALUES (?, 'longe', ?, ?, ?, ?, ?, ?, ?, ?)
+        """, batch['graus'])
+        order_ids = [order[0] for order in batch['orders']]
+        schedule_receivables(batch['db'], order_ids)
+        sync_lab_payables(batch['db'], order_ids)
+        batch['orders'].clear()
+        batch['graus'].clear()
+
+    try:
+        # O banco principal vem primeiro: a sequência de ids é a dele
+        db = target(0)['db']
+        # AUTOINCREMENT: o próximo id precisa passar também do sqlite_sequence
+        first_id = next_id = db.execute("""
+            SELECT MAX(COALESCE((SELECT MAX(id) FROM orders), 0),
+                       COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'orders'), 0)) + 1
+        """).fetchone()[0]
+        for line, values in enumerate(rows, start=2):
+            if not values or not any(_text(v) for v in values):
+                continue
+            order, graus, error = parse_row(values, mapping)
+            if error:
+                errors.append((line, error))
+                continue
+            imported += 1
+            graus_count += len(graus)
+            if dry_run:
+                continue
+            batch = target(partition_for_store(order[store_index]))
+            batch['orders'].append((next_id, *order))
+            batch['graus'].extend((next_id, *grau) for grau in graus)
+            next_id += 1
+            if len(batch['orders']) >= batch_size:
+                flush(batch)
+        if not dry_run:
+            for batch in targets.values():
+                if batch['orders']:
+                    flush(batch)
+            if next_id > first_id and len(targets) > 1:
+                # Ids gravados só nas partições também avançam a sequência principal
+                reserve_order_ids(db, next_id - 1)
+            # Partições primeiro, banco principal (dono da sequência) por último
+            for partition in sorted(targets, reverse=True):
+                targets[partition]['db'].commit()
+    except Exception:
+        if not dry_run:
+            for batch in targets.values():
+                batch['db'].rollback()
+        raise
+
+    return {
+        'imported': imported,
+        'graus': graus_count,
+        'errors': errors,
+        'dry_run': dry_run,
+        'seconds': round(time.perf_counter() - started, 2),
+    }
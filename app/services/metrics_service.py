@@ -0,0 +1,134 @@
+"""
+Metrics Service
+Agrega latência por rota e os comandos SQL registrados pela instrumentação
+(app/models/instrumentation.py) para o endpoint /debug/metrics
+"""
+import threading
+from collections import deque
+
+
+ROUTE_SAMPLES = 1000
+SLOW_STATEMENTS = 20
+# Limite de comandos distintos acompanhados (SQL montado dinamicamente
+# não pode fazer o dicionário crescer sem fim)
+MAX_TRACKED_STATEMENTS = 500
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+class MetricsRegistry:
+    """
+    Métricas em memória do processo.
+
+    Cada rota guarda só as últimas ROUTE_SAMPLES latências (deque com
+    maxlen), então o custo por requisição é constante; os percentis são
+    calculados apenas quando /debug/metrics é consultado.
+    """
+
+    def __init__(self, samples=ROUTE_SAMPLES, slow_statements=SLOW_STATEMENTS):
+        self.samples = samples
+        self.slow_statements = slow_statements
+        self._lock = threading.Lock()
+        self._backup_running = False
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+            self._statements = {}
+            # Latência de todas as rotas com e sem backup em andamento
+            self._backup_windows = {
+                'during_backup': deque(maxlen=self.samples),
+                'outside_backup': deque(maxlen=self.samples),
+            }
+
+    def set_backup_running(self, running):
+        """Marca o início/fim de um backup (ver backup_service)"""
+        self._backup_running = running
+
+    def record_request(self, route, status, duration_ms, queries):
+        """Registra uma requisição e os comandos SQL executados nela"""
+        query_ms = sum(q.duration_ms for q in queries)
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    'latencies': deque(maxlen=self.samples),
+                    'requests': 0,
+                    'errors': 0,
+                    'queries': 0,
+                    'query_ms': 0.0,
+                }
+            stats['latencies'].append(duration_ms)
+            window = 'during_backup' if self._backup_running else 'outside_backup'
+            self._backup_windows[window].append(duration_ms)
+            stats['requests'] += 1
+            stats['queries'] += len(queries)
+            stats['query_ms'] += query_ms
+            if status >= 500:
+                stats['errors'] += 1
+
+            for q in queries:
+                st = self._statements.get(q.sql)
+                if st is None:
+                    if len(self._statements) >= MAX_TRACKED_STATEMENTS:
+                        continue
+                    st = self._statements[q.sql] = {
+                        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'route': route
+                    }
+                st['count'] += 1
+                st['total_ms'] += q.duration_ms
+                st['rows'] += q.rows
+                if q.duration_ms > st['max_ms']:
+                    st['max_ms'] = q.duration_ms
+                    st['route'] = route
+
+    def snapshot(self):
+        """Percentis por rota e os comandos mais lentos"""
+        with self._lock:
+            routes = {name: dict(s, latencies=sorted(s['latencies'])) for name, s in self._routes.items()}
+            statements = [dict(s, sql=sql) for sql, s in self._statements.items()]
+            windows = {name: sorted(latencies) for name, latencies in self._backup_windows.items()}
+
+        result = {}
+        for name, s in sorted(routes.items()):
+            ordered = s['latencies']
+            result[name] = {
+                'requests': s['requests'],
+                'errors': s['errors'],
+                'p50_ms': round(_percentile(ordered, 50), 3),
+                'p95_ms': round(_percentile(ordered, 95), 3),
+                'p99_ms': round(_percentile(ordered, 99), 3),
+                'max_ms': round(ordered[-1], 3) if ordered else 0.0,
+                'queries_per_request': round(s['queries'] / s['requests'], 2),
+                'query_ms_per_request': round(s['query_ms'] / s['requests'], 3),
+            }
+
+        statements.sort(key=lambda s: s['max_ms'], reverse=True)
+        slowest = [{
+            'sql': s['sql'],
+            'route': s['route'],
+            'count': s['count'],
+            'max_ms': round(s['max_ms'], 3),
+            'avg_ms': round(s['total_ms'] / s['count'], 3),
+            'avg_rows': round(s['rows'] / s['count'], 1),
+        } for s in statements[:self.slow_statements]]
+
+        backup_latency = {name: {
+            'requests': len(ordered),
+            'p50_ms': round(_percentile(ordered, 50), 3),
+            'p95_ms': round(_percentile(ordered, 95), 3),
+            'p99_ms': round(_percentile(ordered, 99), 3),
+        } for name, ordered in windows.items()}
+
+        return {'routes': result, 'slowest_statements': slowest, 'backup_latency': backup_latency}
+
+
+metrics = MetricsRegistry()
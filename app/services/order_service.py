@@ -0,0 +1,153 @@
+"""
+Order Service
+Operações em lote sobre ordens de serviço (baixa de pagamento, laboratório
+pago, status e exclusão)
+"""
+import json
+from datetime import datetime
+from app.models import get_partition_db, locate_partitions
+from app.services.receivable_service import schedule_receivables
+from app.services.payable_service import settle_lab_payables
+
+BULK_MAX_ORDERS = 1000
+
+BULK_ACTIONS = {
+    'mark_paid': 'Marcar como pago',
+    'mark_pending': 'Marcar como pendente',
+    'lab_paid': 'Laboratório pago',
+    'delete': 'Excluir',
+}
+
+BULK_PAYMENT_CATEGORY = 'Pagamento OS'
+
+
+def _parse_ids(ids):
+    parsed = []
+    for value in ids or []:
+        try:
+            order_id = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Id de ordem inválido: {value}")
+        if order_id > 0 and order_id not in parsed:
+            parsed.append(order_id)
+    if not parsed:
+        raise ValueError("Nenhuma ordem selecionada")
+    if len(parsed) > BULK_MAX_ORDERS:
+        raise ValueError(f"No máximo {BULK_MAX_ORDERS} ordens por operação")
+    return parsed
+
+
+def _record_payments(db, ids_json, payment_method, payment_date):
+    """
+    Lança no caixa o saldo em aberto (valor_pago menos pagamentos parciais)
+    de cada ordem ainda não paga, como pagamento parcial ligado à entrada de
+    caixa, de modo que o saldo da ordem fique zerado.
+
+    Returns:
+        tuple: (entradas de caixa criadas, soma dos valores)
+    """
+    last_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM cash_flow").fetchone()[0]
+    db.execute("""
+        INSERT INTO cash_flow (date, type, category, description, amount, payment_method, order_id)
+        SELECT ?, 'entrada', ?, 'Pagamento - OS #' || os_number, remaining,
+               COALESCE(NULLIF(?, ''), payment_method), id
+        FROM (
+            SELECT o.id, o.os_number, o.payment_method,
+                   COALESCE(o.valor_pago, 0) - COALESCE(
+                       (SELECT SUM(p.amount) FROM partial_payments p WHERE p.order_id = o.id), 0
+                   ) AS remaining
+            FROM orders o
+            WHERE o.id IN (SELECT value FROM json_each(?))
+              AND o.deleted_at IS NULL
+              AND COALESCE(o.payment_status, '') != 'Pago'
+        )
+        WHERE remaining > 0
+    """, (payment_date, BULK_PAYMENT_CATEGORY, payment_method, ids_json))
+    db.execute("""
+        INSERT INTO partial_payments (order_id, amount, payment_date, payment_method, notes, cash_flow_id)
+        SELECT order_id, amount, date, payment_method, 'Baixa em lote', id
+        FROM cash_flow
+        WHERE id > ? AND category = ?
+    """, (last_id, BULK_PAYMENT_CATEGORY))
+    row = db.execute("""
+        SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM cash_flow WHERE id > ? AND category = ?
+    """, (last_id, BULK_PAYMENT_CATEGORY)).fetchone()
+    return row[0], row[1]
+
+
+def _apply_bulk(db, ids_json, action, payment_method, payment_date):
+    """Aplica action às ordens de ids_json em db, numa transação. Returns: (alteradas, entradas, soma)"""
+    cash_entries, cash_total = 0, 0
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        if action == 'mark_paid':
+            cash_entries, cash_total = _record_payments(db, ids_json, payment_method, payment_date)
+            cursor = db.execute("""
+                UPDATE orders SET payment_status = 'Pago',
+                                  payment_method = COALESCE(NULLIF(?, ''), payment_method)
+                WHERE id IN (SELECT value FROM json_each(?)) AND deleted_at IS NULL
+                  AND COALESCE(payment_status, '') != 'Pago'
+            """, (payment_method, ids_json))
+        elif action == 'mark_pending':
+            cursor = db.execute("""
+                UPDATE orders SET payment_status = 'Pendente'
+                WHERE id IN (SELECT value FROM json_each(?)) AND deleted_at IS NULL
+                  AND COALESCE(payment_status, '') != 'Pendente'
+            """, (ids_json,))
+        elif action == 'lab_paid':
+            cursor = db.execute("""
+                UPDATE orders SET lab_paid = 1
+                WHERE id IN (SELECT value FROM json_each(?)) AND deleted_at IS NULL
+                  AND COALESCE(lab_paid, 0) != 1
+            """, (ids_json,))
+        else:
+            cursor = db.execute("""
+                UPDATE orders SET deleted_at = ?
+                WHERE id IN (SELECT value FROM json_each(?)) AND deleted_at IS NULL
+            """, (datetime.now().isoformat(), ids_json))
+        updated = cursor.rowcount
+        if action in ('mark_paid', 'mark_pending'):
+            # Pagas à vista ficam sem parcelas em aberto; pendentes voltam a tê-las
+            schedule_receivables(db, json.loads(ids_json))
+        elif action == 'lab_paid':
+            # Conta do laboratório em aberto: baixa com a saída no caixa
+            settle_lab_payables(db, json.loads(ids_json), payment_date, payment_method)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return updated, cash_entries, cash_total
+
+
+def bulk_update_orders(ids, action, payment_method=None, payment_date=None):
+    """
+    Aplica action a todas as ordens de ids numa única transação, com um
+    UPDATE só (a lista de ids vai como JSON para json_each). Com partições
+    por loja, é uma transação por arquivo.
+
+    mark_paid também lança no caixa, em lote, o saldo em aberto das ordens
+    que ainda não estavam pagas; lab_paid dá baixa nas contas do
+    laboratório em aberto, com as saídas no caixa.
+
+    Returns:
+        dict: updated (ordens alteradas), cash_entries, cash_total
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Ação inválida: {action}")
+    order_ids = _parse_ids(ids)
+    payment_date = payment_date or datetime.now().strftime('%Y-%m-%d')
+
+    groups = {}
+    for order_id, partition in locate_partitions('orders', order_ids).items():
+        groups.setdefault(partition, []).append(order_id)
+
+    result = {'action': action, 'updated': 0, 'cash_entries': 0, 'cash_total': 0}
+    for partition, group in sorted(groups.items()):
+        updated, cash_entries, cash_total = _apply_bulk(
+            get_partition_db(partition), json.dumps(group), action, payment_method, payment_date
+        )
+        result['updated'] += updated
+        result['cash_entries'] += cash_entries
+        result['cash_total'] += cash_total
+    result['cash_total'] = round(result['cash_total'], 2)
+    return result
@@ -0,0 +1,295 @@
+"""
+Payable Service
+Contas a pagar (accounts_payable): conta do laboratório por ordem, contas
+avulsas, baixa em lote com lançamento das saídas no caixa e os próximos
+vencimentos
+"""
+import json
+from datetime import datetime, timedelta
+from app.config import LAB_PAYABLE_DAYS, PAYABLES_UPCOMING_DAYS
+from app.models import (
+    get_db, get_partition_db, get_partitions, current_partition, locate_partitions, FEDERATED
+)
+from app.models.partitions import partition_schema
+from app.utils import validate_date
+
+LAB_CATEGORY = 'Laboratório'
+
+# Categoria da saída de caixa de contas sem categoria
+PAYABLE_CATEGORY = 'Contas a pagar'
+
+BULK_MAX_PAYABLES = 1000
+
+# Contas listadas na página de contas a pagar
+OPEN_PAYABLES_LIMIT = 200
+
+
+def _schemas():
+    """[(partição, schema)] da conexão da requisição"""
+    partition = current_partition()
+    if partition == FEDERATED:
+        return [(0, 'main')] + [(number, partition_schema(number)) for number, _, _ in get_partitions()]
+    return [(partition, 'main')]
+
+
+def find_order_id(os_number):
+    """Id da ordem mais recente com o número de OS (em qualquer loja), ou None"""
+    db = get_partition_db(FEDERATED if get_partitions() else 0)
+    row = db.execute(
+        "SELECT id FROM orders WHERE os_number = ? AND deleted_at IS NULL ORDER BY id DESC LIMIT 1",
+        (os_number,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def create_lab_payables(entries, due_date=None):
+    """
+    Lança a conta do laboratório de cada ordem de entries [(order_id,
+    valor)], com um INSERT por arquivo: fornecedor é o laboratório da ordem.
+    Ordens excluídas, com laboratório já pago ou que já têm a conta ficam de
+    fora.
+
+    Returns:
+        int: contas criadas
+    """
+    due_date = due_date or (datetime.now() + timedelta(days=LAB_PAYABLE_DAYS)).strftime('%Y-%m-%d')
+    amounts = {}
+    for order_id, amount in entries:
+        if float(amount) <= 0:
+            raise ValueError(f"Valor inválido para a ordem {order_id}")
+        amounts[int(order_id)] = round(float(amount), 2)
+    if not amounts:
+        raise ValueError("Nenhuma ordem informada")
+    if len(amounts) > BULK_MAX_PAYABLES:
+        raise ValueError(f"No máximo {BULK_MAX_PAYABLES} contas por operação")
+
+    groups = {}
+    for order_id, partition in locate_partitions('orders', list(amounts)).items():
+        groups.setdefault(partition, []).append([order_id, amounts[order_id]])
+
+    created = 0
+    for partition, group in sorted(groups.items()):
+        db = get_partition_db(partition)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            created += db.execute("""
+                INSERT INTO accounts_payable (description, supplier, amount, due_date, status, category, order_id)
+                SELECT 'Laboratório - OS #' || o.os_number, NULLIF(o.lab, ''),
+                       json_extract(j.value, '$[1]'), ?, 'Pendente', ?, o.id
+                FROM json_each(?) j
+                JOIN orders o ON o.id = json_extract(j.value, '$[0]')
+                WHERE o.deleted_at IS NULL
+                  AND COALESCE(o.lab_paid, 0) != 1
+                  AND NOT EXISTS (
+                      SELECT 1 FROM accounts_payable p
+                      WHERE p.order_id = o.id AND p.category = ? AND p.status != 'Cancelada'
+                  )
+            """, (due_date, LAB_CATEGORY, json.dumps(group), LAB_CATEGORY)).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return created
+
+
+def sync_lab_payables(db, order_ids):
+    """
+    Conta do laboratório das ordens de order_ids a partir de
+    orders.lab_cost, chamada ao criar e editar ordens: a conta em aberto
+    acompanha o custo e o laboratório da ordem, e ordens com custo, sem
+    laboratório pago e ainda sem a conta ganham uma, com vencimento em
+    LAB_PAYABLE_DAYS dias. Ordens sem custo ficam como estão. Roda na
+    transação de db.
+
+    Returns:
+        int: contas criadas
+    """
+    ids_json = json.dumps([int(order_id) for order_id in order_ids])
+    db.execute("""
+        UPDATE accounts_payable
+        SET amount = (SELECT ROUND(o.lab_cost, 2) FROM orders o WHERE o.id = accounts_payable.order_id),
+            supplier = (SELECT NULLIF(o.lab, '') FROM orders o WHERE o.id = accounts_payable.order_id),
+            description = (SELECT 'Laboratório - OS #' || o.os_number FROM orders o
+                           WHERE o.id = accounts_payable.order_id)
+        WHERE order_id IN (
+            SELECT id FROM orders WHERE id IN (SELECT value FROM json_each(?)) AND lab_cost > 0
+        ) AND category = ? AND status = 'Pendente'
+    """, (ids_json, LAB_CATEGORY))
+    return db.execute("""
+        INSERT INTO accounts_payable (description, supplier, amount, due_date, status, category, order_id)
+        SELECT 'Laboratório - OS #' || o.os_number, NULLIF(o.lab, ''), ROUND(o.lab_cost, 2),
+               date('now', 'localtime', ?), 'Pendente', ?, o.id
+        FROM orders o
+        WHERE o.id IN (SELECT value FROM json_each(?))
+          AND o.lab_cost > 0
+          AND o.deleted_at IS NULL
+          AND COALESCE(o.lab_paid, 0) != 1
+          AND NOT EXISTS (
+              SELECT 1 FROM accounts_payable p
+              WHERE p.order_id = o.id AND p.category = ? AND p.status != 'Cancelada'
+          )
+    """, (f'+{LAB_PAYABLE_DAYS} days', LAB_CATEGORY, ids_json, LAB_CATEGORY)).rowcount
+
+
+def add_payable(data):
+    """Lança uma conta avulsa (sem ordem) no banco principal. Returns: id"""
+    db = get_partition_db(0)
+    cursor = db.execute("""
+        INSERT INTO accounts_payable (description, supplier, amount, due_date, status, category, notes)
+        VALUES (?, ?, ?, ?, 'Pendente', ?, ?)
+    """, (
+        data['description'],
+        data.get('supplier') or None,
+        data['amount'],
+        data['due_date'],
+        data.get('category') or None,
+        data.get('notes') or None,
+    ))
+    db.commit()
+    return cursor.lastrowid
+
+
+def _parse_keys(keys):
+    """'partição:id' -> {partição: [ids]}"""
+    groups = {}
+    count = 0
+    for key in keys or []:
+        try:
+            partition, payable_id = (int(part) for part in str(key).split(':'))
+        except ValueError:
+            raise ValueError(f"Conta inválida: {key}")
+        if partition != 0 and partition not in [number for number, _, _ in get_partitions()]:
+            raise ValueError(f"Conta inválida: {key}")
+        ids = groups.setdefault(partition, [])
+        if payable_id not in ids:
+            ids.append(payable_id)
+            count += 1
+    if not count:
+        raise ValueError("Nenhuma conta selecionada")
+    if count > BULK_MAX_PAYABLES:
+        raise ValueError(f"No máximo {BULK_MAX_PAYABLES} contas por operação")
+    return groups
+
+
+def _settle(db, ids_json, payment_date, payment_method):
+    """
+    Baixa das contas em aberto de ids_json (lista JSON de ids) na transação
+    de db: cada uma vira uma saída de caixa.
+
+    Returns:
+        tuple: (contas pagas, total)
+    """
+    total = db.execute("""
+        SELECT COALESCE(SUM(amount), 0) FROM accounts_payable
+        WHERE id IN (SELECT value FROM json_each(?)) AND status = 'Pendente'
+    """, (ids_json,)).fetchone()[0]
+    db.execute("""
+        INSERT INTO cash_flow (date, type, category, description, amount, payment_method, order_id)
+        SELECT ?, 'saida', COALESCE(NULLIF(category, ''), ?),
+               description || COALESCE(' - ' || NULLIF(supplier, ''), ''), amount, NULLIF(?, ''), order_id
+        FROM accounts_payable
+        WHERE id IN (SELECT value FROM json_each(?)) AND status = 'Pendente'
+        ORDER BY due_date, id
+    """, (payment_date, PAYABLE_CATEGORY, payment_method, ids_json))
+    settled = db.execute("""
+        UPDATE accounts_payable SET status = 'Pago', payment_date = ?
+        WHERE id IN (SELECT value FROM json_each(?)) AND status = 'Pendente'
+    """, (payment_date, ids_json)).rowcount
+    return settled, total
+
+
+def settle_lab_payables(db, order_ids, payment_date=None, payment_method=None):
+    """
+    Baixa na conta do laboratório em aberto das ordens de order_ids já
+    marcadas com laboratório pago (edição da ordem, ação em lote), com a
+    saída no caixa. Roda na transação de db.
+
+    Returns:
+        int: contas pagas
+    """
+    ids = [row[0] for row in db.execute("""
+        SELECT p.id FROM accounts_payable p
+        JOIN orders o ON o.id = p.order_id
+        WHERE p.order_id IN (SELECT value FROM json_each(?))
+          AND p.category = ? AND p.status = 'Pendente' AND o.lab_paid = 1
+    """, (json.dumps([int(order_id) for order_id in order_ids]), LAB_CATEGORY))]
+    if not ids:
+        return 0
+    payment_date = payment_date or datetime.now().strftime('%Y-%m-%d')
+    return _settle(db, json.dumps(ids), payment_date, payment_method)[0]
+
+
+def settle_payables(keys, payment_date=None, payment_method=None):
+    """
+    Dá baixa nas contas em aberto de keys ('partição:id', como na listagem):
+    cada uma vira uma saída de caixa, contas de laboratório marcam a ordem
+    com laboratório pago, tudo numa transação por arquivo.
+
+    Returns:
+        dict: settled (contas pagas), total
+    """
+    if payment_date:
+        valid, error = validate_date(payment_date)
+        if not valid:
+            raise ValueError(f"Data inválida: {error}")
+    payment_date = payment_date or datetime.now().strftime('%Y-%m-%d')
+    result = {'settled': 0, 'total': 0}
+    for partition, ids in sorted(_parse_keys(keys).items()):
+        ids_json = json.dumps(ids)
+        db = get_partition_db(partition)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            settled, total = _settle(db, ids_json, payment_date, payment_method)
+            db.execute("""
+                UPDATE orders SET lab_paid = 1
+                WHERE id IN (
+                    SELECT order_id FROM accounts_payable
+                    WHERE id IN (SELECT value FROM json_each(?)) AND status = 'Pago' AND category = ?
+                ) AND COALESCE(lab_paid, 0) != 1
+            """, (ids_json, LAB_CATEGORY))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        result['settled'] += settled
+        result['total'] += total
+    return result
+
+
+def get_open_payables(days=None, limit=OPEN_PAYABLES_LIMIT, today=None):
+    """
+    Contas em aberto por vencimento, pelo índice (status, due_date): todas,
+    ou só as vencidas e as que vencem nos próximos days dias. Cada conta tem
+    key ('partição:id') para a baixa em lote.
+    """
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    until = None
+    if days is not None:
+        until = (datetime.strptime(today, '%Y-%m-%d') + timedelta(days=int(days) + 1)).strftime('%Y-%m-%d')
+    where = " AND p.due_date < :until" if until else ''
+    union = ' UNION ALL '.join(f"""
+        SELECT '{number}:' || p.id AS key, p.id, p.description, p.supplier, p.amount, p.due_date,
+               p.category, p.order_id, o.os_number
+        FROM {schema}.accounts_payable p
+        LEFT JOIN {schema}.orders o ON o.id = p.order_id
+        WHERE p.status = 'Pendente'{where}
+    """ for number, schema in _schemas())
+    # Totais de todas as contas do filtro, mesmo além de limit (janela antes do LIMIT)
+    rows = get_db().execute(
+        f"""SELECT *, COUNT(*) OVER () AS open_count, ROUND(SUM(amount) OVER (), 2) AS open_total
+            FROM ({union}) ORDER BY due_date, key LIMIT :limit""",
+        {'until': until, 'limit': limit}
+    ).fetchall()
+    return [dict(row, overdue=row['due_date'] < today) for row in rows]
+
+
+def get_upcoming_payables(days=PAYABLES_UPCOMING_DAYS):
+    """Resumo para a página do caixa: contas vencidas ou a vencer em days dias e o total"""
+    payables = get_open_payables(days)
+    return {
+        'days': days,
+        'payables': payables,
+        'count': payables[0]['open_count'] if payables else 0,
+        'total': payables[0]['open_total'] if payables else 0,
+        'overdue': sum(1 for p in payables if p['overdue']),
+    }
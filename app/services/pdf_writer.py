@@ -0,0 +1,117 @@
+"""
+Streaming PDF Writer
+Minimal PDF 1.4 writer that emits each page as soon as it is finished.
+
+Only what the reports need is supported: the standard Helvetica fonts
+(WinAnsi encoding), text, filled rectangles and lines. Pages are written
+to the output immediately, so memory stays flat regardless of page count;
+only the byte offsets of the objects are kept for the final xref table.
+"""
+import zlib
+
+# Objetos fixos: 1 = Catalog, 2 = Pages (gravado no final), 3 e 4 = fontes
+_CATALOG, _PAGES, _FONT_REGULAR, _FONT_BOLD = 1, 2, 3, 4
+_FIRST_FREE_OBJECT = 5
+
+FONTS = {'Helvetica': 'F1', 'Helvetica-Bold': 'F2'}
+
+
+def _escape(text):
+    """Encode text for a PDF string literal (WinAnsi / cp1252)"""
+    data = str(text).encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _num(value):
+    return f"{value:.2f}"
+
+
+class Page:
+    """Drawing operations for a single page (coordinates in points, origin at bottom-left)"""
+
+    def __init__(self):
+        self._ops = []
+
+    def fill_rect(self, x, y, width, height, rgb):
+        r, g, b = rgb
+        self._ops.append(f"q {_num(r)} {_num(g)} {_num(b)} rg {_num(x)} {_num(y)} {_num(width)} {_num(height)} re f Q".encode())
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self._ops.append(f"{_num(width)} w {_num(x1)} {_num(y1)} m {_num(x2)} {_num(y2)} l S".encode())
+
+    def text(self, x, y, text, font='Helvetica', size=9, rgb=(0, 0, 0)):
+        r, g, b = rgb
+        self._ops.append(
+            f"BT {_num(r)} {_num(g)} {_num(b)} rg /{FONTS[font]} {_num(size)} Tf {_num(x)} {_num(y)} Td (".encode()
+            + _escape(text) + b") Tj ET"
+        )
+
+    def content(self):
+        return zlib.compress(b"\n".join(self._ops))
+
+
+class StreamingPDF:
+    """
+    Writes a PDF incrementally.
+
+    Usage:
+        pdf = StreamingPDF(width, height)
+        yield pdf.start()
+        yield pdf.add_page(page)   # for each Page
+        yield pdf.finish()
+    Every call returns the bytes to send; nothing is buffered between calls.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._offset = 0
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = _FIRST_FREE_OBJECT
+
+    def _object(self, obj_id, body):
+        self._offsets[obj_id] = self._offset
+        data = f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n"
+        self._offset += len(data)
+        return data
+
+    def _emit(self, data):
+        self._offset += len(data)
+        return data
+
+    def start(self):
+        out = self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        out += self._object(_CATALOG, f"<< /Type /Catalog /Pages {_PAGES} 0 R >>".encode())
+        out += self._object(_FONT_REGULAR, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        out += self._object(_FONT_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+        return out
+
+    def add_page(self, page):
+        content_id, page_id = self._next_id, self._next_id + 1
+        self._next_id += 2
+        self._page_ids.append(page_id)
+
+        stream = page.content()
+        out = self._object(
+            content_id,
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+        out += self._object(page_id, (
+            f"<< /Type /Page /Parent {_PAGES} 0 R /MediaBox [0 0 {_num(self.width)} {_num(self.height)}] "
+            f"/Resources << /Font << /F1 {_FONT_REGULAR} 0 R /F2 {_FONT_BOLD} 0 R >> >> "
+            f"/Contents {content_id} 0 R >>"
+        ).encode())
+        return out
+
+    def finish(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        out = self._object(_PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>".encode())
+
+        xref_offset = self._offset
+        size = self._next_id
+        xref = [f"xref\n0 {size}\n".encode(), b"0000000000 65535 f \n"]
+        for obj_id in range(1, size):
+            xref.append(f"{self._offsets[obj_id]:010d} 00000 n \n".encode())
+        xref.append(f"trailer\n<< /Size {size} /Root {_CATALOG} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        return out + self._emit(b"".join(xref))
@@ -2,9 +2,79 @@
 Permission Management Service
 Handles roles and permissions
 """
+import threading
 from app.models import get_db
 
 
+class PermissionMatrix:
+    """
+    Permissões compiladas: cada (resource, action) tem um bit e cada role
+    um inteiro com os bits que possui. Verificar é uma consulta a dicionário
+    e um shift, sem acesso ao banco.
+    """
+
+    def __init__(self, bits, masks):
+        self.bits = bits      # {(resource, action): bit}
+        self.masks = masks    # {nome ou id da role: bitset}
+
+    def allows(self, role, resource, action):
+        bit = self.bits.get((resource, action))
+        return bit is not None and bool(self.masks.get(role, 0) >> bit & 1)
+
+    def permissions(self, role):
+        mask = self.masks.get(role, 0)
+        return sorted(key for key, bit in self.bits.items() if mask >> bit & 1)
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def compile_permissions(db):
+    """
+    Monta a PermissionMatrix a partir de roles, permissions e role_permissions.
+    Roles do sistema (admin) têm todas as permissões.
+    """
+    permissions = db.execute('SELECT id, resource, action FROM permissions ORDER BY id').fetchall()
+    bits = {(p['resource'], p['action']): bit for bit, p in enumerate(permissions)}
+    bit_by_id = {p['id']: bit for bit, p in enumerate(permissions)}
+    all_bits = (1 << len(bits)) - 1
+
+    masks = {}
+    roles = db.execute('SELECT id, name, is_system FROM roles').fetchall()
+    by_id = {role['id']: (all_bits if role['is_system'] else 0) for role in roles}
+    for row in db.execute('SELECT role_id, permission_id FROM role_permissions'):
+        if row['role_id'] in by_id and row['permission_id'] in bit_by_id:
+            by_id[row['role_id']] |= 1 << bit_by_id[row['permission_id']]
+    for role in roles:
+        masks[role['id']] = masks[role['name']] = by_id[role['id']]
+    return PermissionMatrix(bits, masks)
+
+
+def get_permission_matrix():
+    """Matriz compilada, carregada do banco na primeira chamada"""
+    global _matrix
+    matrix = _matrix
+    if matrix is None:
+        with _matrix_lock:
+            if _matrix is None:
+                _matrix = compile_permissions(get_db())
+            matrix = _matrix
+    return matrix
+
+
+def invalidate_permissions():
+    """Descarta a matriz compilada; a próxima verificação recarrega do banco"""
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
+
+
+def has_permission(role, resource, action):
+    """Verifica se role (nome ou id) tem a permissão resource/action"""
+    return get_permission_matrix().allows(role, resource, action)
+
+
 def get_all_roles():
     """Get all roles"""
     db = get_db()
@@ -46,13 +116,13 @@ def update_role_permissions(role_id, permission_ids):
     db.execute('DELETE FROM role_permissions WHERE role_id = ?', (role_id,))
     
     # Add new permissions
-    for perm_id in permission_ids:
-        db.execute('''
-            INSERT INTO role_permissions (role_id, permission_id)
-            VALUES (?, ?)
-        ''', (role_id, perm_id))
+    db.executemany('''
+        INSERT INTO role_permissions (role_id, permission_id)
+        VALUES (?, ?)
+    ''', [(role_id, perm_id) for perm_id in permission_ids])
     
     db.commit()
+    invalidate_permissions()
 
 
 def get_permissions_by_resource():
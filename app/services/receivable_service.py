@@ -0,0 +1,247 @@
+"""
+Receivable Service
+Parcelas a receber (accounts_receivable): cronograma gerado em lote a
+partir de orders.installments, recebimento, envelhecimento (aging) e
+projeção mensal de entradas
+"""
+import json
+from datetime import datetime, timedelta
+from app.models import get_db, get_db_schemas
+
+# Limite de parcelas por ordem (o cronograma é gerado por uma CTE recursiva)
+MAX_INSTALLMENTS = 60
+
+RECEIVABLE_CATEGORY = 'Parcela'
+
+# Faixas do envelhecimento por dias de atraso: (chave, rótulo)
+AGING_BUCKETS = (
+    ('current', 'A vencer'),
+    ('30', '1 a 30 dias'),
+    ('60', '31 a 60 dias'),
+    ('90', '61 a 90 dias'),
+    ('90+', 'Mais de 90 dias'),
+)
+
+# Lista de parcelas da página de contas a receber
+UPCOMING_LIMIT = 50
+
+
+def schedule_receivables(db, order_ids):
+    """
+    Gera de novo, com dois comandos para todas as ordens de order_ids, as
+    parcelas em aberto: o valor da ordem menos a entrada e os pagamentos
+    parciais (que incluem as parcelas já recebidas e a baixa de
+    mark_paid), dividido pelas parcelas restantes, com vencimentos mensais
+    a partir da data do exame. Ordens sem parcelas, excluídas, com o saldo
+    quitado ou pagas fora do cartão de crédito ficam sem parcelas em
+    aberto. Roda na transação de db.
+
+    Returns:
+        int: parcelas criadas
+    """
+    ids_json = json.dumps([int(order_id) for order_id in order_ids])
+    db.execute("""
+        DELETE FROM accounts_receivable
+        WHERE order_id IN (SELECT value FROM json_each(?)) AND status IN ('Pendente', 'Cancelada')
+    """, (ids_json,))
+    return db.execute(f"""
+        WITH RECURSIVE
+        received AS (
+            SELECT order_id, COUNT(*) AS paid_count, MAX(installment_number) AS last_number
+            FROM accounts_receivable
+            WHERE order_id IN (SELECT value FROM json_each(:ids)) AND status = 'Pago'
+            GROUP BY order_id
+        ),
+        payments AS (
+            SELECT order_id, SUM(amount) AS paid_amount
+            FROM partial_payments
+            WHERE order_id IN (SELECT value FROM json_each(:ids))
+            GROUP BY order_id
+        ),
+        plan AS (
+            SELECT o.id AS order_id, o.payment_method,
+                   MIN(o.installments, {MAX_INSTALLMENTS}) AS total,
+                   MIN(o.installments, {MAX_INSTALLMENTS}) - COALESCE(r.paid_count, 0) AS open_count,
+                   COALESCE(r.last_number, 0) AS last_number,
+                   ROUND(COALESCE(o.valor_pago, 0) - COALESCE(o.entrada, 0) - COALESCE(pp.paid_amount, 0), 2) AS remaining,
+                   CASE WHEN o.exam_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+                        THEN substr(o.exam_date, 1, 10) ELSE date('now', 'localtime') END AS base_date
+            FROM orders o
+            LEFT JOIN received r ON r.order_id = o.id
+            LEFT JOIN payments pp ON pp.order_id = o.id
+            WHERE o.id IN (SELECT value FROM json_each(:ids))
+              AND o.deleted_at IS NULL
+              AND o.installments >= 1
+              AND (COALESCE(o.payment_status, '') != 'Pago' OR o.payment_method LIKE 'Cartão de Crédito%')
+        ),
+        seq(k) AS (
+            SELECT 1 UNION ALL SELECT k + 1 FROM seq WHERE k < {MAX_INSTALLMENTS}
+        )
+        INSERT INTO accounts_receivable
+            (order_id, installment_number, total_installments, amount, due_date, status, payment_method)
+        SELECT p.order_id, p.last_number + seq.k, MAX(p.total, p.last_number + p.open_count),
+               CASE WHEN seq.k < p.open_count THEN ROUND(p.remaining / p.open_count, 2)
+                    ELSE ROUND(p.remaining - ROUND(p.remaining / p.open_count, 2) * (p.open_count - 1), 2) END,
+               date(p.base_date, '+' || (p.last_number + seq.k) || ' months'),
+               'Pendente', p.payment_method
+        FROM plan p
+        JOIN seq ON seq.k <= p.open_count
+        WHERE p.open_count > 0 AND p.remaining > 0
+    """, {'ids': ids_json}).rowcount
+
+
+def rebuild_receivables(db, batch_size=5000):
+    """Gera o cronograma de todas as ordens de db, em lotes de ids. Returns: parcelas em aberto"""
+    last_id = 0
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        while True:
+            ids = [row[0] for row in db.execute(
+                "SELECT id FROM orders WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+            )]
+            if not ids:
+                break
+            schedule_receivables(db, ids)
+            last_id = ids[-1]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db.execute(
+        "SELECT COUNT(*) FROM accounts_receivable WHERE status = 'Pendente'"
+    ).fetchone()[0]
+
+
+def get_order_receivables(order_id):
+    """Parcelas da ordem, pela ordem do cronograma"""
+    return get_db().execute(
+        "SELECT * FROM accounts_receivable WHERE order_id = ? ORDER BY installment_number",
+        (order_id,)
+    ).fetchall()
+
+
+def receive_installments(db, order_id, ids, payment_date=None, payment_method=None):
+    """
+    Dá baixa nas parcelas em aberto ids da ordem: cada uma vira uma entrada
+    de caixa e um pagamento parcial ligado a ela, numa transação.
+
+    Returns:
+        tuple: (parcelas recebidas, soma dos valores)
+    """
+    ids_json = json.dumps([int(i) for i in ids])
+    payment_date = payment_date or datetime.now().strftime('%Y-%m-%d')
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        last_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM cash_flow").fetchone()[0]
+        db.execute("""
+            INSERT INTO cash_flow (date, type, category, description, amount, payment_method, order_id)
+            SELECT ?, 'entrada', ?,
+                   'Parcela ' || r.installment_number || '/' || r.total_installments || ' - OS #' || o.os_number,
+                   r.amount, COALESCE(NULLIF(?, ''), r.payment_method), r.order_id
+            FROM accounts_receivable r
+            JOIN orders o ON o.id = r.order_id
+            WHERE r.id IN (SELECT value FROM json_each(?)) AND r.order_id = ? AND r.status = 'Pendente'
+            ORDER BY r.installment_number
+        """, (payment_date, RECEIVABLE_CATEGORY, payment_method, ids_json, order_id))
+        db.execute("""
+            INSERT INTO partial_payments (order_id, amount, payment_date, payment_method, notes, cash_flow_id)
+            SELECT order_id, amount, date, payment_method, description, id
+            FROM cash_flow
+            WHERE id > ? AND category = ?
+        """, (last_id, RECEIVABLE_CATEGORY))
+        db.execute("""
+            UPDATE accounts_receivable
+            SET status = 'Pago', payment_date = ?, payment_method = COALESCE(NULLIF(?, ''), payment_method)
+            WHERE id IN (SELECT value FROM json_each(?)) AND order_id = ? AND status = 'Pendente'
+        """, (payment_date, payment_method, ids_json, order_id))
+        row = db.execute("""
+            SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM cash_flow WHERE id > ? AND category = ?
+        """, (last_id, RECEIVABLE_CATEGORY)).fetchone()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return row[0], row[1]
+
+
+def _open_installments(columns, where=''):
+    """Parcelas em aberto de todos os schemas da requisição (UNION ALL)"""
+    return ' UNION ALL '.join(
+        f"SELECT {columns} FROM {schema}.accounts_receivable WHERE status = 'Pendente'{where}"
+        for schema in get_db_schemas()
+    )
+
+
+def get_aging(today=None):
+    """
+    Envelhecimento das parcelas em aberto por faixa de atraso. Cada faixa é
+    um intervalo de vencimentos, lido do índice (status, due_date) sem
+    ordenação; a fração de cada faixa no total vem de uma função de janela.
+
+    Returns:
+        list: dicts com key, label, installments, orders, amount, share
+    """
+    today_date = datetime.strptime(today, '%Y-%m-%d') if today else datetime.now()
+    bounds = [today_date.strftime('%Y-%m-%d')] + [
+        (today_date - timedelta(days=days)).strftime('%Y-%m-%d') for days in (30, 60, 90)
+    ]
+    ranges = []
+    params = []
+    for position, (key, _label) in enumerate(AGING_BUCKETS):
+        where = ''
+        if position < len(bounds):
+            where += ' AND due_date >= ?'
+        if position > 0:
+            where += ' AND due_date < ?'
+        ranges.append(f"""
+            SELECT '{key}' AS bucket, COUNT(*) AS installments, COUNT(DISTINCT order_id) AS orders,
+                   COALESCE(SUM(amount), 0) AS amount
+            FROM ({_open_installments('order_id, amount, due_date', where)})
+        """)
+        range_params = ([bounds[position]] if position < len(bounds) else []) + \
+                       ([bounds[position - 1]] if position > 0 else [])
+        params += range_params * len(get_db_schemas())
+    rows = get_db().execute(f"""
+        SELECT bucket, installments, orders, ROUND(amount, 2) AS amount,
+               COALESCE(amount / NULLIF(SUM(amount) OVER (), 0), 0) AS share
+        FROM ({' UNION ALL '.join(ranges)})
+    """, params).fetchall()
+    by_bucket = {row['bucket']: row for row in rows}
+    return [dict(by_bucket[key], key=key, label=label) for key, label in AGING_BUCKETS]
+
+
+def get_projection(months=12, today=None):
+    """
+    Entradas previstas por mês de vencimento nos próximos months meses
+    (parcelas vencidas ficam no envelhecimento), com o acumulado
+
+    Returns:
+        list: dicts com month, installments, amount, cumulative
+    """
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    rows = get_db().execute(f"""
+        SELECT substr(due_date, 1, 7) AS month, COUNT(*) AS installments,
+               ROUND(SUM(amount), 2) AS amount,
+               ROUND(SUM(SUM(amount)) OVER (ORDER BY substr(due_date, 1, 7)), 2) AS cumulative
+        FROM ({_open_installments('amount, due_date',
+                                  " AND due_date >= :today AND due_date < date(:today, 'start of month', :months)")})
+        GROUP BY month
+        ORDER BY month
+    """, {'today': today, 'months': f'+{int(months)} months'}).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_due_installments(days=30, today=None, limit=UPCOMING_LIMIT):
+    """Parcelas em aberto vencidas ou com vencimento nos próximos days dias, com a ordem"""
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    union = ' UNION ALL '.join(f"""
+        SELECT r.id, r.order_id, r.installment_number, r.total_installments, r.amount, r.due_date,
+               r.payment_method, o.os_number, o.client_name, o.store
+        FROM {schema}.accounts_receivable r
+        JOIN {schema}.orders o ON o.id = r.order_id
+        WHERE r.status = 'Pendente' AND r.due_date < date(:today, :days)
+    """ for schema in get_db_schemas())
+    return get_db().execute(
+        f"SELECT * FROM ({union}) ORDER BY due_date, id LIMIT :limit",
+        {'today': today, 'days': f'+{int(days) + 1} days', 'limit': limit}
+    ).fetchall()
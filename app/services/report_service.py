@@ -1,104 +1,208 @@
 import io
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from functools import lru_cache
+from app.services.pdf_writer import StreamingPDF, Page
 from datetime import datetime
 
-def generate_excel_report(orders):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Relatório de Vendas"
+EXCEL_HEADERS = ['OS', 'Cliente', 'Telefone', 'Loja', 'Laboratório', 'Data Exame', 'Status', 'Valor Total']
+
+# Linhas lidas antes de gravar a planilha, usadas para calcular a largura das
+# colunas (o modo write-only grava as larguras antes da primeira linha)
+EXCEL_WIDTH_SAMPLE_ROWS = 500
+EXCEL_MAX_COLUMN_WIDTH = 60
+
+
+def _excel_row(order):
+    total = (order['valor_pago'] or 0) + (order['entrada'] or 0) + (order['valor_retirada'] or 0)
+    return [
+        order['os_number'],
+        order['client_name'],
+        order['phone'],
+        order['store'],
+        order['lab'],
+        order['exam_date'],
+        order['payment_status'],
+        total
+    ]
+
+
+def write_excel_report(orders, output):
+    """
+    Grava o relatório de vendas em formato xlsx no arquivo output.
     
-    # Headers
-    headers = ['OS', 'Cliente', 'Telefone', 'Loja', 'Laboratório', 'Data Exame', 'Status', 'Valor Total']
-    ws.append(headers)
+    orders pode ser um cursor: as linhas são consumidas uma a uma e gravadas
+    em modo write-only, então a memória não cresce com o tamanho do relatório.
+    A largura das colunas é calculada durante a mesma leitura, a partir do
+    cabeçalho e das primeiras EXCEL_WIDTH_SAMPLE_ROWS linhas.
+    """
+    # openpyxl só é carregado na primeira exportação (tira ~100 ms da inicialização)
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    from openpyxl.styles import Font, Alignment, PatternFill
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Relatório de Vendas")
+    
+    rows = iter(orders)
+    widths = [len(h) for h in EXCEL_HEADERS]
+    sample = []
+    for order in rows:
+        row = _excel_row(order)
+        sample.append(row)
+        for i, value in enumerate(row):
+            if value is not None:
+                widths[i] = max(widths[i], len(str(value)))
+        if len(sample) >= EXCEL_WIDTH_SAMPLE_ROWS:
+            break
     
-    # Style Headers
+    for i, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = min(width + 2, EXCEL_MAX_COLUMN_WIDTH)
+    
+    # Headers
     header_font = Font(bold=True, color="FFFFFF")
     header_fill = PatternFill(start_color="4361ee", end_color="4361ee", fill_type="solid")
-    
-    for cell in ws[1]:
+    header_cells = []
+    for header in EXCEL_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
         cell.font = header_font
         cell.fill = header_fill
         cell.alignment = Alignment(horizontal='center')
-        
+        header_cells.append(cell)
+    ws.append(header_cells)
+    
     # Data
-    for order in orders:
-        total = (order['valor_pago'] or 0) + (order['entrada'] or 0) + (order['valor_retirada'] or 0)
-        ws.append([
-            order['os_number'],
-            order['client_name'],
-            order['phone'],
-            order['store'],
-            order['lab'],
-            order['exam_date'],
-            order['payment_status'],
-            total
-        ])
-        
-    # Auto-adjust columns
-    for column in ws.columns:
-        max_length = 0
-        column = [cell for cell in column]
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column[0].column_letter].width = adjusted_width
-        
-    output = io.BytesIO()
+    for row in sample:
+        ws.append(row)
+    for order in rows:
+        ws.append(_excel_row(order))
+    
     wb.save(output)
+
+
+def generate_excel_report(orders):
+    output = io.BytesIO()
+    write_excel_report(orders, output)
     output.seek(0)
     return output
 
-def generate_pdf_report(orders, title="Relatório de Vendas"):
-    output = io.BytesIO()
-    doc = SimpleDocTemplate(output, pagesize=A4)
-    elements = []
+PDF_COLUMNS = [('OS', 60), ('Cliente', 180), ('Loja', 80), ('Status', 80), ('Valor', 80)]
+PDF_MARGIN = 40
+PDF_ROW_HEIGHT = 16
+# A4 em pontos (reportlab.lib.pagesizes.A4), sem importar o reportlab na inicialização
+PDF_PAGE_SIZE = (595.2755905511812, 841.8897637795277)
+PDF_FONT_SIZE = 9
+PDF_HEADER_COLOR = (0x43 / 255, 0x61 / 255, 0xee / 255)
+PDF_ROW_COLOR = (0.96, 0.96, 0.86)
+PDF_WHITE = (1, 1, 1)
+
+
+@lru_cache(maxsize=4096)
+def _fit(text, width, font='Helvetica', size=PDF_FONT_SIZE):
+    """Truncate text so it fits in width points. Returns (text, text width)"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    text_width = stringWidth(text, font, size)
+    if text_width <= width:
+        return text, text_width
+    while text and stringWidth(text + '...', font, size) > width:
+        text = text[:-1]
+    return text + '...', stringWidth(text + '...', font, size)
+
+
+def _draw_row(page, y, values, font='Helvetica', rgb=(0, 0, 0), fill=None):
+    """Draw one table row whose top edge is at y, cells centered"""
+    table_width = sum(w for _, w in PDF_COLUMNS)
+    x = (PDF_PAGE_SIZE[0] - table_width) / 2
+    if fill:
+        page.fill_rect(x, y - PDF_ROW_HEIGHT, table_width, PDF_ROW_HEIGHT, fill)
+    page.line(x, y - PDF_ROW_HEIGHT, x + table_width, y - PDF_ROW_HEIGHT)
+    for value, (_, width) in zip(values, PDF_COLUMNS):
+        text, text_width = _fit(str(value), width - 6, font)
+        page.text(x + (width - text_width) / 2, y - PDF_ROW_HEIGHT + 5, text, font, PDF_FONT_SIZE, rgb)
+        x += width
+
+
+def _draw_column_lines(page, top, bottom):
+    """Draw the vertical grid lines of the table once for the whole page"""
+    x = (PDF_PAGE_SIZE[0] - sum(w for _, w in PDF_COLUMNS)) / 2
+    page.line(x, top, x, bottom)
+    for _, width in PDF_COLUMNS:
+        x += width
+        page.line(x, top, x, bottom)
+
+
+def stream_pdf_report(orders, title="Relatório de Vendas"):
+    """
+    Gera o relatório de vendas em PDF, página por página.
+    
+    É um gerador de bytes: cada página é desenhada direto no nível do PDF e
+    enviada assim que fica pronta, com o cabeçalho da tabela repetido e o
+    subtotal da página no rodapé. orders pode ser um cursor.
+    """
+    width, height = PDF_PAGE_SIZE
+    pdf = StreamingPDF(width, height)
+    yield pdf.start()
     
-    styles = getSampleStyleSheet()
-    elements.append(Paragraph(title, styles['Title']))
-    elements.append(Paragraph(f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
-    elements.append(Spacer(1, 20))
+    table_width = sum(w for _, w in PDF_COLUMNS)
+    left = (width - table_width) / 2
+    headers = [name for name, _ in PDF_COLUMNS]
+    bottom = PDF_MARGIN + 2 * PDF_ROW_HEIGHT  # espaço para subtotal e rodapé
     
-    # Table Data
-    data = [['OS', 'Cliente', 'Loja', 'Status', 'Valor']]
+    page_number = 0
+    page = None
+    y = 0
+    table_top = 0
+    page_sum = 0
     total_sum = 0
     
+    def new_page():
+        nonlocal page, y, table_top, page_number, page_sum
+        page_number += 1
+        page = Page()
+        page_sum = 0
+        y = height - PDF_MARGIN
+        if page_number == 1:
+            page.text(left, y - 18, title, 'Helvetica-Bold', 18)
+            page.text(left, y - 36, f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", size=10)
+            y -= 56
+        table_top = y
+        page.line(left, y, left + table_width, y)
+        _draw_row(page, y, headers, 'Helvetica-Bold', PDF_WHITE, PDF_HEADER_COLOR)
+        y -= PDF_ROW_HEIGHT
+    
+    def close_page(last=False):
+        values = ['', 'Subtotal da página', '', '', f"R$ {page_sum:.2f}"]
+        _draw_row(page, y, values, 'Helvetica-Bold')
+        _draw_column_lines(page, table_top, y - PDF_ROW_HEIGHT)
+        footer_y = PDF_MARGIN - 10
+        if last:
+            page.text(left, footer_y + 14, f"Total Geral: R$ {total_sum:.2f}", 'Helvetica-Bold', 10)
+        page.text(width - PDF_MARGIN - 50, footer_y, f"Página {page_number}", size=8)
+        return pdf.add_page(page)
+    
+    new_page()
     for order in orders:
+        if y - PDF_ROW_HEIGHT < bottom:
+            yield close_page()
+            new_page()
         val = (order['valor_pago'] or 0) + (order['entrada'] or 0) + (order['valor_retirada'] or 0)
+        page_sum += val
         total_sum += val
-        data.append([
-            str(order['os_number']),
-            str(order['client_name'])[:20], # Truncate name
-            str(order['store']),
-            str(order['payment_status']),
+        _draw_row(page, y, [
+            order['os_number'],
+            order['client_name'],
+            order['store'],
+            order['payment_status'],
             f"R$ {val:.2f}"
-        ])
-        
-    # Style
-    table = Table(data, colWidths=[60, 180, 80, 80, 80])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4361ee')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+        ], fill=PDF_ROW_COLOR)
+        y -= PDF_ROW_HEIGHT
     
-    elements.append(table)
-    elements.append(Spacer(1, 20))
-    elements.append(Paragraph(f"<b>Total Geral: R$ {total_sum:.2f}</b>", styles['Normal']))
-    
-    doc.build(elements)
+    yield close_page(last=True)
+    yield pdf.finish()
+
+
+def generate_pdf_report(orders, title="Relatório de Vendas"):
+    output = io.BytesIO()
+    for chunk in stream_pdf_report(orders, title):
+        output.write(chunk)
     output.seek(0)
     return output
@@ -0,0 +1,51 @@
+"""
+Search Service
+Full-text search over orders using the orders_fts index
+"""
+import re
+from app.models import get_db, get_db_schemas
+
+
+def build_match_query(text):
+    """
+    Convert free text typed by the user into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term and all terms must match, so
+    "joao 119" finds "João" with a phone starting with 119. Returns an
+    empty string when the text has nothing searchable.
+    """
+    terms = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def fts_source(columns='rowid'):
+    """
+    SELECT over orders_fts for the current connection, with one MATCH
+    parameter per schema: federated reads (store partitions) query the
+    index of every attached file, since a view cannot be MATCHed.
+
+    Returns:
+        tuple: (sql, number of MATCH parameters)
+    """
+    schemas = get_db_schemas()
+    sql = ' UNION ALL '.join(
+        f"SELECT {columns} FROM {schema}.orders_fts WHERE orders_fts MATCH ?" for schema in schemas
+    )
+    return sql, len(schemas)
+
+
+def search_orders(text, limit=20):
+    """Search non-deleted orders by OS number, client name, phone or CPF"""
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    db = get_db()
+    source, count = fts_source('rowid, rank')
+    return db.execute(f"""
+        SELECT o.id, o.os_number, o.client_name, o.phone, o.cpf, o.store, o.payment_status
+        FROM ({source}) f
+        JOIN orders o ON o.id = f.rowid
+        ORDER BY f.rank
+        LIMIT ?
+    """, (*[match] * count, limit)).fetchall()
@@ -0,0 +1,385 @@
+"""
+Sync Service
+Sincronização incremental entre lojas pelo log de alterações (change_log):
+cada lado envia só os registros alterados desde o último seq confirmado
+pelo outro, em lotes compactos (colunas uma vez por tabela, linhas como
+listas, JSON comprimido com gzip)
+"""
+import gzip
+import json
+import uuid
+import sqlite3
+import urllib.error
+import urllib.request
+from datetime import datetime
+from app.config import SYNC_NODE_ID, SYNC_BATCH_SIZE
+from app.models import get_partition_db, get_partitions
+
+SYNC_TIMEOUT = 60
+
+# Ordem de aplicação (pais antes dos filhos; exclusões na ordem inversa)
+SYNC_TABLES = ('orders', 'graus', 'partial_payments', 'cash_flow')
+
+# Colunas que identificam o mesmo registro nos dois lados: mesmo id com
+# outra chave é outro registro (conflito de id)
+NATURAL_KEYS = {
+    'orders': ('os_number',),
+    'graus': ('order_id',),
+    'partial_payments': ('order_id',),
+    'cash_flow': ('order_id', 'type'),
+}
+
+# Faixa de ids por nó (ver reserve_id_range)
+SYNC_ID_SPAN = 10 ** 12
+
+
+class SyncError(RuntimeError):
+    """Falha de comunicação ou lote inválido na sincronização"""
+
+
+def _sync_db():
+    if get_partitions():
+        raise SyncError("A sincronização não suporta partições por loja (STORE_PARTITIONS)")
+    return get_partition_db(0)
+
+
+def get_node_id(db):
+    """Identificação deste nó (SYNC_NODE_ID ou gerada na primeira chamada)"""
+    if SYNC_NODE_ID:
+        return SYNC_NODE_ID
+    row = db.execute("SELECT node_id FROM sync_node WHERE id = 1").fetchone()
+    if row:
+        return row[0]
+    db.execute("INSERT OR IGNORE INTO sync_node (id, node_id) VALUES (1, ?)", (uuid.uuid4().hex[:16],))
+    db.commit()
+    return db.execute("SELECT node_id FROM sync_node WHERE id = 1").fetchone()[0]
+
+
+def _last_seq(db):
+    return db.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def _peer_state(db, node_id):
+    """(received_seq, sent_seq) do par"""
+    row = db.execute("SELECT received_seq, sent_seq FROM sync_peers WHERE node_id = ?", (node_id,)).fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def _save_peer(db, node_id, url=None, received=0, sent=0):
+    """Registra o par e avança (nunca recua) os seqs confirmados, na transação corrente"""
+    db.execute("""
+        INSERT INTO sync_peers (node_id, url, received_seq, sent_seq, last_sync_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(node_id) DO UPDATE SET
+            url = COALESCE(excluded.url, url),
+            received_seq = MAX(received_seq, excluded.received_seq),
+            sent_seq = MAX(sent_seq, excluded.sent_seq),
+            last_sync_at = excluded.last_sync_at
+    """, (node_id, url, int(received or 0), int(sent or 0), datetime.now().isoformat(timespec='seconds')))
+
+
+def get_changes(db, since, exclude_origin=None, limit=SYNC_BATCH_SIZE):
+    """
+    Lote com os registros alterados depois de since (até limit), no estado
+    atual; registros que não existem mais vão em deletes. Alterações que
+    vieram de exclude_origin não são devolvidas a ele.
+
+    Returns:
+        dict: node, since, to (seq a confirmar), more, tables
+              {tabela: {columns, rows, deletes}}
+    """
+    # O topo é lido antes: o que mudar durante a leitura ganha seq maior
+    # e vai no próximo lote
+    head = _last_seq(db)
+    entries = db.execute("""
+        SELECT seq, table_name, row_id FROM change_log
+        WHERE seq > ? AND seq <= ? AND (? IS NULL OR origin IS NOT ?)
+        ORDER BY seq
+        LIMIT ?
+    """, (since, head, exclude_origin, exclude_origin, limit)).fetchall()
+    more = len(entries) == limit
+    to = entries[-1][0] if more else max(since, head)
+
+    ids = {}
+    for _seq, table, row_id in entries:
+        ids.setdefault(table, []).append(row_id)
+    tables = {}
+    for table in SYNC_TABLES:
+        if table not in ids:
+            continue
+        cursor = db.execute(
+            f"SELECT * FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids[table]),)
+        )
+        columns = [d[0] for d in cursor.description]
+        rows = [list(row) for row in cursor]
+        found = {row[columns.index('id')] for row in rows}
+        tables[table] = {
+            'columns': columns,
+            'rows': rows,
+            'deletes': [row_id for row_id in ids[table] if row_id not in found],
+        }
+    return {'node': get_node_id(db), 'since': since, 'to': to, 'more': more, 'tables': tables}
+
+
+def _columns(db, table):
+    return [info[1] for info in db.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def _locally_modified(db, table, row_id, origin, sent_seq):
+    """O registro mudou aqui (ou veio de outro nó) depois do último lote confirmado pelo par"""
+    row = db.execute(
+        "SELECT seq, origin FROM change_log WHERE table_name = ? AND row_id = ?", (table, row_id)
+    ).fetchone()
+    return row is not None and row[0] > sent_seq and row[1] != origin
+
+
+def _conflict(db, table, record, local, origin, sent_seq):
+    if local is not None:
+        if any(local[c] != record[c] for c in NATURAL_KEYS[table] if c in record and c in local):
+            return 'id'
+        if _locally_modified(db, table, record['id'], origin, sent_seq):
+            return 'modified'
+    if table == 'orders' and record.get('deleted_at') is None:
+        duplicate = db.execute("""
+            SELECT id FROM orders
+            WHERE os_number = ? AND COALESCE(store, '') = COALESCE(?, '') AND id != ? AND deleted_at IS NULL
+            LIMIT 1
+        """, (record.get('os_number'), record.get('store'), record['id'])).fetchone()
+        if duplicate:
+            return 'os_number'
+    return None
+
+
+def _upsert(db, table, columns, record):
+    updates = ', '.join(f"{c} = excluded.{c}" for c in columns if c != 'id')
+    db.execute(f"""
+        INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+        ON CONFLICT(id) DO UPDATE SET {updates}
+    """, [record[c] for c in columns])
+
+
+def _apply_records(db, records, origin, sent_seq):
+    """
+    Grava os registros [(tabela, registro)] recebidos de origin, na
+    transação corrente. Returns: (aplicados, iguais, [conflitos])
+    """
+    applied = unchanged = 0
+    conflicts = []
+    columns_by_table = {}
+    for table, record in records:
+        if table not in columns_by_table:
+            columns_by_table[table] = set(_columns(db, table))
+        columns = [c for c in record if c in columns_by_table[table]]
+        row = db.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id = ?", (record['id'],)).fetchone()
+        local = dict(zip(columns, row)) if row else None
+        if local is not None and all(local[c] == record[c] for c in columns):
+            unchanged += 1
+            continue
+        kind = _conflict(db, table, record, local, origin, sent_seq)
+        if kind is None:
+            try:
+                _upsert(db, table, columns, record)
+                applied += 1
+                # Conflitos antigos do registro ficam resolvidos pela versão nova
+                db.execute("DELETE FROM sync_conflicts WHERE node_id = ? AND table_name = ? AND row_id = ?",
+                           (origin, table, record['id']))
+                continue
+            except sqlite3.IntegrityError:
+                kind = 'constraint'
+        conflicts.append((origin, table, record['id'], kind, json.dumps(record, ensure_ascii=False)))
+    return applied, unchanged, conflicts
+
+
+def _pending_conflicts(db, origin):
+    """
+    Retira de sync_conflicts os registros de origin que podem ser aplicados
+    depois de uma correção local (OS renumerada, ordem pai recebida...).
+    Conflitos de edição simultânea (modified) ficam para resolução manual.
+    """
+    rows = db.execute("""
+        SELECT id, table_name, remote_row FROM sync_conflicts
+        WHERE node_id = ? AND kind != 'modified' AND remote_row IS NOT NULL
+    """, (origin,)).fetchall()
+    db.execute("DELETE FROM sync_conflicts WHERE id IN (SELECT value FROM json_each(?))",
+               (json.dumps([row[0] for row in rows]),))
+    return [(row[1], json.loads(row[2])) for row in rows if row[1] in SYNC_TABLES]
+
+
+def apply_changes(db, batch):
+    """
+    Aplica um lote de outro nó numa única transação. Registros iguais aos
+    locais são ignorados; os que conflitam (mesmo id com outra OS, mesma
+    OS na mesma loja com outro id, alterados aqui desde a última troca, ou
+    que violam chaves estrangeiras) não são aplicados e ficam em
+    sync_conflicts. No último lote de cada troca, os conflitos pendentes
+    do mesmo nó são tentados de novo.
+
+    Returns:
+        dict: applied, unchanged, conflicts, received (seq confirmado)
+    """
+    origin = batch.get('node')
+    if not origin or origin == get_node_id(db):
+        raise SyncError("Lote sem origem ou enviado pelo próprio nó")
+    _received, sent_seq = _peer_state(db, origin)
+
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        before = _last_seq(db)
+        records = []
+        for table in SYNC_TABLES:
+            data = batch['tables'].get(table) or {}
+            records.extend((table, dict(zip(data['columns'], values))) for values in data.get('rows', []))
+        if not batch.get('more'):
+            # Versões mais novas do lote substituem as pendentes
+            received = {(table, record['id']) for table, record in records}
+            received.update((table, row_id) for table in SYNC_TABLES
+                            for row_id in (batch['tables'].get(table) or {}).get('deletes', []))
+            records.extend(item for item in _pending_conflicts(db, origin)
+                           if (item[0], item[1]['id']) not in received)
+            records.sort(key=lambda item: SYNC_TABLES.index(item[0]))
+        applied, unchanged, conflicts = _apply_records(db, records, origin, sent_seq)
+
+        for table in reversed(SYNC_TABLES):
+            for row_id in (batch['tables'].get(table) or {}).get('deletes', []):
+                if _locally_modified(db, table, row_id, origin, sent_seq):
+                    conflicts.append((origin, table, row_id, 'modified', None))
+                    continue
+                try:
+                    applied += db.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,)).rowcount
+                except sqlite3.IntegrityError:
+                    conflicts.append((origin, table, row_id, 'constraint', None))
+
+        # O que veio do par não volta para ele
+        db.execute("UPDATE change_log SET origin = ? WHERE seq > ?", (origin, before))
+        db.executemany("""
+            INSERT INTO sync_conflicts (node_id, table_name, row_id, kind, remote_row)
+            VALUES (?, ?, ?, ?, ?)
+        """, conflicts)
+        _save_peer(db, origin, received=batch['to'])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {'applied': applied, 'unchanged': unchanged, 'conflicts': len(conflicts), 'received': batch['to']}
+
+
+def serve_changes(since, node=None, limit=SYNC_BATCH_SIZE):
+    """
+    GET /sync/changes: lote para o nó node a partir de since. Pedir a
+    partir de since confirma tudo o que foi enviado até ele.
+    """
+    db = _sync_db()
+    if node:
+        _save_peer(db, node, sent=since)
+        db.commit()
+    return get_changes(db, since, exclude_origin=node, limit=max(1, min(limit, SYNC_BATCH_SIZE)))
+
+
+def receive_changes(payload):
+    """POST /sync/changes: aplica o lote enviado; ack é o último seq daqui que o par já aplicou"""
+    db = _sync_db()
+    batch = payload.get('batch') or {}
+    if not isinstance(batch.get('tables'), dict) or 'to' not in batch:
+        raise SyncError("Lote inválido")
+    result = apply_changes(db, batch)
+    # A confirmação vale depois da aplicação: o que o par recebeu daqui e
+    # recusou por conflito ainda conta como alteração local no lote dele
+    _save_peer(db, batch['node'], sent=payload.get('ack', 0))
+    db.commit()
+    result['node'] = get_node_id(db)
+    return result
+
+
+def sync_status():
+    """Identificação, último seq, pares e conflitos registrados"""
+    db = _sync_db()
+    peers = db.execute("""
+        SELECT node_id, url, received_seq, sent_seq, last_sync_at FROM sync_peers ORDER BY node_id
+    """).fetchall()
+    return {
+        'node': get_node_id(db),
+        'last_seq': _last_seq(db),
+        'peers': [dict(row) for row in peers],
+        'conflicts': db.execute("SELECT COUNT(*) FROM sync_conflicts").fetchone()[0],
+    }
+
+
+def _request(url, token, payload=None):
+    headers = {'Authorization': f'Bearer {token}', 'Accept-Encoding': 'gzip'}
+    data = None
+    if payload is not None:
+        data = gzip.compress(json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+        headers.update({'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    request = urllib.request.Request(url, data=data, headers=headers, method='POST' if data else 'GET')
+    try:
+        with urllib.request.urlopen(request, timeout=SYNC_TIMEOUT) as response:
+            body = response.read()
+            if response.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+    except urllib.error.HTTPError as e:
+        raise SyncError(f"{url}: HTTP {e.code}") from e
+    except (urllib.error.URLError, OSError) as e:
+        raise SyncError(f"{url}: {e}") from e
+    return json.loads(body)
+
+
+def sync_with_peer(url, token, pull=True, push=True):
+    """
+    Sincroniza com o nó em url: primeiro recebe as alterações dele (pull),
+    depois envia as daqui (push), em lotes de SYNC_BATCH_SIZE registros.
+
+    Returns:
+        dict: node, peer, pulled, pushed, conflicts
+    """
+    db = _sync_db()
+    url = url.rstrip('/')
+    node = get_node_id(db)
+    peer = _request(f"{url}/sync/status", token)['node']
+    if peer == node:
+        raise SyncError("O par tem a mesma identificação deste nó (defina SYNC_NODE_ID)")
+    _save_peer(db, peer, url=url)
+    db.commit()
+
+    result = {'node': node, 'peer': peer, 'pulled': 0, 'pushed': 0, 'conflicts': 0}
+    while pull:
+        received, _sent = _peer_state(db, peer)
+        batch = _request(f"{url}/sync/changes?since={received}&node={node}", token)
+        if batch.get('node') != peer:
+            raise SyncError("Lote recebido de outro nó")
+        applied = apply_changes(db, batch)
+        result['pulled'] += applied['applied']
+        result['conflicts'] += applied['conflicts']
+        pull = batch['more']
+    while push:
+        received, sent = _peer_state(db, peer)
+        batch = get_changes(db, sent, exclude_origin=peer)
+        if batch['to'] == sent:
+            break
+        response = _request(f"{url}/sync/changes", token, {'ack': received, 'batch': batch})
+        _save_peer(db, peer, sent=response['received'])
+        db.commit()
+        result['pushed'] += response['applied']
+        result['conflicts'] += response['conflicts']
+        push = batch['more']
+    return result
+
+
+def reserve_id_range(db, number):
+    """
+    Faz os novos registros deste nó usarem ids a partir de number * SYNC_ID_SPAN,
+    para que lojas diferentes não criem o mesmo id
+    """
+    base = int(number) * SYNC_ID_SPAN
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        for table in SYNC_TABLES:
+            updated = db.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (base, table)
+            ).rowcount
+            if not updated:
+                db.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, base))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return base
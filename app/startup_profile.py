@@ -0,0 +1,71 @@
+"""
+Startup Profile
+Mede onde vai o tempo de inicialização: fases (imports, create_app,
+primeira página) e os módulos mais caros segundo python -X importtime
+"""
+import os
+import re
+import sys
+import json
+import subprocess
+
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+# Executado num processo novo: as fases são medidas antes de qualquer import do app
+_PHASES_CODE = """
+import time, json
+marks = [('início', time.perf_counter())]
+import flask
+marks.append(('import flask', time.perf_counter()))
+import app.config
+marks.append(('import app.config', time.perf_counter()))
+from app import create_app
+application = create_app()
+marks.append(('create_app', time.perf_counter()))
+application.test_client().get('/').close()
+marks.append(('primeira página (/)', time.perf_counter()))
+phases = [(name, round((t - marks[i][1]) * 1000, 2)) for i, (name, t) in enumerate(marks[1:])]
+phases.append(('total', round((marks[-1][1] - marks[0][1]) * 1000, 2)))
+print(json.dumps(phases))
+"""
+
+
+def parse_importtime(output, top=20):
+    """
+    Módulos de -X importtime ordenados pelo tempo acumulado, e o tempo
+    próprio somado por pacote de primeiro nível (flask, openpyxl, app...)
+    """
+    modules = []
+    packages = {}
+    for line in output.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _indent, name = match.groups()
+        modules.append((name, int(cumulative_us) / 1000, int(self_us) / 1000))
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us) / 1000
+    modules.sort(key=lambda m: m[1], reverse=True)
+    by_package = sorted(packages.items(), key=lambda p: p[1], reverse=True)
+    return modules[:top], by_package[:top]
+
+
+def profile_startup(top=20):
+    """
+    Roda a inicialização num processo novo com -X importtime.
+
+    Returns:
+        dict: phases [(fase, ms)], modules [(módulo, acumulado ms, próprio ms)],
+              packages [(pacote, ms próprios)]
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PHASES_CODE],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'falha ao medir')
+    modules, packages = parse_importtime(result.stderr, top)
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    return {'phases': phases, 'modules': modules, 'packages': packages}
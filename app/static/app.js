@@ -55,6 +55,32 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     });
 
+    // Bulk Order Selection (index page)
+    const bulkForm = document.getElementById('bulk-form');
+    if (bulkForm) {
+        const boxes = document.querySelectorAll('.bulk-select');
+        const selectAll = document.getElementById('bulk-all');
+        const updateBulk = () => {
+            const count = [...boxes].filter(box => box.checked).length;
+            document.getElementById('bulk-count').textContent = count;
+            document.getElementById('bulk-submit').disabled = count === 0;
+            if (selectAll) selectAll.checked = count > 0 && count === boxes.length;
+        };
+        boxes.forEach(box => box.addEventListener('change', updateBulk));
+        if (selectAll) {
+            selectAll.addEventListener('change', function () {
+                boxes.forEach(box => { box.checked = selectAll.checked; });
+                updateBulk();
+            });
+        }
+        bulkForm.addEventListener('submit', function (event) {
+            if (bulkForm.elements.action.value === 'delete' &&
+                !confirm('Tem certeza que deseja excluir os pedidos selecionados?')) {
+                event.preventDefault();
+            }
+        });
+    }
+
     // Tooltips
     var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'))
     var tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
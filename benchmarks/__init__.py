@@ -0,0 +1,7 @@
+"""
+Benchmarks do Gestão Ótica
+
+    python -m benchmarks.seed     gera um banco sintético
+    python -m benchmarks.run      mede os endpoints e grava um relatório JSON
+    python -m benchmarks.compare  compara dois relatórios
+"""
@@ -0,0 +1,67 @@
+"""
+Compara dois relatórios gerados por benchmarks.run
+
+Uso:
+    python -m benchmarks.compare antes.json depois.json [--threshold 10]
+
+Sai com código 1 se algum endpoint ficou mais lento (p50 ou p95) além do
+limite percentual informado ou falhou (status >= 400) no relatório novo.
+"""
+import argparse
+import json
+import sys
+
+
+def _delta(old, new):
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def compare(before, after, threshold=10.0):
+    regressions = []
+    rows = []
+    for name, new in after['endpoints'].items():
+        old = before['endpoints'].get(name)
+        if new.get('failed'):
+            rows.append((name, old and old.get('p50_ms'), None, None, old and old.get('p95_ms'), None, None))
+            regressions.append(f"{name} (status {new['status_codes']})")
+            continue
+        if not old or old.get('failed'):
+            rows.append((name, None, new['p50_ms'], None, None, new['p95_ms'], None))
+            continue
+        d50 = _delta(old['p50_ms'], new['p50_ms'])
+        d95 = _delta(old['p95_ms'], new['p95_ms'])
+        rows.append((name, old['p50_ms'], new['p50_ms'], d50, old['p95_ms'], new['p95_ms'], d95))
+        if d50 > threshold or d95 > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara dois relatórios de benchmark')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10.0, help='regressão máxima aceita, em %%')
+    args = parser.parse_args()
+
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+
+    rows, regressions = compare(before, after, args.threshold)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    print(f"{'endpoint':28s} {'p50 antes':>10s} {'p50 depois':>10s} {'Δ%':>7s} {'p95 antes':>10s} {'p95 depois':>10s} {'Δ%':>7s}")
+    fmt = lambda v, spec: format(v, spec) if v is not None else '-'.rjust(int(spec.split('.')[0].lstrip('+')))
+    for name, o50, n50, d50, o95, n95, d95 in rows:
+        print(f"{name:28s} {fmt(o50, '10.2f')} {fmt(n50, '10.2f')} {fmt(d50, '+7.1f')} "
+              f"{fmt(o95, '10.2f')} {fmt(n95, '10.2f')} {fmt(d95, '+7.1f')}")
+
+    if regressions:
+        print(f"\nRegressões acima de {args.threshold}% ou falhas: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
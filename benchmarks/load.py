@@ -0,0 +1,154 @@
+"""
+Teste de carga do servidor de produção
+
+Sobe o app num PooledWSGIServer (ou no servidor de desenvolvimento, para
+comparação) numa porta livre e dispara clientes concorrentes com conexões
+keep-alive, medindo requisições por segundo e latência para cada nível de
+concorrência. Cada cliente roda num processo próprio, para não disputar o
+GIL com o servidor.
+
+Uso:
+    python -m benchmarks.load --orders 20000 --clients 1 2 4 8 16 --duration 5
+    python -m benchmarks.load --db bench.db --server dev
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.run import _percentile
+from benchmarks.seed import build_database
+
+URLS = ['/', '/?store=Centro', '/?q=silva', '/dashboard', '/cashflow/balance', '/api/orders?limit=50']
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_server(app, kind, port, threads):
+    if kind == 'dev':
+        from werkzeug.serving import make_server
+        server = make_server('127.0.0.1', port, app, threaded=True)
+    else:
+        from app.server import PooledWSGIServer
+        server = PooledWSGIServer('127.0.0.1', port, app, threads=threads, queue_limit=256)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _client(port, urls, duration, results):
+    random.seed()
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while time.perf_counter() < deadline:
+        url = random.choice(urls)
+        started = time.perf_counter()
+        try:
+            conn.request('GET', url)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        except (OSError, http.client.HTTPException):
+            errors.append('conexão')
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    conn.close()
+    results.put((latencies, errors))
+
+
+def run_level(port, clients, duration, urls):
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_client, args=(port, urls, duration, results))
+               for _ in range(clients)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    latencies = []
+    errors = []
+    for _ in workers:
+        worker_latencies, worker_errors = results.get()
+        latencies.extend(worker_latencies)
+        errors.extend(worker_errors)
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(_percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(_percentile(latencies, 99), 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga do servidor do Gestão Ótica')
+    parser.add_argument('--orders', type=int, default=10000, help='escala do banco sintético')
+    parser.add_argument('--db', help='banco já existente (não gera um novo)')
+    parser.add_argument('--server', choices=['production', 'dev'], default='production')
+    parser.add_argument('--threads', type=int, default=16, help='threads do servidor de produção')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=5, help='segundos por nível de concorrência')
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+
+    if args.db:
+        db_path = args.db
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='gestao_load_'), 'load.db')
+        print(f"Gerando banco com {args.orders} ordens em {db_path}...", file=sys.stderr)
+        build_database(db_path, args.orders)
+
+    os.environ['DB_PATH'] = db_path
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    # Mede o servidor, não a instrumentação de desenvolvimento
+    os.environ.setdefault('QUERY_PLAN_CHECK', 'off')
+    from app import create_app
+    app = create_app()
+
+    port = _free_port()
+    server = _start_server(app, args.server, port, args.threads)
+    levels = []
+    try:
+        run_level(port, 1, 1, URLS)  # aquecimento (pool de conexões, caches)
+        for clients in args.clients:
+            result = run_level(port, clients, args.duration, URLS)
+            levels.append(result)
+            print(f"  {clients:3d} clientes: {result['requests_per_second']:8.1f} req/s  "
+                  f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  erros {result['errors']}",
+                  file=sys.stderr)
+    finally:
+        server.shutdown()
+
+    report = {'server': args.server, 'threads': args.threads, 'urls': URLS, 'levels': levels}
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
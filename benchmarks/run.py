@@ -0,0 +1,193 @@
+"""
+Benchmark das rotas e serviços
+
+Gera (ou reaproveita) um banco sintético, sobe o app com DB_PATH apontando
+para ele e mede cada endpoint pelo Flask test client. O resultado é um JSON
+com latências (p50/p95/p99), tamanho da resposta e pico de memória por
+endpoint, para comparar commits com benchmarks.compare. Endpoints que
+respondem com status >= 400 ficam marcados como failed, sem tempos, e o
+comando sai com código 1.
+
+Uso:
+    python -m benchmarks.run --orders 100000 --repeat 20 --output antes.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from benchmarks.seed import build_database
+
+
+def _endpoints(order_ids):
+    """(nome, endpoint, função que gera a URL) para cada rota medida"""
+    today = date.today()
+    year_ago = (today - timedelta(days=365)).isoformat()
+    month_ago = (today - timedelta(days=30)).isoformat()
+    return [
+        ('main.index', lambda: '/'),
+        ('main.index?store', lambda: '/?store=Centro'),
+        ('main.index?status+store', lambda: '/?store=Shopping&status=Pendente'),
+        ('main.index?q', lambda: '/?q=' + random.choice(['joao', 'maria silva', 'santos', '119'])),
+        ('dashboard.dashboard', lambda: '/dashboard'),
+        ('cashflow.index', lambda: '/cashflow/'),
+        ('cashflow.get_balance', lambda: '/cashflow/balance'),
+        ('report.export?excel', lambda: f'/reports/export?format=excel&start_date={month_ago}'),
+        ('report.export?pdf', lambda: f'/reports/export?format=pdf&start_date={month_ago}'),
+        ('report.export?excel_year', lambda: f'/reports/export?format=excel&start_date={year_ago}'),
+        ('order.details', lambda: f'/details/{random.choice(order_ids)}'),
+        ('order.download_order', lambda: f'/details/{random.choice(order_ids)}/download'),
+        ('print.print_order', lambda: f'/print/order/{random.choice(order_ids)}'),
+    ]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def _request(client, url):
+    started = time.perf_counter()
+    response = client.get(url)
+    # Consome o corpo inteiro (respostas em streaming só terminam aqui)
+    size = len(response.get_data())
+    elapsed = (time.perf_counter() - started) * 1000
+    status = response.status_code
+    response.close()
+    return elapsed, status, size
+
+
+def run(db_path, repeat=20, warmup=2, seed=42):
+    # O app lê DB_PATH e SECRET_KEY na importação de app.config
+    os.environ['DB_PATH'] = db_path
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    from app import create_app
+
+    random.seed(seed)
+    started = time.perf_counter()
+    app = create_app()
+    startup_ms = (time.perf_counter() - started) * 1000
+    client = app.test_client()
+
+    conn = sqlite3.connect(db_path)
+    order_ids = [r[0] for r in conn.execute(
+        "SELECT id FROM orders WHERE deleted_at IS NULL ORDER BY random() LIMIT 500"
+    ).fetchall()] or [1]
+    conn.close()
+
+    results = {}
+    for name, make_url in _endpoints(order_ids):
+        for _ in range(warmup):
+            _request(client, make_url())
+
+        timings = []
+        statuses = set()
+        sizes = []
+        for _ in range(repeat):
+            elapsed, status, size = _request(client, make_url())
+            timings.append(elapsed)
+            statuses.add(status)
+            sizes.append(size)
+
+        # Página de erro não é resultado: o endpoint falha e fica sem tempos
+        if max(statuses) >= 400:
+            results[name] = {'requests': repeat, 'status_codes': sorted(statuses), 'failed': True}
+            print(f"  {name:28s} FALHOU: status {results[name]['status_codes']}", file=sys.stderr)
+            continue
+
+        # Memória medida numa execução separada: tracemalloc distorce os tempos
+        tracemalloc.start()
+        _request(client, make_url())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {
+            'requests': repeat,
+            'status_codes': sorted(statuses),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'p50_ms': round(_percentile(timings, 50), 3),
+            'p95_ms': round(_percentile(timings, 95), 3),
+            'p99_ms': round(_percentile(timings, 99), 3),
+            'max_ms': round(max(timings), 3),
+            'mean_bytes': int(statistics.mean(sizes)),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+        print(f"  {name:28s} p50 {results[name]['p50_ms']:9.2f} ms  "
+              f"p95 {results[name]['p95_ms']:9.2f} ms  mem {results[name]['peak_memory_kb']:9.1f} KB  "
+              f"status {results[name]['status_codes']}", file=sys.stderr)
+
+    return startup_ms, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das rotas do Gestão Ótica')
+    parser.add_argument('--orders', type=int, default=10000, help='escala do banco sintético')
+    parser.add_argument('--db', help='banco já existente (não gera um novo)')
+    parser.add_argument('--keep-db', help='gera o banco neste caminho e o mantém para reutilizar com --db')
+    parser.add_argument('--repeat', type=int, default=20, help='requisições medidas por endpoint')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+
+    seed_info = None
+    if args.db:
+        db_path = args.db
+    else:
+        db_path = args.keep_db or os.path.join(tempfile.mkdtemp(prefix='gestao_bench_'), 'bench.db')
+        print(f"Gerando banco com {args.orders} ordens em {db_path}...", file=sys.stderr)
+        seed_info = build_database(db_path, args.orders, args.seed)
+
+    print("Medindo endpoints...", file=sys.stderr)
+    startup_ms, results = run(db_path, args.repeat, args.warmup, args.seed)
+    failed = [name for name, result in results.items() if result.get('failed')]
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'database': {'path': db_path, 'orders': args.orders if not args.db else None, 'seed': seed_info},
+        'startup_ms': round(startup_ms, 3),
+        'endpoints': results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"Relatório salvo em {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if failed:
+        print(f"Endpoints com status >= 400: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Gerador de dados sintéticos para benchmarks
+
+Cria um banco SQLite com o schema atual (migrações) e N ordens espalhadas
+por lojas e laboratórios, com graus, pagamentos parciais e fluxo de caixa.
+A geração usa uma semente fixa, então a mesma escala gera sempre o mesmo banco.
+
+Uso:
+    python -m benchmarks.seed --orders 100000 --output bench.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+STORES = [('Centro', 40), ('Shopping', 30), ('Bairro', 20), ('Matriz', 10)]
+LABS = ['Lab Visão', 'Óptica Lab', 'Essilor', 'Zeiss', 'Hoya', 'Lab Local']
+FIRST_NAMES = ['João', 'Maria', 'José', 'Ana', 'Antônio', 'Francisca', 'Carlos', 'Paulo',
+               'Lúcia', 'Marcos', 'Luíza', 'Pedro', 'Fernanda', 'Gabriel', 'Júlia', 'Rafael']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Ferreira', 'Costa',
+              'Rodrigues', 'Almeida', 'Nascimento', 'Araújo', 'Gonçalves', 'Conceição']
+PAYMENT_METHODS = ['Dinheiro', 'Cartão de Crédito', 'Cartão de Débito', 'Pix']
+LENS_TYPES = ['Multifocal', 'Bifocal', 'Visão Simples', 'Ocupacional']
+
+BATCH_SIZE = 5000
+
+
+def _cpf(rng):
+    d = [rng.randint(0, 9) for _ in range(11)]
+    return f"{d[0]}{d[1]}{d[2]}.{d[3]}{d[4]}{d[5]}.{d[6]}{d[7]}{d[8]}-{d[9]}{d[10]}"
+
+
+def _phone(rng):
+    return f"({rng.randint(11, 99)}) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+
+
+def _orders(rng, count, start_day, days):
+    stores = [s for s, _ in STORES]
+    weights = [w for _, w in STORES]
+    for order_id in range(1, count + 1):
+        exam = start_day + timedelta(days=int(days * order_id / count))
+        status = 'Pago' if rng.random() < 0.7 else 'Pendente'
+        method = rng.choice(PAYMENT_METHODS)
+        valor = round(rng.uniform(150, 2500), 2)
+        entrada = round(valor * rng.choice([0, 0, 0.2, 0.3, 0.5]), 2)
+        yield (
+            order_id,
+            str(1000 + order_id),
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}",
+            _phone(rng),
+            rng.choice(['Óculos completo', 'Lentes', 'Armação']),
+            rng.choices(stores, weights)[0],
+            rng.choice(LABS),
+            status,
+            method,
+            rng.randint(1, 10) if method == 'Cartão de Crédito' else 0,
+            1 if rng.random() < 0.6 else 0,
+            exam.isoformat(),
+            (exam + timedelta(days=rng.randint(3, 15))).isoformat(),
+            _cpf(rng),
+            1 if rng.random() < 0.3 else 0,
+            valor,
+            entrada,
+            None if rng.random() < 0.98 else exam.isoformat()
+        )
+
+
+def _insert_batches(db, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.executemany(sql, batch)
+            batch = []
+    if batch:
+        db.executemany(sql, batch)
+
+
+def build_database(path, orders=10000, seed=42, years=3, verbose=True):
+    """
+    Cria (ou recria) o banco de benchmark em path.
+
+    Returns:
+        dict: quantidade de linhas por tabela e tempo de geração
+    """
+    # Importa aqui para que o chamador possa definir DB_PATH antes do app.config
+    from app.migrations import run_migrations
+
+    if os.path.exists(path):
+        os.remove(path)
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    days = 365 * years
+    start_day = date.today() - timedelta(days=days)
+
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = OFF")
+    run_migrations(db)
+
+    db.execute("BEGIN")
+    _insert_batches(db, """
+        INSERT INTO orders (id, os_number, client_name, phone, purchase_type, store, lab,
+                            payment_status, payment_method, installments, lab_paid,
+                            exam_date, delivery_date, cpf, receita_fora, valor_pago, entrada, deleted_at)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+    """, _orders(rng, orders, start_day, days))
+    if verbose:
+        print(f"  orders: {orders}", file=sys.stderr)
+
+    def graus():
+        for order_id in range(1, orders + 1):
+            lens_type = rng.choice(LENS_TYPES)
+            for lens_for in (['longe', 'perto'] if rng.random() < 0.3 else ['longe']):
+                for eye in ('OD', 'OE'):
+                    yield (order_id, lens_for, eye, f"{rng.uniform(-6, 4):+.2f}", f"{rng.uniform(-3, 0):.2f}",
+                           str(rng.randint(0, 180)), f"{rng.uniform(28, 36):.1f}", '1.56', lens_type,
+                           f"+{rng.uniform(0.75, 3):.2f}" if lens_type == 'Multifocal' else '')
+    _insert_batches(db, """
+        INSERT INTO graus (order_id, lens_for, eye, esf, cil, eixo, dnp, indice, lens_type, adicao)
+        VALUES (?,?,?,?,?,?,?,?,?,?)
+    """, graus())
+
+    # Pagamentos parciais com a entrada correspondente no caixa (ids explícitos
+    # para ligar partial_payments.cash_flow_id sem consultar lastrowid)
+    payments = []
+    cash_flow = []
+    cash_flow_id = 0
+    for order_id in range(1, orders + 1):
+        if rng.random() >= 0.3:
+            continue
+        day = start_day + timedelta(days=int(days * order_id / orders) + rng.randint(0, 20))
+        for _ in range(rng.randint(1, 3)):
+            cash_flow_id += 1
+            amount = round(rng.uniform(50, 400), 2)
+            method = rng.choice(PAYMENT_METHODS)
+            cash_flow.append((cash_flow_id, day.isoformat(), 'entrada', 'Pagamento Parcial',
+                              f"Pagamento parcial - OS #{order_id}", amount, method, order_id))
+            payments.append((order_id, amount, day.isoformat(), method, '', cash_flow_id))
+    for day_offset in range(days):
+        day = (start_day + timedelta(days=day_offset)).isoformat()
+        for _ in range(rng.randint(0, 4)):
+            cash_flow_id += 1
+            kind = 'entrada' if rng.random() < 0.5 else 'saida'
+            category = 'Venda' if kind == 'entrada' else rng.choice(['Aluguel', 'Laboratório', 'Fornecedor', 'Outros'])
+            cash_flow.append((cash_flow_id, day, kind, category, category, round(rng.uniform(20, 1500), 2),
+                              rng.choice(PAYMENT_METHODS), None))
+    _insert_batches(db, """
+        INSERT INTO cash_flow (id, date, type, category, description, amount, payment_method, order_id)
+        VALUES (?,?,?,?,?,?,?,?)
+    """, cash_flow)
+    _insert_batches(db, """
+        INSERT INTO partial_payments (order_id, amount, payment_date, payment_method, notes, cash_flow_id)
+        VALUES (?,?,?,?,?,?)
+    """, payments)
+    db.commit()
+    db.execute("ANALYZE")
+    db.commit()
+
+    counts = {table: db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ('orders', 'graus', 'partial_payments', 'cash_flow')}
+    db.close()
+    counts['seconds'] = round(time.perf_counter() - started, 2)
+    if verbose:
+        print(f"  banco gerado em {counts['seconds']}s: {counts}", file=sys.stderr)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera um banco sintético para benchmarks')
+    parser.add_argument('--orders', type=int, default=10000, help='quantidade de ordens (ex.: 10000, 100000, 1000000)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--years', type=int, default=3, help='período coberto pelas datas')
+    parser.add_argument('--output', default='bench.db', help='arquivo do banco a gerar')
+    args = parser.parse_args()
+    build_database(args.output, args.orders, args.seed, args.years)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,10 +12,16 @@ block_cipher = None
 project_root = r'c:\Users\lucas\Desktop\semi_final'
 app_dir = os.path.join(project_root, 'app')
 
+# Versões pré-comprimidas (.gz/.br) dos estáticos, embutidas junto com app/static
+sys.path.insert(0, project_root)
+from app.assets import build_assets
+build_assets(os.path.join(app_dir, 'static'))
+
 # Dados a embutir
 datas = [
     (os.path.join(app_dir, 'static'), 'app/static'),
     (os.path.join(app_dir, 'templates'), 'app/templates'),
+    (os.path.join(app_dir, 'models', 'schema.sql'), 'app/models'),
     (os.path.join(project_root, 'data.db'), '.'),
 ]
 
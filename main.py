@@ -1,8 +1,12 @@
+import os
 import sys
 import threading
 import webbrowser
 from app import create_app
-from app.config import DEBUG_MODE, HOST, PORT
+from app.config import (
+    DEBUG_MODE, HOST, PORT, SERVER_MODE, SERVER_THREADS, SERVER_QUEUE_LIMIT,
+    SERVER_KEEP_ALIVE, SERVER_SHUTDOWN_TIMEOUT, BACKUP_INTERVAL_MINUTES
+)
 
 
 def start_flask(open_browser=True):
@@ -25,8 +29,22 @@ def start_flask(open_browser=True):
         if open_browser:
             threading.Timer(1.0, lambda: webbrowser.open(f"http://{HOST}:{PORT}")).start()
 
-    app.run(debug=debug_mode, host=HOST, port=PORT)
+    # Com o reloader do modo debug, só o processo que atende faz backup
+    if BACKUP_INTERVAL_MINUTES and (not debug_mode or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        from app.services.backup_service import start_backup_scheduler
+        start_backup_scheduler(app, BACKUP_INTERVAL_MINUTES)
+
+    if SERVER_MODE == 'production':
+        from app.server import serve
+        serve(app, HOST, PORT, threads=SERVER_THREADS, queue_limit=SERVER_QUEUE_LIMIT,
+              keep_alive=SERVER_KEEP_ALIVE, shutdown_timeout=SERVER_SHUTDOWN_TIMEOUT)
+    else:
+        app.run(debug=debug_mode, host=HOST, port=PORT)
 
 
 if __name__ == '__main__':
+    if '--diagnostics' in sys.argv:
+        # Diagnóstico sob demanda: grava debug_paths.txt ao lado do executável
+        from app.config import write_debug_paths
+        write_debug_paths()
     start_flask()
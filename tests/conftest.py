@@ -0,0 +1,57 @@
+"""
+Configuração dos testes: SECRET_KEY e um banco temporário precisam estar
+no ambiente antes de importar app.config
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix='otica-tests-')
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ['DB_PATH'] = os.path.join(TEST_DIR, 'data.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def db(app):
+    """Conexão do banco de testes numa requisição (get_db precisa do contexto)"""
+    from app.models import get_db
+    with app.test_request_context('/', method='POST'):
+        yield get_db()
+
+
+@pytest.fixture
+def empty_db(app, tmp_path, monkeypatch):
+    """
+    Banco novo, só com as migrações, para testes que comparam totais: o
+    pool e as partições do processo são trocados enquanto o teste roda
+    """
+    from app.models import database, get_db
+    from app.services import cache_service, permission_service
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'data.db'))
+    monkeypatch.setattr(database, '_pools', {})
+    monkeypatch.setattr(database, '_partitions', [])
+    monkeypatch.setattr(permission_service, '_matrix', None)
+    cache_service.data_cache.clear()
+    with app.test_request_context('/', method='POST'):
+        database.init_db()
+        yield get_db()
+    for pool in database._pools.values():
+        pool.close_all()
+    cache_service.data_cache.clear()
+
+
+@pytest.fixture
+def client(app, empty_db):
+    """Cliente HTTP sobre o banco de empty_db"""
+    return app.test_client()
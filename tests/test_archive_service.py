@@ -0,0 +1,199 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import database
+from app.services import archive_service
+from app.services.archive_service import (
+    ArchiveError, archive, fetch_trash_page, restore_archived_order
+)
+from app.services.cashflow_service import calculate_balance
+from app.services.sync_service import get_changes
+
+LAST_YEAR = datetime.now().year - 1
+OLD = (datetime.now() - timedelta(days=200)).isoformat()
+RECENT = (datetime.now() - timedelta(days=5)).isoformat()
+
+
+@pytest.fixture
+def archive_db(empty_db):
+    """Arquivo de testes (ARCHIVE_DB_PATH fica na pasta temporária dos testes)"""
+    path = archive_service.ARCHIVE_DB_PATH
+    yield path
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    archive_service._ready_paths.discard(path)
+
+
+def _order(db, os_number, valor_pago=100, **columns):
+    columns = {'os_number': os_number, 'client_name': f'Cliente {os_number}', 'valor_pago': valor_pago,
+               'store': 'Centro', 'exam_date': f'{LAST_YEAR}-03-10', **columns}
+    order_id = db.execute(f"INSERT INTO orders ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                          list(columns.values())).lastrowid
+    db.execute("INSERT INTO graus (order_id, eye, esf) VALUES (?, 'OD', '-1,00')", (order_id,))
+    db.commit()
+    return order_id
+
+
+def _cash(db, date, amount, order_id=None, type_='entrada'):
+    db.execute("""
+        INSERT INTO cash_flow (date, type, category, description, amount, order_id)
+        VALUES (?, ?, 'Teste', 'Movimento', ?, ?)
+    """, (date, type_, amount, order_id))
+    db.commit()
+
+
+def _ids(db, schema, table, key='id'):
+    return sorted(row[0] for row in db.execute(f"SELECT /* scan-ok */ {key} FROM {schema}.{table}"))
+
+
+def _rollup(db):
+    return db.execute("SELECT /* scan-ok */ SUM(order_count), SUM(revenue) FROM sales_rollup").fetchone()[:]
+
+
+def _attached(db, path):
+    db.execute("ATTACH DATABASE ? AS arq", (path,))
+    return db
+
+
+def test_archive_moves_old_deleted_orders_with_their_rows(empty_db, archive_db):
+    old = _order(empty_db, '1', deleted_at=OLD)
+    recent = _order(empty_db, '2', deleted_at=RECENT)
+    active = _order(empty_db, '3')
+    moved = archive(deleted_after_days=90)
+    assert moved['orders'] == 1 and moved['graus'] == 1
+    assert _ids(empty_db, 'main', 'orders') == [recent, active]
+
+    db = _attached(empty_db, archive_db)
+    try:
+        assert _ids(db, 'arq', 'orders') == [old]
+        assert _ids(db, 'arq', 'graus', 'order_id') == [old]
+    finally:
+        db.execute("DETACH DATABASE arq")
+
+
+def test_archive_year_keeps_orders_with_open_or_later_rows(empty_db, archive_db):
+    paid = _order(empty_db, '1', payment_status='Pago')
+    _cash(empty_db, f'{LAST_YEAR}-03-10', 100, paid)
+    later_cash = _order(empty_db, '2', payment_status='Pago')
+    _cash(empty_db, f'{LAST_YEAR + 1}-01-05', 100, later_cash)
+    receivable = _order(empty_db, '3', payment_status='Pago')
+    empty_db.execute("""
+        INSERT INTO accounts_receivable (order_id, installment_number, total_installments, amount, due_date, status)
+        VALUES (?, 1, 1, 100, ?, 'Pendente')
+    """, (receivable, f'{LAST_YEAR + 1}-01-10'))
+    payable = _order(empty_db, '4', payment_status='Pago')
+    empty_db.execute("""
+        INSERT INTO accounts_payable (description, amount, due_date, status, category, order_id)
+        VALUES ('Laboratório', 40, ?, 'Pendente', 'Laboratório', ?)
+    """, (f'{LAST_YEAR + 1}-01-10', payable))
+    pending = _order(empty_db, '5', payment_status='Pendente')
+    _cash(empty_db, f'{LAST_YEAR}-06-01', 30, type_='saida')
+    empty_db.commit()
+
+    moved = archive(year=LAST_YEAR)
+    assert moved['orders'] == 1 and moved['cash_flow'] == 2
+    assert _ids(empty_db, 'main', 'orders') == [later_cash, receivable, payable, pending]
+    totals = empty_db.execute("SELECT total_entries, total_exits FROM cash_archive_totals WHERE year = ?",
+                              (str(LAST_YEAR),)).fetchone()
+    assert tuple(totals) == (100, 30)
+
+    with pytest.raises(ArchiveError, match='encerrado'):
+        archive(year=datetime.now().year)
+
+
+def test_archive_keeps_balance_and_dashboard_totals(empty_db, archive_db):
+    for number in range(3):
+        order_id = _order(empty_db, str(number), valor_pago=100 + number, payment_status='Pago')
+        _cash(empty_db, f'{LAST_YEAR}-03-10', 100 + number, order_id)
+    _order(empty_db, 'x', deleted_at=OLD)
+    _cash(empty_db, f'{LAST_YEAR}-05-01', 20, type_='saida')
+    balance, rollup = calculate_balance(), _rollup(empty_db)
+
+    archive(year=LAST_YEAR)
+    assert _ids(empty_db, 'main', 'orders') == []
+    assert calculate_balance() == balance
+    assert _rollup(empty_db) == rollup
+
+
+def test_archive_is_not_sent_to_sync_peers(empty_db, archive_db):
+    _order(empty_db, '1', deleted_at=OLD)
+    order_id = _order(empty_db, '2', payment_status='Pago')
+    _cash(empty_db, f'{LAST_YEAR}-03-10', 100, order_id)
+    since = get_changes(empty_db, 0)['to']
+
+    archive(year=LAST_YEAR)
+    assert get_changes(empty_db, since)['tables'] == {}
+
+
+def test_restore_archived_order_brings_everything_back(empty_db, archive_db):
+    order_id = _order(empty_db, '1', payment_status='Pago', deleted_at=OLD)
+    _cash(empty_db, f'{LAST_YEAR}-03-10', 100, order_id)
+    _order(empty_db, '2', payment_status='Pago')
+    rollup = _rollup(empty_db)
+    archive(year=LAST_YEAR)
+    since = get_changes(empty_db, 0)['to']
+
+    assert restore_archived_order(order_id)
+    row = empty_db.execute("SELECT deleted_at FROM orders WHERE id = ?", (order_id,)).fetchone()
+    assert row['deleted_at'] is None
+    assert _ids(empty_db, 'main', 'graus', 'order_id') == [order_id]
+    assert _ids(empty_db, 'main', 'cash_flow', 'order_id') == [order_id]
+    # Restaurada e sem exclusão: conta de novo no consolidado (com a ordem 2, ainda arquivada)
+    assert _rollup(empty_db) == (rollup[0] + 1, rollup[1] + 100)
+    assert empty_db.execute("SELECT /* scan-ok */ COUNT(*) FROM cash_archive_totals").fetchone()[0] == 0
+    # Só a restauração da exclusão é uma alteração para a sincronização
+    changes = get_changes(empty_db, since)['tables']
+    assert list(changes) == ['orders'] and changes['orders']['deletes'] == []
+
+    assert not restore_archived_order(order_id)
+
+
+def test_fetch_trash_page_lists_both_sources(empty_db, archive_db):
+    ids = [_order(empty_db, str(number), deleted_at=OLD) for number in range(3)]
+    recent = _order(empty_db, 'r', deleted_at=RECENT)
+    archive(deleted_after_days=90)
+
+    page, cursor = fetch_trash_page('archive', limit=2)
+    assert [row['id'] for row in page] == [ids[2], ids[1]] and cursor == ids[1]
+    page, cursor = fetch_trash_page('archive', before=cursor, limit=2)
+    assert [row['id'] for row in page] == [ids[0]] and cursor is None
+    page, _cursor = fetch_trash_page('deleted')
+    assert [row['id'] for row in page] == [recent]
+
+
+def test_archive_file_is_migrated_once_per_process(empty_db, archive_db, monkeypatch):
+    import app.migrations
+    calls = []
+    run_migrations = app.migrations.run_migrations
+    monkeypatch.setattr(app.migrations, 'run_migrations', lambda conn: calls.append(1) or run_migrations(conn))
+    fetch_trash_page('archive')
+    fetch_trash_page('archive')
+    assert len(calls) == 1
+    os.remove(archive_db)
+    fetch_trash_page('archive')
+    assert len(calls) == 2
+
+
+def test_archive_refuses_store_partitions(empty_db, archive_db, monkeypatch):
+    monkeypatch.setattr(database, '_partitions', [(1, 'Centro', '/tmp/centro.db')])
+    with pytest.raises(ArchiveError, match='partições'):
+        archive()
+
+
+def test_trash_routes(client, empty_db, archive_db):
+    archived = _order(empty_db, 'A1', deleted_at=OLD)
+    deleted = _order(empty_db, 'D1', deleted_at=RECENT)
+    archive(deleted_after_days=90)
+
+    assert 'Cliente A1' in client.get('/trash/').get_data(as_text=True)
+    assert 'Cliente D1' in client.get('/trash/?source=deleted').get_data(as_text=True)
+
+    response = client.post(f'/trash/{deleted}/restore', data={'source': 'deleted'})
+    assert response.headers['Location'] == f'/edit/{deleted}'
+    response = client.post(f'/trash/{archived}/restore', data={'source': 'archive'})
+    assert response.headers['Location'] == f'/edit/{archived}'
+    rows = empty_db.execute("SELECT /* scan-ok */ id FROM orders WHERE deleted_at IS NULL ORDER BY id").fetchall()
+    assert [row[0] for row in rows] == [archived, deleted]
@@ -0,0 +1,83 @@
+import gzip
+import os
+
+from flask import Flask, url_for
+
+from app.assets import AssetManifest, build_assets, init_assets
+
+CSS = b'body { color: black; }\n' * 100
+
+
+def _static(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'css' / 'site.css').write_bytes(CSS)
+    (static / 'logo.png').write_bytes(b'\x89PNG' + b'\x00' * 2000)
+    return str(static)
+
+
+def _app(static_dir):
+    app = Flask(__name__, static_folder=static_dir)
+    manifest = init_assets(app, static_dir, max_age=31536000)
+    return app, manifest
+
+
+def test_names_change_with_the_content(tmp_path):
+    static_dir = _static(tmp_path)
+    hashed = AssetManifest(static_dir).url_filename('css/site.css')
+    assert hashed.startswith('css/site.') and hashed.endswith('.css') and hashed != 'css/site.css'
+    with open(os.path.join(static_dir, 'css', 'site.css'), 'ab') as f:
+        f.write(b'p {}\n')
+    assert AssetManifest(static_dir).url_filename('css/site.css') != hashed
+    assert AssetManifest(static_dir).url_filename('missing.js') == 'missing.js'
+
+
+def test_hashed_urls_are_immutable_and_compressed(tmp_path):
+    app, _manifest = _app(_static(tmp_path))
+    with app.test_request_context():
+        url = url_for('static', filename='css/site.css')
+    client = app.test_client()
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == CSS
+
+    again = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert plain.data == CSS and 'Content-Encoding' not in plain.headers
+
+
+def test_images_and_plain_names(tmp_path):
+    app, _manifest = _app(_static(tmp_path))
+    with app.test_request_context():
+        url = url_for('static', filename='logo.png')
+    client = app.test_client()
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'immutable' in response.headers['Cache-Control']
+
+    response = client.get('/static/css/site.css')
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers.get('Cache-Control', '')
+
+
+def test_build_assets_writes_precompressed_files(tmp_path):
+    static_dir = _static(tmp_path)
+    results = build_assets(static_dir)
+    assert [name for name, _size, _sizes in results] == ['css/site.css']
+    path = os.path.join(static_dir, 'css', 'site.css.gz')
+    with open(path, 'rb') as f:
+        assert gzip.decompress(f.read()) == CSS
+    # Os arquivos .gz não viram assets
+    assert 'css/site.css.gz' not in AssetManifest(static_dir).assets
+
+
+def test_app_pages_link_hashed_assets(client):
+    body = client.get('/').data.decode()
+    assert 'bootstrap.min.css' not in body
+    assert 'bootstrap.min.' in body
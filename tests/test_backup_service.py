@@ -0,0 +1,120 @@
+import gzip
+import os
+import sqlite3
+
+import pytest
+
+from app.models import database
+from app.services import backup_service
+from app.services.backup_service import (
+    BackupError, BackupScheduler, apply_retention, create_snapshot, list_snapshots, restore_snapshot,
+    select_expired
+)
+
+
+@pytest.fixture
+def backups(empty_db, tmp_path, monkeypatch):
+    """Pasta de snapshots e banco de arquivo temporários, sobre o banco de empty_db"""
+    monkeypatch.setattr(backup_service, 'DB_PATH', database.DB_PATH)
+    monkeypatch.setattr(backup_service, 'ARCHIVE_DB_PATH', str(tmp_path / 'arquivo.db'))
+    empty_db.execute("INSERT INTO orders (os_number, client_name) VALUES ('B1', 'Ana')")
+    empty_db.commit()
+    return str(tmp_path / 'backups')
+
+
+def _orders(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT os_number FROM orders ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_create_snapshot_writes_verified_compressed_copies(backups, tmp_path):
+    manifest = create_snapshot(backups)
+    assert [f['kind'] for f in manifest['files']] == ['main']
+    folder = os.path.join(backups, manifest['name'])
+    assert sorted(os.listdir(folder)) == ['data.db.gz', 'manifest.json']
+    copy = tmp_path / 'copia.db'
+    with gzip.open(os.path.join(folder, 'data.db.gz')) as f:
+        copy.write_bytes(f.read())
+    assert _orders(str(copy)) == ['B1']
+    assert [s['name'] for s in list_snapshots(backups)] == [manifest['name']]
+    # Nada de pastas temporárias depois de uma cópia bem-sucedida
+    assert os.listdir(backups) == [manifest['name']]
+
+
+def test_create_snapshot_includes_the_archive_database(backups, tmp_path):
+    sqlite3.connect(str(tmp_path / 'arquivo.db')).execute("CREATE TABLE t (x)").connection.close()
+    manifest = create_snapshot(backups)
+    assert [(f['kind'], f['filename']) for f in manifest['files']] == [('main', 'data.db'), ('archive', 'arquivo.db')]
+
+
+def test_failed_integrity_check_leaves_no_snapshot(backups, monkeypatch):
+    monkeypatch.setattr(backup_service, 'check_integrity', lambda path: ['*** in database main ***'])
+    with pytest.raises(BackupError, match='verificação'):
+        create_snapshot(backups)
+    assert os.listdir(backups) == []
+
+
+def test_restore_snapshot_brings_back_the_data(backups, empty_db):
+    manifest = create_snapshot(backups)
+    empty_db.execute("DELETE /* scan-ok */ FROM orders")
+    empty_db.execute("INSERT INTO orders (os_number, client_name) VALUES ('B2', 'Bia')")
+    empty_db.commit()
+
+    assert restore_snapshot(manifest['name'], backups) == [database.DB_PATH]
+    # Conexões abertas já veem o conteúdo restaurado
+    assert [row[0] for row in empty_db.execute("SELECT /* scan-ok */ os_number FROM orders")] == ['B1']
+
+
+def test_restore_snapshot_rejects_invalid_and_corrupted_snapshots(backups, empty_db):
+    with pytest.raises(BackupError, match='inválido'):
+        restore_snapshot('../data', backups)
+    with pytest.raises(BackupError, match='não encontrado'):
+        restore_snapshot('20260101-000000', backups)
+
+    manifest = create_snapshot(backups)
+    with gzip.open(os.path.join(backups, manifest['name'], 'data.db.gz'), 'wb') as f:
+        f.write(b'SQLite format 3\x00' + b'\x00' * 4096)
+    empty_db.execute("INSERT INTO orders (os_number, client_name) VALUES ('B2', 'Bia')")
+    empty_db.commit()
+    with pytest.raises(BackupError):
+        restore_snapshot(manifest['name'], backups)
+    assert _orders(database.DB_PATH) == ['B1', 'B2']
+
+
+def test_select_expired_keeps_last_daily_and_monthly():
+    names = ['20260301-120000', '20260301-110000', '20260301-100000',
+             '20260228-230000', '20260228-100000', '20260227-100000',
+             '20260115-100000', '20251220-100000']
+    expired = select_expired(names, keep_last=2, keep_daily=2, keep_monthly=2)
+    # Ficam as 2 mais recentes, a última de 01/03 e 28/02, e a última de março e fevereiro
+    assert expired == ['20260301-100000', '20260228-100000', '20260227-100000',
+                       '20260115-100000', '20251220-100000']
+
+
+def test_apply_retention_removes_expired_snapshots_and_stale_leftovers(tmp_path, monkeypatch):
+    for name in ('20260101-000000', '20260102-000000', '20260103-000000', '.tmp-velho', '.tmp-novo', 'outra'):
+        (tmp_path / name).mkdir()
+    old = os.path.getmtime(tmp_path / '.tmp-novo') - 2 * 24 * 3600
+    os.utime(tmp_path / '.tmp-velho', (old, old))
+    monkeypatch.setattr(backup_service, 'select_expired', lambda names: sorted(names)[:1])
+    assert apply_retention(str(tmp_path)) == ['20260101-000000']
+    assert sorted(os.listdir(tmp_path)) == ['.tmp-novo', '20260102-000000', '20260103-000000', 'outra']
+
+
+def test_scheduler_records_runs_and_failures(backups, monkeypatch):
+    scheduler = BackupScheduler(60, directory=backups)
+    manifest = scheduler.run_once()
+    stats = scheduler.stats()
+    assert stats['runs'] == 1 and stats['failures'] == 0
+    assert stats['last_snapshot'] == manifest['name'] and not stats['running']
+
+    def fail(directory):
+        raise BackupError("disco cheio")
+
+    monkeypatch.setattr(backup_service, 'create_snapshot', fail)
+    assert scheduler.run_once() is None
+    stats = scheduler.stats()
+    assert stats['runs'] == 2 and stats['failures'] == 1 and stats['last_error'] == 'disco cheio'
@@ -0,0 +1,64 @@
+import sqlite3
+
+from benchmarks.compare import compare
+from benchmarks.run import _percentile
+from benchmarks.seed import build_database
+
+
+def _report(**endpoints):
+    return {'endpoints': endpoints}
+
+
+def _timing(p50, p95):
+    return {'p50_ms': p50, 'p95_ms': p95, 'status_codes': [200]}
+
+
+def test_compare_flags_slower_endpoints():
+    before = _report(index=_timing(10, 20), dashboard=_timing(5, 8))
+    after = _report(index=_timing(10.5, 25), dashboard=_timing(5, 8), trash=_timing(1, 2))
+    rows, regressions = compare(before, after, threshold=10)
+    assert regressions == ['index']
+    assert [row[0] for row in rows] == ['index', 'dashboard', 'trash']
+
+
+def test_compare_treats_failures_as_regressions():
+    failed = {'requests': 3, 'status_codes': [500], 'failed': True}
+    rows, regressions = compare(_report(details=_timing(3, 4)), _report(details=failed))
+    assert regressions == ['details (status [500])']
+
+    rows, regressions = compare(_report(details=failed), _report(details=_timing(3, 4)))
+    assert regressions == []
+    assert rows == [('details', None, 3, None, None, 4, None)]
+
+
+def test_percentile_interpolates():
+    assert _percentile([4, 1, 3, 2], 50) == 2.5
+    assert _percentile([1, 2, 3, 4, 5], 95) == 4.8
+    assert _percentile([7], 95) == 7
+
+
+def test_seed_is_deterministic(tmp_path):
+    first, second = str(tmp_path / 'a.db'), str(tmp_path / 'b.db')
+    counts = [build_database(path, orders=50, years=1, verbose=False) for path in (first, second)]
+    assert counts[0]['orders'] == 50
+    assert {**counts[0], 'seconds': 0} == {**counts[1], 'seconds': 0}
+    dumps = []
+    for path in (first, second):
+        conn = sqlite3.connect(path)
+        dumps.append(
+            conn.execute("SELECT id, os_number, client_name, cpf, valor_pago, exam_date FROM orders").fetchall()
+            + conn.execute("SELECT id, date, type, amount, order_id FROM cash_flow").fetchall()
+        )
+        conn.close()
+    assert dumps[0] == dumps[1]
+
+
+def test_seeded_database_keeps_rollup_consistent(tmp_path):
+    from app.services.dashboard_service import rebuild_sales_rollup
+    path = str(tmp_path / 'bench.db')
+    build_database(path, orders=80, years=1, verbose=False)
+    conn = sqlite3.connect(path)
+    maintained = conn.execute("SELECT * FROM sales_rollup ORDER BY 1, 2, 3, 4").fetchall()
+    rebuild_sales_rollup(conn)
+    assert conn.execute("SELECT * FROM sales_rollup ORDER BY 1, 2, 3, 4").fetchall() == maintained
+    conn.close()
@@ -0,0 +1,46 @@
+from app.services.cache_service import VersionedCache, data_cache
+from app.services.dashboard_service import get_dashboard_data
+
+
+def test_entries_follow_the_version():
+    version = [1]
+    calls = []
+    cache = VersionedCache(4, version=lambda: version[0])
+    compute = lambda: calls.append(1) or len(calls)
+
+    assert cache.get_or_compute('a', compute) == 1
+    assert cache.get_or_compute('a', compute) == 1
+    version[0] = 2
+    assert cache.get_or_compute('a', compute) == 2
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VersionedCache(2, version=lambda: 1)
+    cache.get_or_compute('a', lambda: 'a')
+    cache.get_or_compute('b', lambda: 'b')
+    cache.get_or_compute('a', lambda: 'stale')
+    cache.get_or_compute('c', lambda: 'c')
+    assert cache.get_or_compute('a', lambda: 'new a') == 'a'
+    assert cache.get_or_compute('b', lambda: 'new b') == 'new b'
+    assert cache.stats()['evictions'] == 2
+
+
+def test_disabled_cache_always_computes():
+    cache = VersionedCache(0, version=lambda: 1)
+    values = iter([1, 2])
+    assert cache.get_or_compute('a', lambda: next(values)) == 1
+    assert cache.get_or_compute('a', lambda: next(values)) == 2
+
+
+def test_dashboard_is_recomputed_after_a_commit(empty_db):
+    first = get_dashboard_data()
+    hits = data_cache.stats()['hits']
+    assert get_dashboard_data() is first
+    assert data_cache.stats()['hits'] == hits + 1
+
+    empty_db.execute("INSERT INTO orders (os_number, client_name, valor_pago) VALUES ('C1', 'Ana', 80)")
+    empty_db.commit()
+    data = get_dashboard_data()
+    assert data is not first
+    assert data['totals']['total_orders'] == first['totals']['total_orders'] + 1
@@ -0,0 +1,59 @@
+from app.services.cashflow_service import calculate_balance, close_days
+
+
+def _movement(db, date, kind, amount):
+    db.execute(
+        "INSERT INTO cash_flow (date, type, category, amount) VALUES (?, ?, 'Teste', ?)",
+        (date, kind, amount)
+    )
+    db.commit()
+
+
+def _full_balance(db):
+    return db.execute("""
+        /* scan-ok */
+        SELECT COALESCE(SUM(CASE WHEN type = 'entrada' THEN amount ELSE -amount END), 0) FROM cash_flow
+    """).fetchone()[0]
+
+
+def test_closings_are_cumulative_and_stop_before_until_date(empty_db):
+    _movement(empty_db, '2026-01-01', 'entrada', 100)
+    _movement(empty_db, '2026-01-02', 'saida', 30)
+    _movement(empty_db, '2026-01-03', 'entrada', 50)
+
+    last = close_days('2026-01-03')
+    assert last['date'] == '2026-01-02'
+    assert (last['total_entries'], last['total_exits'], last['balance']) == (100, 30, 70)
+    assert empty_db.execute("SELECT COUNT(*) FROM cash_closings").fetchone()[0] == 2
+    assert calculate_balance()['balance'] == _full_balance(empty_db) == 120
+
+
+def test_balance_does_not_write(empty_db):
+    _movement(empty_db, '2026-01-01', 'entrada', 10)
+    calculate_balance()
+    assert empty_db.execute("SELECT COUNT(*) FROM cash_closings").fetchone()[0] == 0
+
+
+def test_changes_to_closed_days_drop_later_closings(empty_db):
+    _movement(empty_db, '2026-01-01', 'entrada', 100)
+    _movement(empty_db, '2026-01-05', 'entrada', 100)
+    close_days('2026-01-10')
+
+    _movement(empty_db, '2026-01-03', 'saida', 40)
+    assert [row[0] for row in empty_db.execute("SELECT date FROM cash_closings")] == ['2026-01-01']
+    empty_db.execute("UPDATE cash_flow SET amount = 60 WHERE date = '2026-01-01'")
+    empty_db.commit()
+    assert empty_db.execute("SELECT COUNT(*) FROM cash_closings").fetchone()[0] == 0
+
+    close_days('2026-01-10')
+    assert calculate_balance()['balance'] == _full_balance(empty_db) == 120
+    empty_db.execute("DELETE FROM cash_flow WHERE date = '2026-01-05'")
+    empty_db.commit()
+    assert calculate_balance()['balance'] == _full_balance(empty_db) == 20
+
+
+def test_close_cash_command(app, empty_db):
+    _movement(empty_db, '2026-01-01', 'entrada', 10)
+    result = app.test_cli_runner().invoke(args=['close-cash'])
+    assert result.exception is None
+    assert '2026-01-01' in result.output
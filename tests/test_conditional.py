@@ -0,0 +1,61 @@
+from datetime import date
+
+from app.routes import conditional
+
+
+def _order(db):
+    cursor = db.execute("INSERT INTO orders (os_number, client_name, exam_date) VALUES ('E1', 'Ana', '2026-01-10')")
+    db.commit()
+    return cursor.lastrowid
+
+
+def test_unchanged_order_answers_304(client, empty_db):
+    order_id = _order(empty_db)
+    url = f'/print/order/{order_id}'
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    second = client.get(url, headers={'If-None-Match': etag})
+    assert second.status_code == 304 and second.data == b''
+    assert second.headers['ETag'] == etag
+
+
+def test_changes_to_the_order_or_its_children_change_the_etag(client, empty_db):
+    order_id = _order(empty_db)
+    url = f'/details/{order_id}/download'
+    etags = [client.get(url).headers['ETag']]
+    empty_db.execute("INSERT INTO graus (order_id, eye, esf) VALUES (?, 'OD', '-1.00')", (order_id,))
+    empty_db.commit()
+    etags.append(client.get(url).headers['ETag'])
+    empty_db.execute("UPDATE orders SET client_name = 'Ana Maria' WHERE id = ?", (order_id,))
+    empty_db.commit()
+    response = client.get(url, headers={'If-None-Match': etags[-1]})
+    assert response.status_code == 200
+    assert len(set(etags + [response.headers['ETag']])) == 3
+
+
+def test_each_representation_has_its_own_etag(client, empty_db):
+    order_id = _order(empty_db)
+    url = f'/details/{order_id}/download'
+    assert client.get(url).headers['ETag'] != client.get(url + '?format=json').headers['ETag']
+
+
+def test_print_etag_changes_with_the_date(client, empty_db, monkeypatch):
+    order_id = _order(empty_db)
+    url = f'/print/order/{order_id}'
+    etag = client.get(url).headers['ETag']
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.fromordinal(date.today().toordinal() + 1)
+
+    monkeypatch.setattr(conditional, 'date', Tomorrow)
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_missing_order_is_not_cached(client, empty_db):
+    response = client.get('/print/order/999')
+    assert response.status_code == 302
+    assert 'ETag' not in response.headers
@@ -0,0 +1,49 @@
+from app.services.dashboard_service import get_sales_by_month, get_totals, rebuild_sales_rollup
+
+
+def _rollup(db):
+    return [tuple(row) for row in db.execute(
+        "SELECT * FROM sales_rollup ORDER BY month, store, lab, payment_status"
+    )]
+
+
+def _order(db, exam_date, valor_pago, lab='LabX', payment_status='Pendente'):
+    cursor = db.execute("""
+        INSERT INTO orders (os_number, client_name, lab, payment_status, valor_pago, exam_date)
+        VALUES ('D', 'Cliente', ?, ?, ?, ?)
+    """, (lab, payment_status, valor_pago, exam_date))
+    db.commit()
+    return cursor.lastrowid
+
+
+def test_triggers_match_full_rebuild(empty_db):
+    first = _order(empty_db, '2026-01-10', 100)
+    second = _order(empty_db, '2026-02-05', 250, lab='LabY')
+    third = _order(empty_db, 'sem data', 80)
+    _order(empty_db, '2026-02-20', 0)
+    empty_db.execute("UPDATE orders SET payment_status = 'Pago', valor_pago = 120 WHERE id = ?", (first,))
+    empty_db.execute("UPDATE orders SET exam_date = '2026-03-01', lab = 'LabZ' WHERE id = ?", (second,))
+    empty_db.execute("UPDATE orders SET deleted_at = '2026-03-02' WHERE id = ?", (third,))
+    empty_db.execute("DELETE FROM orders WHERE id = ?", (first,))
+    empty_db.commit()
+
+    maintained = _rollup(empty_db)
+    rebuild_sales_rollup(empty_db)
+    assert maintained == _rollup(empty_db)
+
+
+def test_dashboard_figures(empty_db):
+    _order(empty_db, '2026-01-10', 100)
+    _order(empty_db, '2026-01-20', 50, payment_status='Pago')
+    _order(empty_db, '2026-02-05', 30)
+    deleted = _order(empty_db, '2026-02-06', 999)
+    empty_db.execute("UPDATE orders SET deleted_at = '2026-02-07' WHERE id = ?", (deleted,))
+    empty_db.commit()
+
+    assert get_totals() == {'total_orders': 3, 'total_revenue': 180, 'pending_orders': 2}
+    assert get_sales_by_month(6) == (['Jan/2026', 'Feb/2026'], [150, 30])
+
+
+def test_dashboard_page(client, empty_db):
+    _order(empty_db, '2026-01-10', 100)
+    assert client.get('/dashboard').status_code == 200
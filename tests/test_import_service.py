@@ -0,0 +1,116 @@
+import io
+
+import pytest
+
+from app.services.import_service import (
+    ORDER_COLUMNS, ImportFormatError, _amount, import_orders, parse_row, read_rows
+)
+
+CSV = (
+    "Número da OS;Nome do Cliente;Loja;Forma de Pagamento;Parcelas;Valor Pago;Entrada;"
+    "Data do Exame;Custo do Laboratório;Lab Pago;OD_ESF;OE_ESF\n"
+    "101;Ana;Centro;Cartão de Crédito;3;300,00;0;10/01/2026;120,50;;-1,25;-1,50\n"
+    "102;Bruno;Centro;Dinheiro;0;150;150;2026-01-11;;;;\n"
+    ";Sem OS;Centro;;;10;;;;;;\n"
+    "103;Carla;Centro;PIX;0;abc;;;;;;\n"
+    "104;Davi;Centro;PIX;0;200;0;2026-01-12;80;sim;;\n"
+)
+
+
+def test_amount_brazilian_format_with_thousands_separator():
+    assert float(_amount('1.234,56')) == 1234.56
+    assert float(_amount('R$ 12.345.678,90')) == 12345678.90
+
+
+def test_amount_thousands_separator_without_decimals():
+    assert float(_amount('1.234')) == 1234
+    assert float(_amount('2.500.000')) == 2500000
+
+
+def test_amount_decimal_separators():
+    assert float(_amount('150,5')) == 150.5
+    assert float(_amount('99.90')) == 99.90
+    assert float(_amount('1,234.56')) == 1234.56
+    assert _amount(1200.0) == 1200.0
+
+
+def test_parse_row_reads_brazilian_amounts():
+    mapping = {'os_number': 0, 'client_name': 1, 'valor_pago': 2, 'entrada': 3}
+    order, _graus, error = parse_row(['10', 'Maria', '1.234,56', '234,56'], mapping)
+    assert error is None
+    assert order[ORDER_COLUMNS.index('valor_pago')] == 1234.56
+    assert order[ORDER_COLUMNS.index('entrada')] == 234.56
+
+
+def _csv(text=CSV):
+    return read_rows(io.BytesIO(text.encode('utf-8')), 'ordens.csv')
+
+
+def _count(db, table):
+    return db.execute(f"SELECT /* scan-ok */ COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_import_orders_reports_invalid_lines_and_imports_the_rest(empty_db):
+    result = import_orders(_csv())
+    assert result['imported'] == 3
+    assert result['graus'] == 2
+    assert [line for line, _error in result['errors']] == [4, 5]
+    assert 'OS' in result['errors'][0][1]
+    assert 'Valor Pago' in result['errors'][1][1]
+
+    rows = empty_db.execute("SELECT /* scan-ok */ os_number, client_name, valor_pago, exam_date FROM orders ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [
+        ('101', 'Ana', 300.0, '2026-01-10'), ('102', 'Bruno', 150.0, '2026-01-11'), ('104', 'Davi', 200.0, '2026-01-12'),
+    ]
+    graus = empty_db.execute("SELECT /* scan-ok */ eye, esf FROM graus ORDER BY eye").fetchall()
+    assert [tuple(row) for row in graus] == [('OD', '-1,25'), ('OE', '-1,50')]
+
+
+def test_import_orders_schedules_receivables_and_lab_payables(empty_db):
+    import_orders(_csv())
+    receivables = empty_db.execute("""
+        SELECT r.installment_number, r.amount, r.due_date FROM accounts_receivable r
+        JOIN orders o ON o.id = r.order_id WHERE o.os_number = '101' ORDER BY r.installment_number
+    """).fetchall()
+    assert [tuple(row) for row in receivables] == [
+        (1, 100.0, '2026-02-10'), (2, 100.0, '2026-03-10'), (3, 100.0, '2026-04-10'),
+    ]
+    # Só a ordem com custo e sem laboratório pago ganha a conta a pagar
+    payables = empty_db.execute("""
+        SELECT /* scan-ok */ o.os_number, p.amount, p.status FROM accounts_payable p JOIN orders o ON o.id = p.order_id
+    """).fetchall()
+    assert [tuple(row) for row in payables] == [('101', 120.5, 'Pendente')]
+
+
+def test_import_orders_dry_run_writes_nothing(empty_db):
+    result = import_orders(_csv(), dry_run=True)
+    assert result['imported'] == 3 and result['dry_run']
+    assert _count(empty_db, 'orders') == 0
+    assert _count(empty_db, 'accounts_receivable') == 0
+
+
+def test_import_orders_across_batches_uses_sequential_ids(empty_db):
+    lines = ''.join(f"{n};Cliente {n};Centro;PIX;0;10;;;;;;\n" for n in range(1, 8))
+    result = import_orders(_csv(CSV.split('\n')[0] + '\n' + lines), batch_size=3)
+    assert result['imported'] == 7
+    ids = [row[0] for row in empty_db.execute("SELECT /* scan-ok */ id FROM orders ORDER BY id")]
+    assert ids == list(range(ids[0], ids[0] + 7))
+
+
+def test_import_orders_is_all_or_nothing(empty_db):
+    def rows():
+        yield from _csv()
+        raise OSError("leitura interrompida")
+
+    with pytest.raises(OSError):
+        import_orders(rows(), batch_size=1)
+    assert _count(empty_db, 'orders') == 0
+    assert _count(empty_db, 'graus') == 0
+    assert _count(empty_db, 'accounts_payable') == 0
+
+
+def test_import_orders_requires_the_key_columns():
+    with pytest.raises(ImportFormatError, match='client_name'):
+        import_orders(_csv("OS;Telefone\n1;9999\n"))
+    with pytest.raises(ImportFormatError):
+        read_rows(io.BytesIO(b''), 'ordens.txt')
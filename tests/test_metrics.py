@@ -0,0 +1,71 @@
+import sqlite3
+
+from app.models.instrumentation import InstrumentedConnection, QueryRecord, normalize_sql
+from app.routes import debug_routes
+from app.services.metrics_service import MAX_TRACKED_STATEMENTS, MetricsRegistry
+
+
+def _query(sql, duration_ms, rows=0):
+    record = QueryRecord(sql)
+    record.duration_ms, record.rows = duration_ms, rows
+    return record
+
+
+def test_instrumented_connection_records_statements():
+    queries = []
+    conn = InstrumentedConnection(sqlite3.connect(':memory:'), queries)
+    conn.execute("CREATE TABLE t (x)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,), (3,)])
+    rows = conn.execute("""
+        SELECT x
+        FROM t   WHERE x > ?
+    """, (1,)).fetchall()
+    assert len(rows) == 2
+    assert [q.sql for q in queries][-1] == 'SELECT x FROM t WHERE x > ?'
+    assert [q.rows for q in queries] == [0, 3, 2]
+    assert all(q.duration_ms >= 0 for q in queries)
+
+
+def test_normalize_sql_limits_length():
+    assert normalize_sql('SELECT\n  1') == 'SELECT 1'
+    assert len(normalize_sql('SELECT ' + 'x, ' * 1000)) == 500
+
+
+def test_registry_percentiles_and_slowest_statements():
+    registry = MetricsRegistry()
+    for ms in range(1, 101):
+        registry.record_request('main.index', 200, ms, [_query('SELECT fast', 0.1)])
+    registry.record_request('main.index', 500, 1, [_query('SELECT slow', 50, rows=7)])
+
+    snapshot = registry.snapshot()
+    route = snapshot['routes']['main.index']
+    assert route['requests'] == 101 and route['errors'] == 1
+    assert 49 <= route['p50_ms'] <= 51
+    assert route['queries_per_request'] == 1
+    slowest = snapshot['slowest_statements'][0]
+    assert (slowest['sql'], slowest['max_ms'], slowest['avg_rows']) == ('SELECT slow', 50, 7)
+
+
+def test_registry_caps_tracked_statements():
+    registry = MetricsRegistry()
+    queries = [_query(f'SELECT {i}', 1) for i in range(MAX_TRACKED_STATEMENTS + 10)]
+    registry.record_request('main.index', 200, 1, queries)
+    assert len(registry._statements) == MAX_TRACKED_STATEMENTS
+
+
+def test_debug_routes_need_debug_mode_or_metrics(client, monkeypatch):
+    monkeypatch.setattr(debug_routes, 'DEBUG_MODE', False)
+    monkeypatch.setattr(debug_routes, 'METRICS_ENABLED', False)
+    assert client.get('/debug/metrics').status_code == 404
+    assert client.get('/debug/query-plans').status_code == 404
+
+    monkeypatch.setattr(debug_routes, 'METRICS_ENABLED', True)
+    response = client.get('/debug/metrics')
+    assert response.status_code == 200
+    assert 'pool' in response.get_json()
+
+
+def test_debug_routes_need_settings_permission(client):
+    with client.session_transaction() as session:
+        session['role'] = 'operador'
+    assert client.get('/debug/metrics').status_code == 403
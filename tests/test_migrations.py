@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from app.migrations import runner
+from app.migrations.runner import LATEST_VERSION, MIGRATIONS, get_schema_version, run_migrations
+from app.migrations.utils import add_column_if_missing, execute_script
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'migrations.db'))
+    yield conn
+    conn.close()
+
+
+def _names(conn, kind):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+
+
+def test_new_database_reaches_latest_version(conn):
+    assert run_migrations(conn) == LATEST_VERSION == get_schema_version(conn)
+    assert {'orders', 'graus', 'cash_flow', 'sales_rollup', 'cash_closings', 'change_log',
+            'accounts_receivable', 'accounts_payable'} <= _names(conn, 'table')
+    assert {'idx_orders_deleted_id', 'idx_payable_status_due'} <= _names(conn, 'index')
+    assert 'payable_orders_lab_paid' not in _names(conn, 'trigger')
+
+
+def test_up_to_date_database_is_left_alone(conn):
+    run_migrations(conn)
+    schema = conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+    assert run_migrations(conn) == LATEST_VERSION
+    assert conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema
+
+
+def test_later_migrations_backfill_existing_rows(conn, monkeypatch):
+    monkeypatch.setattr(runner, 'MIGRATIONS', MIGRATIONS[:3])
+    monkeypatch.setattr(runner, 'LATEST_VERSION', 3)
+    assert run_migrations(conn) == 3
+    conn.execute("""
+        INSERT INTO orders (os_number, client_name, valor_pago, exam_date)
+        VALUES ('77', 'Joana', 150, '2026-01-10')
+    """)
+    conn.commit()
+
+    monkeypatch.setattr(runner, 'MIGRATIONS', MIGRATIONS)
+    monkeypatch.setattr(runner, 'LATEST_VERSION', LATEST_VERSION)
+    assert run_migrations(conn) == LATEST_VERSION
+    assert conn.execute("SELECT rowid FROM orders_fts WHERE orders_fts MATCH 'joana'").fetchall() == [(1,)]
+    assert conn.execute("SELECT month, order_count, revenue FROM sales_rollup").fetchall() == [('2026-01', 1, 150)]
+
+
+def test_failed_migration_is_rolled_back(conn, monkeypatch):
+    def broken(db):
+        db.execute("CREATE TABLE half_done (x)")
+        db.execute("SELECT * FROM missing_table")
+
+    migrations = MIGRATIONS + [(LATEST_VERSION + 1, 'Quebrada', broken)]
+    monkeypatch.setattr(runner, 'MIGRATIONS', migrations)
+    monkeypatch.setattr(runner, 'LATEST_VERSION', LATEST_VERSION + 1)
+    with pytest.raises(sqlite3.OperationalError):
+        run_migrations(conn)
+    assert get_schema_version(conn) == LATEST_VERSION
+    assert 'half_done' not in _names(conn, 'table')
+
+
+def test_execute_script_keeps_trigger_bodies_together(conn):
+    conn.execute("BEGIN")
+    execute_script(conn, """
+        CREATE TABLE a (x);
+        CREATE TABLE b (x);
+        CREATE TRIGGER a_ai AFTER INSERT ON a
+        BEGIN
+            INSERT INTO b VALUES (NEW.x);
+            INSERT INTO b VALUES (NEW.x * 2);
+        END;
+    """)
+    conn.execute("INSERT INTO a VALUES (3)")
+    assert conn.execute("SELECT x FROM b ORDER BY x").fetchall() == [(3,), (6,)]
+    conn.rollback()
+    assert 'a' not in _names(conn, 'table')
+
+
+def test_add_column_if_missing(conn):
+    conn.execute("CREATE TABLE t (x)")
+    assert add_column_if_missing(conn, 't', 'y', 'TEXT')
+    assert not add_column_if_missing(conn, 't', 'y', 'TEXT')
@@ -0,0 +1,60 @@
+from app.routes.main_routes import fetch_orders_page
+
+
+def _orders(db, count, **fields):
+    for i in range(count):
+        db.execute("""
+            INSERT INTO orders (os_number, client_name, store, payment_status, payment_method)
+            VALUES (?, ?, ?, ?, ?)
+        """, (f'L{i}', f'Cliente {i}', fields.get('store', 'Loja A'),
+              fields.get('payment_status', 'Pendente'), fields.get('payment_method', 'Dinheiro')))
+    db.commit()
+
+
+def test_keyset_pages_cover_all_orders_once(empty_db):
+    _orders(empty_db, 7)
+    seen, before = [], None
+    while True:
+        orders, before = fetch_orders_page(empty_db, before=before, limit=3)
+        seen += [order['id'] for order in orders]
+        if before is None:
+            break
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_last_page_has_no_cursor(empty_db):
+    _orders(empty_db, 3)
+    orders, next_cursor = fetch_orders_page(empty_db, limit=3)
+    assert len(orders) == 3
+    assert next_cursor is None
+
+
+def test_filters_and_deleted_orders(empty_db):
+    _orders(empty_db, 2, store='Loja A')
+    _orders(empty_db, 2, store='Loja B', payment_status='Pago', payment_method='Cartão de Crédito')
+    empty_db.execute("UPDATE orders SET deleted_at = '2026-01-01' WHERE id = 1")
+    empty_db.commit()
+
+    assert [o['id'] for o in fetch_orders_page(empty_db)[0]] == [4, 3, 2]
+    assert [o['id'] for o in fetch_orders_page(empty_db, filter_store='Loja A')[0]] == [2]
+    assert [o['id'] for o in fetch_orders_page(empty_db, status='pago_cartao')[0]] == [4, 3]
+    assert fetch_orders_page(empty_db, status='pago_dinheiro')[0] == []
+
+
+def test_listing_uses_index(empty_db):
+    plan = ' '.join(row[3] for row in empty_db.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT * FROM orders WHERE deleted_at IS NULL AND store = ? AND id < ? ORDER BY id DESC LIMIT 51
+    """, ('Loja A', 100)))
+    assert 'idx_orders_deleted_store_id' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_api_orders_returns_cursor(client, empty_db):
+    _orders(empty_db, 5)
+    data = client.get('/api/orders?limit=2').get_json()
+    assert [o['id'] for o in data['orders']] == [5, 4]
+    assert data['next_cursor'] == 4
+    data = client.get('/api/orders?limit=2&before=4').get_json()
+    assert [o['id'] for o in data['orders']] == [3, 2]
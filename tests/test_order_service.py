@@ -0,0 +1,97 @@
+import pytest
+
+from app.services import order_service
+from app.services.order_service import bulk_update_orders
+from app.services.payable_service import sync_lab_payables
+
+
+def _order(db, os_number, valor_pago=100, **columns):
+    columns = {'os_number': os_number, 'client_name': 'Cliente', 'valor_pago': valor_pago,
+               'exam_date': '2026-01-10', **columns}
+    cursor = db.execute(f"INSERT INTO orders ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        list(columns.values()))
+    db.commit()
+    return cursor.lastrowid
+
+
+def test_mark_paid_posts_the_open_balance_to_the_cash_flow(empty_db):
+    partial = _order(empty_db, 'A', 200, payment_status='Pendente', payment_method='PIX')
+    empty_db.execute("INSERT INTO partial_payments (order_id, amount, payment_date) VALUES (?, 50, '2026-01-10')",
+                     (partial,))
+    empty_db.commit()
+    pending = _order(empty_db, 'B', 100, payment_status='Pendente')
+    paid = _order(empty_db, 'C', 80, payment_status='Pago')
+
+    result = bulk_update_orders([partial, pending, paid], 'mark_paid', payment_method='Dinheiro',
+                                payment_date='2026-02-01')
+    assert result == {'action': 'mark_paid', 'updated': 2, 'cash_entries': 2, 'cash_total': 250}
+
+    entries = empty_db.execute("""
+        SELECT /* scan-ok */ order_id, amount, date, payment_method FROM cash_flow WHERE category = 'Pagamento OS' ORDER BY order_id
+    """).fetchall()
+    assert [tuple(row) for row in entries] == [
+        (partial, 150, '2026-02-01', 'Dinheiro'), (pending, 100, '2026-02-01', 'Dinheiro'),
+    ]
+    balance = empty_db.execute("SELECT SUM(amount) FROM partial_payments WHERE order_id = ?", (partial,)).fetchone()[0]
+    assert balance == 200
+    statuses = empty_db.execute("SELECT payment_status FROM orders WHERE id IN (?, ?)", (partial, pending)).fetchall()
+    assert [row[0] for row in statuses] == ['Pago', 'Pago']
+
+
+def test_mark_pending_schedules_the_installments_again(empty_db):
+    order_id = _order(empty_db, 'A', 300, payment_status='Pago', payment_method='Boleto', installments=3)
+    assert bulk_update_orders([order_id], 'mark_pending')['updated'] == 1
+    amounts = empty_db.execute("SELECT amount FROM accounts_receivable WHERE order_id = ?", (order_id,)).fetchall()
+    assert [row[0] for row in amounts] == [100, 100, 100]
+
+
+def test_lab_paid_settles_the_lab_bill_with_a_cash_exit(empty_db):
+    order_id = _order(empty_db, 'A', 300, lab='Lab Sul', lab_cost=90)
+    sync_lab_payables(empty_db, [order_id])
+    empty_db.commit()
+
+    result = bulk_update_orders([order_id], 'lab_paid', payment_method='PIX', payment_date='2026-02-01')
+    assert result['updated'] == 1
+    bill = empty_db.execute("SELECT status, payment_date FROM accounts_payable WHERE order_id = ?",
+                            (order_id,)).fetchone()
+    assert tuple(bill) == ('Pago', '2026-02-01')
+    exit_ = empty_db.execute("SELECT type, category, amount, date FROM cash_flow WHERE order_id = ?",
+                             (order_id,)).fetchone()
+    assert tuple(exit_) == ('saida', 'Laboratório', 90, '2026-02-01')
+    assert bulk_update_orders([order_id], 'lab_paid')['updated'] == 0
+
+
+def test_delete_soft_deletes_and_skips_deleted_orders_afterwards(empty_db):
+    order_id = _order(empty_db, 'A')
+    assert bulk_update_orders([order_id, str(order_id)], 'delete')['updated'] == 1
+    assert empty_db.execute("SELECT deleted_at FROM orders WHERE id = ?", (order_id,)).fetchone()[0]
+    assert bulk_update_orders([order_id], 'mark_paid') == {
+        'action': 'mark_paid', 'updated': 0, 'cash_entries': 0, 'cash_total': 0,
+    }
+
+
+def test_bulk_update_validates_action_and_ids(empty_db, monkeypatch):
+    with pytest.raises(ValueError, match='Ação inválida'):
+        bulk_update_orders([1], 'archive')
+    with pytest.raises(ValueError, match='inválido'):
+        bulk_update_orders(['x'], 'delete')
+    with pytest.raises(ValueError, match='Nenhuma'):
+        bulk_update_orders([], 'delete')
+    monkeypatch.setattr(order_service, 'BULK_MAX_ORDERS', 2)
+    with pytest.raises(ValueError, match='No máximo 2'):
+        bulk_update_orders([1, 2, 3], 'delete')
+
+
+def test_bulk_route_json_and_form(client, empty_db):
+    order_id = _order(empty_db, 'A', 120, payment_status='Pendente')
+    response = client.post('/orders/bulk', json={'action': 'mark_paid', 'ids': [order_id]})
+    assert response.status_code == 200
+    assert response.get_json()['cash_total'] == 120
+
+    response = client.post('/orders/bulk', json={'action': 'mark_paid', 'ids': []})
+    assert response.status_code == 400
+    assert 'Nenhuma' in response.get_json()['error']
+
+    response = client.post('/orders/bulk', data={'action': 'delete', 'ids': [order_id], 'next': 'https://example.com/'})
+    assert response.status_code == 302
+    assert response.headers['Location'] == '/'
@@ -0,0 +1,118 @@
+import pytest
+from flask import g
+
+from app.models import database, FEDERATED, get_partition_db, locate_partitions, allocate_order_ids
+from app.models.partitions import (
+    PARTITION_ID_SPAN, create_partition, load_partitions, move_store_rows
+)
+from app.services.payable_service import sync_lab_payables
+from app.services.receivable_service import schedule_receivables
+
+COUNT_SQL = "SELECT /* scan-ok */ COUNT(*) FROM {}"
+
+
+def _order(db, os_number, store, **columns):
+    columns = {'os_number': os_number, 'client_name': f'Cliente {os_number}', 'store': store,
+               'valor_pago': 300, 'exam_date': '2026-01-10', **columns}
+    order_id = db.execute(f"INSERT INTO orders ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                          list(columns.values())).lastrowid
+    db.execute("INSERT INTO graus (order_id, lens_for, eye, esf) VALUES (?, 'longe', 'OD', '-1,00')", (order_id,))
+    return order_id
+
+
+@pytest.fixture
+def partitioned(app, empty_db, tmp_path, monkeypatch):
+    """Ordens das lojas Centro e Norte, com a Centro movida para uma partição"""
+    db = empty_db.raw if hasattr(empty_db, 'raw') else empty_db
+    centro = _order(db, 'C1', 'Centro', payment_method='Cartão de Crédito', installments=3,
+                    lab='Lab Sul', lab_cost=90)
+    db.execute("INSERT INTO partial_payments (order_id, amount, payment_date) VALUES (?, 30, '2026-01-10')", (centro,))
+    db.execute("""
+        INSERT INTO cash_flow (date, type, category, description, amount, order_id)
+        VALUES ('2026-01-10', 'entrada', 'Pagamento OS', 'Entrada', 30, ?)
+    """, (centro,))
+    schedule_receivables(db, [centro])
+    sync_lab_payables(db, [centro])
+    norte = _order(db, 'N1', 'Norte')
+    db.commit()
+    revenue = db.execute("SELECT SUM(revenue) FROM sales_rollup").fetchone()[0]
+
+    directory = str(tmp_path / 'lojas')
+    number, path = create_partition(db, 'Centro', directory)
+    moved = move_store_rows(db, number, 'Centro', path)
+    monkeypatch.setattr(database, 'STORE_PARTITIONS', True)
+    monkeypatch.setattr(database, '_partitions', load_partitions(db, directory))
+    return {'db': db, 'number': number, 'path': path, 'moved': moved, 'directory': directory,
+            'centro': centro, 'norte': norte, 'revenue': revenue}
+
+
+def test_move_store_rows_moves_the_order_and_its_children(partitioned):
+    db, number = partitioned['db'], partitioned['number']
+    assert partitioned['moved'] == 1
+    assert partitioned['path'].endswith('01_centro.db')
+    part = get_partition_db(number)
+    for table in ('graus', 'partial_payments', 'cash_flow', 'accounts_receivable', 'accounts_payable'):
+        rows = part.execute(f"SELECT /* scan-ok */ order_id FROM {table}").fetchall()
+        assert {row[0] for row in rows} == {partitioned['centro']}, table
+        main_rows = db.execute(f"SELECT /* scan-ok */ COUNT(*) FROM {table} WHERE order_id = ?",
+                               (partitioned['centro'],)).fetchone()[0]
+        assert main_rows == 0, table
+    assert [row[0] for row in db.execute("SELECT /* scan-ok */ store FROM orders")] == ['Norte']
+    assert part.execute(COUNT_SQL.format('accounts_receivable')).fetchone()[0] == 3
+
+
+def test_create_partition_is_idempotent_and_limited(partitioned, monkeypatch):
+    db = partitioned['db']
+    assert create_partition(db, 'Centro', partitioned['directory']) == (partitioned['number'], partitioned['path'])
+    monkeypatch.setattr('app.models.partitions.MAX_PARTITIONS', 1)
+    with pytest.raises(ValueError, match='No máximo'):
+        create_partition(db, 'Norte', partitioned['directory'])
+
+
+def test_federated_reads_union_every_partition(partitioned):
+    federated = get_partition_db(FEDERATED)
+    assert federated.execute(COUNT_SQL.format('orders')).fetchone()[0] == 2
+    assert federated.execute(COUNT_SQL.format('graus')).fetchone()[0] == 2
+    # O consolidado de cada arquivo acompanha a mudança pelos gatilhos
+    assert federated.execute("SELECT /* scan-ok */ SUM(revenue) FROM sales_rollup").fetchone()[0] == \
+        partitioned['revenue']
+
+
+def test_locate_partitions_and_id_allocation(partitioned):
+    centro, norte, number = partitioned['centro'], partitioned['norte'], partitioned['number']
+    assert locate_partitions('orders', [centro, norte, 999]) == {centro: number, norte: 0}
+    assert database.partition_for_store('Centro') == number
+    assert database.partition_for_store('Norte') == 0
+
+    start = allocate_order_ids(2)
+    assert start == norte + 1
+    assert allocate_order_ids() == start + 2
+    part = get_partition_db(number)
+    part.execute("INSERT INTO orders (id, os_number, client_name, store) VALUES (?, 'C2', 'Bia', 'Centro')", (start,))
+    grau = part.execute("INSERT INTO graus (order_id, eye) VALUES (?, 'OD')", (start,)).lastrowid
+    part.commit()
+    # Filhos criados na partição N começam em N * PARTITION_ID_SPAN
+    assert grau > number * PARTITION_ID_SPAN
+
+
+def _partition_of(app, *args, **kwargs):
+    # Os contextos de teste reaproveitam o g do contexto de empty_db
+    with app.test_request_context(*args, **kwargs):
+        g.pop('db', None)
+        g.pop('partition', None)
+        return database.current_partition()
+
+
+def test_requests_use_the_partition_that_owns_the_data(app, partitioned):
+    number = partitioned['number']
+    assert _partition_of(app, f"/print/order/{partitioned['centro']}") == number
+    assert _partition_of(app, f"/print/order/{partitioned['norte']}") == 0
+    assert _partition_of(app, '/', method='POST', data={'store': 'Centro'}) == number
+    assert _partition_of(app, '/', method='POST') == 0
+    assert _partition_of(app, '/') == FEDERATED
+
+    g.pop('db', None)
+    g.pop('partition', None)
+    response = app.test_client().get(f"/print/order/{partitioned['centro']}")
+    assert response.status_code == 200
+    assert 'Cliente C1' in response.get_data(as_text=True)
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import g
+
+from app.models import database
+from app.models.partitions import create_partition, load_partitions, move_store_rows
+from app.services.payable_service import (
+    create_lab_payables, get_open_payables, get_upcoming_payables, settle_payables, sync_lab_payables
+)
+
+TODAY = datetime.now().strftime('%Y-%m-%d')
+
+
+def _day(days):
+    return (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def _order(db, os_number, **columns):
+    columns = {'os_number': os_number, 'client_name': 'Ana', 'valor_pago': 300, 'lab': 'Lab Sul', **columns}
+    order_id = db.execute(f"INSERT INTO orders ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                          list(columns.values())).lastrowid
+    db.commit()
+    return order_id
+
+
+def _bill(db, order_id):
+    row = db.execute("SELECT id, amount, status, payment_date FROM accounts_payable WHERE order_id = ?",
+                     (order_id,)).fetchone()
+    return tuple(row) if row else None
+
+
+def _exits(db, order_id):
+    rows = db.execute("SELECT category, amount, date FROM cash_flow WHERE order_id = ? AND type = 'saida'",
+                      (order_id,)).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def _payable(db, description, amount, due_date, category=None):
+    payable_id = db.execute("""
+        INSERT INTO accounts_payable (description, supplier, amount, due_date, status, category)
+        VALUES (?, 'Fornecedor', ?, ?, 'Pendente', ?)
+    """, (description, amount, due_date, category)).lastrowid
+    db.commit()
+    return payable_id
+
+
+def test_sync_lab_payables_follows_the_lab_cost(empty_db):
+    billed = _order(empty_db, '1', lab_cost=90)
+    without_cost = _order(empty_db, '2')
+    paid = _order(empty_db, '3', lab_cost=50, lab_paid=1)
+    assert sync_lab_payables(empty_db, [billed, without_cost, paid]) == 1
+    bill_id, amount, status, _date = _bill(empty_db, billed)
+    assert (amount, status) == (90, 'Pendente')
+    assert _bill(empty_db, without_cost) is None and _bill(empty_db, paid) is None
+
+    empty_db.execute("UPDATE orders SET lab_cost = 120, lab = 'Lab Norte' WHERE id = ?", (billed,))
+    assert sync_lab_payables(empty_db, [billed]) == 0
+    row = empty_db.execute("SELECT id, amount, supplier FROM accounts_payable WHERE order_id = ?", (billed,)).fetchone()
+    assert tuple(row) == (bill_id, 120, 'Lab Norte')
+
+
+def test_create_lab_payables_skips_paid_deleted_and_billed_orders(empty_db):
+    open_order = _order(empty_db, '1')
+    paid = _order(empty_db, '2', lab_paid=1)
+    deleted = _order(empty_db, '3', deleted_at='2026-01-01')
+    assert create_lab_payables([(open_order, 80), (paid, 80), (deleted, 80)], '2026-02-01') == 1
+    assert create_lab_payables([(open_order, 80)]) == 0
+    row = empty_db.execute("SELECT /* scan-ok */ supplier, due_date, description FROM accounts_payable").fetchone()
+    assert tuple(row) == ('Lab Sul', '2026-02-01', 'Laboratório - OS #1')
+
+    with pytest.raises(ValueError, match='Valor inválido'):
+        create_lab_payables([(open_order, 0)])
+    with pytest.raises(ValueError, match='Nenhuma'):
+        create_lab_payables([])
+
+
+def test_settle_payables_posts_the_exits_and_marks_the_lab_paid(empty_db):
+    order_id = _order(empty_db, '1', lab_cost=90)
+    sync_lab_payables(empty_db, [order_id])
+    empty_db.commit()
+    bill_id = _bill(empty_db, order_id)[0]
+    rent = _payable(empty_db, 'Aluguel', 1500, _day(3))
+
+    result = settle_payables([f'0:{bill_id}', f'0:{rent}', f'0:{rent}'], '2026-02-01', 'PIX')
+    assert result == {'settled': 2, 'total': 1590}
+    assert _bill(empty_db, order_id)[2:] == ('Pago', '2026-02-01')
+    assert _exits(empty_db, order_id) == [('Laboratório', 90, '2026-02-01')]
+    rent_exit = empty_db.execute("SELECT category, description FROM cash_flow WHERE order_id IS NULL").fetchone()
+    assert tuple(rent_exit) == ('Contas a pagar', 'Aluguel - Fornecedor')
+    assert empty_db.execute("SELECT lab_paid FROM orders WHERE id = ?", (order_id,)).fetchone()[0] == 1
+    # Contas já pagas não geram outra saída
+    assert settle_payables([f'0:{bill_id}'])['settled'] == 0
+
+
+def test_settle_payables_validates_date_and_keys(empty_db):
+    with pytest.raises(ValueError, match='Data inválida'):
+        settle_payables(['0:1'], '31/02/2026')
+    for keys in (['abc'], ['1'], ['9:1']):
+        with pytest.raises(ValueError, match='Conta inválida'):
+            settle_payables(keys)
+    with pytest.raises(ValueError, match='Nenhuma'):
+        settle_payables([])
+
+
+def test_unchecking_lab_paid_reopens_the_bill_and_removes_the_exit(empty_db):
+    order_id = _order(empty_db, '1', lab_cost=90)
+    sync_lab_payables(empty_db, [order_id])
+    empty_db.commit()
+    settle_payables([f'0:{_bill(empty_db, order_id)[0]}'], '2026-02-01')
+    other_exit = empty_db.execute("""
+        INSERT INTO cash_flow (date, type, category, description, amount, order_id)
+        VALUES ('2026-02-01', 'saida', 'Laboratório', 'Outro ajuste', 15, ?)
+    """, (order_id,)).lastrowid
+    empty_db.commit()
+
+    empty_db.execute("UPDATE orders SET lab_paid = 0 WHERE id = ?", (order_id,))
+    empty_db.commit()
+    assert _bill(empty_db, order_id)[2:] == ('Pendente', None)
+    assert [row[0] for row in empty_db.execute("SELECT id FROM cash_flow WHERE order_id = ?", (order_id,))] == \
+        [other_exit]
+
+
+def test_deleting_the_order_cancels_its_open_bill(empty_db):
+    order_id = _order(empty_db, '1', lab_cost=90)
+    sync_lab_payables(empty_db, [order_id])
+    empty_db.execute("UPDATE orders SET deleted_at = '2026-01-01' WHERE id = ?", (order_id,))
+    assert _bill(empty_db, order_id)[2] == 'Cancelada'
+    empty_db.execute("UPDATE orders SET deleted_at = NULL WHERE id = ?", (order_id,))
+    assert _bill(empty_db, order_id)[2] == 'Pendente'
+
+
+def test_open_and_upcoming_payables(empty_db):
+    overdue = _payable(empty_db, 'Luz', 100, _day(-2))
+    soon = _payable(empty_db, 'Água', 50, _day(5))
+    _payable(empty_db, 'Aluguel', 1500, _day(30))
+    paid = _payable(empty_db, 'Internet', 99, _day(1))
+    settle_payables([f'0:{paid}'])
+
+    payables = get_open_payables()
+    assert [p['description'] for p in payables] == ['Luz', 'Água', 'Aluguel']
+    assert [p['overdue'] for p in payables] == [True, False, False]
+    assert payables[0]['key'] == f'0:{overdue}'
+    # Totais de todas as contas do filtro, mesmo além de limit
+    limited = get_open_payables(limit=1)
+    assert len(limited) == 1 and (limited[0]['open_count'], limited[0]['open_total']) == (3, 1650)
+
+    upcoming = get_upcoming_payables(7)
+    assert [p['key'] for p in upcoming['payables']] == [f'0:{overdue}', f'0:{soon}']
+    assert (upcoming['count'], upcoming['total'], upcoming['overdue']) == (2, 150, 1)
+
+
+def test_edit_order_settles_and_reopens_the_lab_bill(client, empty_db):
+    order_id = _order(empty_db, '1', lab_cost=90)
+    sync_lab_payables(empty_db, [order_id])
+    empty_db.commit()
+    form = {'os_number': '1', 'client_name': 'Ana', 'lab': 'Lab Sul', 'lab_cost': '90', 'valor_pago': '300',
+            'exam_date': TODAY}
+
+    assert client.post(f'/edit/{order_id}', data=dict(form, lab_paid='on')).status_code == 302
+    assert _bill(empty_db, order_id)[2:] == ('Pago', TODAY)
+    assert _exits(empty_db, order_id) == [('Laboratório', 90, TODAY)]
+
+    assert client.post(f'/edit/{order_id}', data=form).status_code == 302
+    assert _bill(empty_db, order_id)[2:] == ('Pendente', None)
+    assert _exits(empty_db, order_id) == []
+
+
+def test_partition_bills_use_partition_keys(app, empty_db, tmp_path, monkeypatch):
+    order_id = _order(empty_db, '1', store='Centro', lab_cost=90)
+    sync_lab_payables(empty_db, [order_id])
+    empty_db.commit()
+    raw = empty_db.raw if hasattr(empty_db, 'raw') else empty_db
+    number, path = create_partition(raw, 'Centro', str(tmp_path / 'lojas'))
+    move_store_rows(raw, number, 'Centro', path)
+    monkeypatch.setattr(database, 'STORE_PARTITIONS', True)
+    monkeypatch.setattr(database, '_partitions', load_partitions(raw, str(tmp_path / 'lojas')))
+
+    # Leitura federada: as contas de todas as lojas, com a partição na chave
+    with app.test_request_context('/payables/'):
+        # O contexto de teste reaproveita o g do contexto de empty_db
+        g.pop('db', None)
+        g.pop('partition', None)
+        keys = [p['key'] for p in get_open_payables()]
+    assert len(keys) == 1 and keys[0].startswith(f'{number}:')
+
+    assert settle_payables(keys, '2026-02-01')['settled'] == 1
+    part = database.get_partition_db(number)
+    assert _bill(part, order_id)[2:] == ('Pago', '2026-02-01')
+    assert _exits(part, order_id) == [('Laboratório', 90, '2026-02-01')]
+    assert part.execute("SELECT lab_paid FROM orders WHERE id = ?", (order_id,)).fetchone()[0] == 1
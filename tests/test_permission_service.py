@@ -0,0 +1,68 @@
+import pytest
+
+from app.services import permission_service
+from app.services.permission_service import (
+    compile_permissions, has_permission, invalidate_permissions, update_role_permissions
+)
+
+
+def _role_id(db, name):
+    return db.execute("SELECT id FROM roles WHERE name = ?", (name,)).fetchone()[0]
+
+
+def _permission_id(db, resource, action):
+    return db.execute("SELECT id FROM permissions WHERE resource = ? AND action = ?",
+                      (resource, action)).fetchone()[0]
+
+
+def test_compile_permissions_builds_one_bitset_per_role(empty_db):
+    operador = _role_id(empty_db, 'operador')
+    empty_db.execute("INSERT INTO role_permissions (role_id, permission_id) VALUES (?, ?)",
+                     (operador, _permission_id(empty_db, 'orders', 'update')))
+
+    matrix = compile_permissions(empty_db)
+    total = empty_db.execute("SELECT COUNT(*) FROM permissions").fetchone()[0]
+    assert matrix.masks['admin'] == (1 << total) - 1
+    assert matrix.masks['operador'] == matrix.masks[operador] == 1 << matrix.bits[('orders', 'update')]
+    assert matrix.permissions('operador') == [('orders', 'update')]
+    assert matrix.allows('operador', 'orders', 'update')
+    assert not matrix.allows('operador', 'orders', 'delete')
+    assert not matrix.allows('gerente', 'orders', 'update')
+    assert not matrix.allows('desconhecida', 'orders', 'update')
+    assert not matrix.allows('admin', 'orders', 'inexistente')
+
+
+def test_has_permission_uses_the_compiled_matrix_until_invalidated(empty_db):
+    operador = _role_id(empty_db, 'operador')
+    assert not has_permission('operador', 'orders', 'update')
+    empty_db.execute("INSERT INTO role_permissions (role_id, permission_id) VALUES (?, ?)",
+                     (operador, _permission_id(empty_db, 'orders', 'update')))
+    empty_db.commit()
+    assert not has_permission('operador', 'orders', 'update')
+    invalidate_permissions()
+    assert has_permission('operador', 'orders', 'update')
+
+
+def test_update_role_permissions_invalidates_the_matrix(empty_db):
+    gerente = _role_id(empty_db, 'gerente')
+    assert not has_permission('gerente', 'orders', 'delete')
+    update_role_permissions(gerente, [_permission_id(empty_db, 'orders', 'delete')])
+    assert permission_service._matrix is None
+    assert has_permission('gerente', 'orders', 'delete')
+
+    with pytest.raises(ValueError):
+        update_role_permissions(_role_id(empty_db, 'admin'), [])
+
+
+def test_require_permission_answers_403(client, empty_db):
+    with client.session_transaction() as session:
+        session['role'] = 'operador'
+    response = client.post('/orders/bulk', json={'action': 'mark_paid', 'ids': [1]})
+    assert response.status_code == 403
+
+    update_role_permissions(_role_id(empty_db, 'operador'), [_permission_id(empty_db, 'orders', 'update')])
+    response = client.post('/orders/bulk', json={'action': 'mark_paid', 'ids': [1]})
+    assert response.status_code == 200
+    # Excluir em lote exige também orders/delete
+    response = client.post('/orders/bulk', json={'action': 'delete', 'ids': [1]})
+    assert response.status_code == 403
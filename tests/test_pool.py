@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.models.pool import ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), max_size=2, timeout=0.1)
+    yield pool
+    pool.close_all()
+
+
+def test_connections_are_reused_and_configured(pool):
+    conn = pool.acquire()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert pool.stats()['connections_created'] == 1
+
+
+def test_release_rolls_back_open_transaction(pool):
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool.release(conn)
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_full_pool_waits_then_times_out(pool):
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    timer = threading.Timer(0.02, pool.release, (first,))
+    timer.start()
+    assert pool.acquire() is first
+    timer.join()
+    stats = pool.stats()
+    assert (stats['waits'], stats['timeouts'], stats['in_use']) == (2, 1, 2)
+    pool.release(second)
+
+
+def test_data_version_sees_commits_of_other_connections(pool):
+    before = pool.data_version()
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x)")
+    conn.commit()
+    pool.release(conn)
+    assert pool.data_version() != before
+
+
+def test_foreign_keys_are_enforced(empty_db):
+    with pytest.raises(sqlite3.IntegrityError):
+        empty_db.execute("INSERT INTO graus (order_id, eye) VALUES (999, 'OD')")
+
+
+def test_integrity_error_redirects_with_message(client):
+    response = client.post('/order/999/grau/new', data={'eye': 'OD'}, headers={'Referer': '/details/999'})
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/details/999')
+    with client.session_transaction() as session:
+        assert session['_flashes'][0][0] == 'error'
+
+
+def test_integrity_error_in_json_request(client):
+    response = client.post('/order/999/grau/new', json={})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
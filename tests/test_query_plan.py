@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from app.models.query_plan import (
+    FullTableScanError, FullTableScanWarning, QueryPlanAnalyzer, statement_shape
+)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, store TEXT, client_name TEXT)")
+    conn.execute("CREATE INDEX idx_store ON orders(store)")
+    conn.execute("CREATE TABLE stores (name TEXT)")
+    yield conn
+    conn.close()
+
+
+def test_statement_shape_groups_literals_and_in_lists():
+    assert statement_shape("SELECT * FROM orders WHERE id IN (?, ?, ?) AND store = 'A'") == \
+        statement_shape("SELECT * FROM orders  WHERE id IN (?,?) AND store = 'B'") == \
+        "SELECT * FROM orders WHERE id IN (?) AND store = ?"
+    assert statement_shape("SELECT 1 LIMIT 50") == "SELECT ? LIMIT ?"
+
+
+def test_scan_of_large_table_fails(conn):
+    analyzer = QueryPlanAnalyzer('fail', ['orders'])
+    with pytest.raises(FullTableScanError), pytest.warns(FullTableScanWarning):
+        analyzer.check(conn, "SELECT * FROM orders o WHERE o.client_name = ?", ('Ana',))
+    # O formato já analisado falha de novo sem repetir o EXPLAIN
+    with pytest.raises(FullTableScanError):
+        analyzer.check(conn, "SELECT * FROM orders o WHERE o.client_name = ?", ('Bia',))
+    assert analyzer.report()[0]['executions'] == 2
+
+
+def test_indexed_queries_small_tables_and_marker_pass(conn):
+    analyzer = QueryPlanAnalyzer('fail', ['orders'])
+    analyzer.check(conn, "SELECT * FROM orders WHERE store = ?", ('A',))
+    analyzer.check(conn, "SELECT * FROM orders WHERE id = 1")
+    analyzer.check(conn, "SELECT * FROM stores")
+    analyzer.check(conn, "SELECT /* scan-ok */ COUNT(*) FROM orders WHERE client_name LIKE ?", ('%a%',))
+    analyzer.check(conn, "INSERT INTO orders (store) VALUES (?)", ('A',))
+    assert analyzer.report() == []
+    assert len(analyzer.report(only_scans=False)) == 4
+
+
+def test_invalid_statement_is_left_to_sqlite(conn):
+    analyzer = QueryPlanAnalyzer('fail', ['orders'])
+    analyzer.check(conn, "SELECT * FROM missing_table")
+    assert analyzer.report(only_scans=False) == []
+
+
+def test_off_mode_and_invalid_mode(conn):
+    analyzer = QueryPlanAnalyzer('off', ['orders'])
+    analyzer.check(conn, "SELECT * FROM orders WHERE client_name = ?", ('Ana',))
+    assert not analyzer.enabled and analyzer.report(only_scans=False) == []
+    with pytest.raises(ValueError):
+        QueryPlanAnalyzer('strict')
+
+
+def test_app_listing_queries_use_indexes(client, empty_db):
+    from app.models import get_query_plan_analyzer
+    analyzer = get_query_plan_analyzer()
+    analyzer.reset()
+    for url in ('/', '/?status=Pendente', '/?store=Loja A', '/?q=ana', '/api/orders?before=10'):
+        assert client.get(url).status_code == 200
+    assert [item['sql'] for item in analyzer.report()] == []
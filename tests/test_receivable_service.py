@@ -0,0 +1,49 @@
+from app.services import cashflow_service, order_service
+from app.services.receivable_service import get_projection, schedule_receivables
+
+
+def _card_order(db, os_number, valor_pago=1000, installments=4):
+    cursor = db.execute("""
+        INSERT INTO orders (os_number, client_name, payment_status, payment_method, installments,
+                            valor_pago, entrada, exam_date)
+        VALUES (?, 'Cliente', 'Pendente', 'Cartão de Crédito', ?, ?, 0, '2026-01-15')
+    """, (os_number, installments, valor_pago))
+    schedule_receivables(db, [cursor.lastrowid])
+    db.commit()
+    return cursor.lastrowid
+
+
+def _open(db, order_id):
+    return db.execute("""
+        SELECT COUNT(*), COALESCE(ROUND(SUM(amount), 2), 0) FROM accounts_receivable
+        WHERE order_id = ? AND status = 'Pendente'
+    """, (order_id,)).fetchone()
+
+
+def test_schedule_splits_order_value(db):
+    order_id = _card_order(db, 'R1')
+    assert tuple(_open(db, order_id)) == (4, 1000)
+
+
+def test_partial_payment_reduces_open_installments(db):
+    order_id = _card_order(db, 'R2')
+    cashflow_service.add_partial_payment(order_id, {'amount': 600, 'payment_date': '2026-01-20'})
+    assert tuple(_open(db, order_id)) == (4, 400)
+
+    payment_id = db.execute("SELECT id FROM partial_payments WHERE order_id = ?", (order_id,)).fetchone()[0]
+    cashflow_service.delete_partial_payment(payment_id)
+    assert tuple(_open(db, order_id)) == (4, 1000)
+
+
+def test_mark_paid_leaves_no_open_installments(db):
+    order_id = _card_order(db, 'R3')
+    cashflow_service.add_partial_payment(order_id, {'amount': 250, 'payment_date': '2026-01-20'})
+    result = order_service.bulk_update_orders([order_id], 'mark_paid', payment_date='2026-01-21')
+    assert result['cash_total'] == 750
+    assert tuple(_open(db, order_id)) == (0, 0)
+
+    projected = sum(month['amount'] for month in get_projection(months=24, today='2026-01-01'))
+    open_total = db.execute(
+        "SELECT COALESCE(SUM(amount), 0) FROM accounts_receivable WHERE status = 'Pendente'"
+    ).fetchone()[0]
+    assert round(projected, 2) == round(open_total, 2)
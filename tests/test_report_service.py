@@ -0,0 +1,85 @@
+import io
+import re
+import zlib
+
+from openpyxl import load_workbook
+
+from app.services.report_service import (
+    EXCEL_HEADERS, EXCEL_MAX_COLUMN_WIDTH, EXCEL_WIDTH_SAMPLE_ROWS, generate_pdf_report, stream_pdf_report,
+    write_excel_report
+)
+
+
+def _orders(count, client_name='Cliente'):
+    for i in range(count):
+        yield {
+            'os_number': str(i + 1), 'client_name': f'{client_name} {i + 1}', 'phone': '11 99999-0000',
+            'store': 'Loja A', 'lab': 'LabX', 'exam_date': '2026-01-15', 'payment_status': 'Pago',
+            'valor_pago': 100, 'entrada': 10, 'valor_retirada': None,
+        }
+
+
+def test_excel_streams_every_row(tmp_path):
+    path = tmp_path / 'relatorio.xlsx'
+    count = EXCEL_WIDTH_SAMPLE_ROWS + 25
+    with open(path, 'wb') as output:
+        write_excel_report(_orders(count), output)
+
+    rows = list(load_workbook(path, read_only=True).active.values)
+    assert list(rows[0]) == EXCEL_HEADERS
+    assert len(rows) == count + 1
+    assert rows[-1][0] == str(count)
+    assert rows[1][-1] == 110
+
+
+def test_excel_column_widths_are_capped(tmp_path):
+    path = tmp_path / 'relatorio.xlsx'
+    with open(path, 'wb') as output:
+        write_excel_report(_orders(3, client_name='X' * 200), output)
+    sheet = load_workbook(path).active
+    assert sheet.column_dimensions['B'].width == EXCEL_MAX_COLUMN_WIDTH
+    assert sheet.column_dimensions['A'].width == len('OS') + 2
+
+
+def _pdf_objects(data):
+    """{id: offset} do xref, conferindo que cada entrada aponta para 'id 0 obj'"""
+    xref_offset = int(re.search(rb'startxref\n(\d+)\n%%EOF\n$', data).group(1))
+    assert data[xref_offset:].startswith(b'xref\n')
+    entries = re.findall(rb'(\d{10}) 00000 n ', data[xref_offset:])
+    for obj_id, offset in enumerate(entries, start=1):
+        assert data[int(offset):].startswith(f'{obj_id} 0 obj\n'.encode())
+    return len(entries)
+
+
+def test_pdf_pages_and_cross_reference_table():
+    data = generate_pdf_report(_orders(120)).getvalue()
+    assert data.startswith(b'%PDF-1.4')
+    pages = int(re.search(rb'/Type /Pages /Kids \[[^\]]*\] /Count (\d+)', data).group(1))
+    assert pages > 1
+    assert len(re.findall(rb'/Type /Page ', data)) == pages
+    assert _pdf_objects(data) == 4 + 2 * pages
+
+    streams = re.findall(rb'stream\n(.*?)\nendstream', data, re.S)
+    last_page = zlib.decompress(streams[-1]).decode('latin-1')
+    assert 'Total Geral: R$ 13200.00' in last_page
+
+
+def test_pdf_is_generated_page_by_page():
+    chunks = stream_pdf_report(_orders(200))
+    first = next(chunks)
+    assert first.startswith(b'%PDF') and b'/Type /Page ' not in first
+    assert b'/Type /Page ' in next(chunks)
+
+
+def test_empty_report_has_one_page():
+    data = generate_pdf_report(iter([])).getvalue()
+    assert _pdf_objects(data) == 6
+
+
+def test_export_route(client):
+    response = client.get('/reports/export')
+    assert response.status_code == 200
+    assert load_workbook(io.BytesIO(response.data)).active['A1'].value == 'OS'
+    response = client.get('/reports/export?format=pdf')
+    assert response.status_code == 200
+    assert response.data.endswith(b'%%EOF\n')
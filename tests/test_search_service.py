@@ -0,0 +1,55 @@
+from app.services.search_service import build_match_query, search_orders
+
+
+def _order(db, os_number, client_name, phone='', cpf=''):
+    cursor = db.execute(
+        "INSERT INTO orders (os_number, client_name, phone, cpf) VALUES (?, ?, ?, ?)",
+        (os_number, client_name, phone, cpf)
+    )
+    db.commit()
+    return cursor.lastrowid
+
+
+def _found(text):
+    return [row['id'] for row in search_orders(text)]
+
+
+def test_build_match_query():
+    assert build_match_query('joao 119') == '"joao"* "119"*'
+    assert build_match_query('  "; -- ') == ''
+
+
+def test_search_ignores_accents_and_formatting(empty_db):
+    order_id = _order(empty_db, '1501', 'João da Silva', '(11) 98765-4321', '123.456.789-00')
+    assert _found('joao') == [order_id]
+    assert _found('silva 1198765') == [order_id]
+    assert _found('12345678900') == [order_id]
+    assert _found('150') == [order_id]
+    assert _found('maria') == []
+
+
+def test_index_follows_updates_and_deletes(empty_db):
+    order_id = _order(empty_db, '1502', 'Ana Souza')
+    empty_db.execute("UPDATE orders SET client_name = 'Beatriz Souza' WHERE id = ?", (order_id,))
+    empty_db.commit()
+    assert _found('ana') == []
+    assert _found('beatriz') == [order_id]
+
+    empty_db.execute("UPDATE orders SET deleted_at = '2026-01-01' WHERE id = ?", (order_id,))
+    empty_db.commit()
+    assert _found('beatriz') == []
+
+    empty_db.execute("UPDATE orders SET deleted_at = NULL WHERE id = ?", (order_id,))
+    empty_db.commit()
+    assert _found('beatriz') == [order_id]
+
+    empty_db.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+    empty_db.commit()
+    assert _found('beatriz') == []
+
+
+def test_listing_search(client, empty_db):
+    _order(empty_db, '1503', 'Carlos Lima')
+    other = _order(empty_db, '1504', 'Diana Prado')
+    data = client.get('/api/orders?q=diana').get_json()
+    assert [o['id'] for o in data['orders']] == [other]
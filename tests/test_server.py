@@ -0,0 +1,113 @@
+import http.client
+import threading
+import time
+
+import pytest
+
+from app.server import PooledWSGIServer
+
+
+class SlowApp:
+    """App WSGI que segura as requisições até release"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def __call__(self, environ, start_response):
+        if environ['PATH_INFO'] == '/slow':
+            self.started.release()
+            self.release.wait(5)
+        start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', '2')])
+        return [b'ok']
+
+
+@pytest.fixture
+def server():
+    app = SlowApp()
+    server = PooledWSGIServer('127.0.0.1', 0, app, threads=2, queue_limit=1, keep_alive=2, shutdown_timeout=5)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, app
+    app.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def _get(server, path, results=None):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    result = (response.status, response.read())
+    conn.close()
+    if results is not None:
+        results.append(result)
+    return result
+
+
+def test_requests_run_in_parallel(server):
+    server, app = server
+    results = []
+    slow = [threading.Thread(target=_get, args=(server, '/slow', results)) for _ in range(2)]
+    for thread in slow:
+        thread.start()
+    assert app.started.acquire(timeout=5) and app.started.acquire(timeout=5)
+    app.release.set()
+    for thread in slow:
+        thread.join(5)
+    assert results == [(200, b'ok'), (200, b'ok')]
+
+
+def test_keep_alive_reuses_the_connection(server):
+    server, _app = server
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+    for _ in range(3):
+        conn.request('GET', '/')
+        assert conn.getresponse().read() == b'ok'
+    conn.close()
+    assert server.stats()['accepted'] == 1
+
+
+def test_connections_beyond_the_queue_get_503(server):
+    server, app = server
+    results = []
+    busy = [threading.Thread(target=_get, args=(server, '/slow', results)) for _ in range(3)]
+    for thread in busy:
+        thread.start()
+    assert app.started.acquire(timeout=5) and app.started.acquire(timeout=5)
+    deadline = time.time() + 5
+    while server.stats()['pending'] < 3 and time.time() < deadline:
+        time.sleep(0.01)
+
+    status, body = _get(server, '/')
+    assert status == 503
+    assert 'ocupado' in body.decode()
+    app.release.set()
+    for thread in busy:
+        thread.join(5)
+    assert sorted(status for status, _ in results) == [200, 200, 200]
+    assert server.stats()['rejected'] == 1
+
+
+def test_close_waits_for_requests_in_progress(server):
+    server, app = server
+    results = []
+    thread = threading.Thread(target=_get, args=(server, '/slow', results))
+    thread.start()
+    assert app.started.acquire(timeout=5)
+    server.shutdown()
+    threading.Timer(0.1, app.release.set).start()
+    server.server_close()
+    thread.join(5)
+    assert results == [(200, b'ok')]
+    assert server.stats()['pending'] == 0
+
+
+def test_requests_with_a_body_close_the_connection(server):
+    server, _app = server
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=5)
+    conn.request('POST', '/', body=b'a=1', headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    assert response.read() == b'ok'
+    assert response.getheader('Connection') == 'close'
+    conn.close()
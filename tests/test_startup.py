@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+from app import config
+from app.startup_profile import parse_importtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPT = """
+import os, sys, json, sqlite3
+from app import create_app
+client = create_app().test_client()
+with sqlite3.connect(os.environ['DB_PATH']) as conn:
+    conn.execute("INSERT INTO orders (os_number, client_name, valor_pago) VALUES ('S1', 'Ana', 80)")
+client.get('/').close()
+loaded = {'first_page': sorted(m for m in ('openpyxl', 'reportlab') if m in sys.modules)}
+client.get('/reports/export?format=excel').get_data()
+loaded['excel'] = sorted(m for m in ('openpyxl', 'reportlab') if m in sys.modules)
+client.get('/reports/export?format=pdf').get_data()
+loaded['pdf'] = sorted(m for m in ('openpyxl', 'reportlab') if m in sys.modules)
+print(json.dumps(loaded))
+"""
+
+
+def _run(code, tmp_path, **env):
+    env = dict(os.environ, DB_PATH=str(tmp_path / 'data.db'), SECRET_KEY='test', **env)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_report_libraries_load_on_first_export(tmp_path):
+    loaded = json.loads(_run(_SCRIPT, tmp_path))
+    assert loaded == {'first_page': [], 'excel': ['openpyxl'], 'pdf': ['openpyxl', 'reportlab']}
+
+
+def test_debug_paths_are_written_only_on_demand(tmp_path):
+    path = os.path.join(config.BASE_DIR, 'debug_paths.txt')
+    existed = os.path.exists(path)
+    _run("import app.config; print('ok')", tmp_path)
+    assert os.path.exists(path) == existed
+
+
+def test_write_debug_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'BASE_DIR', str(tmp_path))
+    path = config.write_debug_paths()
+    assert path == str(tmp_path / 'debug_paths.txt')
+    with open(path) as f:
+        content = f.read()
+    assert f"Database: {config.DB_PATH}" in content
+
+
+def test_parse_importtime_sorts_modules_and_sums_packages():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       500 |        500 |     flask.json",
+        "import time:      1500 |       4000 |   flask",
+        "import time:      2000 |       2000 | openpyxl.cell",
+        "import time:      1000 |       9000 | openpyxl",
+        "não é uma linha do importtime",
+    ])
+    modules, packages = parse_importtime(output, top=3)
+    assert modules == [('openpyxl', 9.0, 1.0), ('flask', 4.0, 1.5), ('openpyxl.cell', 2.0, 2.0)]
+    assert packages == [('openpyxl', 3.0), ('flask', 2.0)]
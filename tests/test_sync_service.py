@@ -0,0 +1,158 @@
+import sqlite3
+
+import pytest
+
+from app.migrations import run_migrations
+from app.routes import sync_routes
+from app.services import sync_service
+from app.services.sync_service import SyncError, apply_changes, get_changes, get_node_id, serve_changes
+
+
+@pytest.fixture
+def peer(tmp_path):
+    """Segundo nó: outro banco com o mesmo schema"""
+    conn = sqlite3.connect(str(tmp_path / 'peer.db'))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    run_migrations(conn)
+    yield conn
+    conn.close()
+
+
+def _order(db, os_number, store='Centro', **columns):
+    columns = {'os_number': os_number, 'client_name': 'Ana', 'store': store, 'valor_pago': 100, **columns}
+    order_id = db.execute(f"INSERT INTO orders ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                          list(columns.values())).lastrowid
+    db.commit()
+    return order_id
+
+
+def _grau(db, order_id):
+    grau_id = db.execute("INSERT INTO graus (order_id, eye, esf) VALUES (?, 'OD', '-1,00')", (order_id,)).lastrowid
+    db.commit()
+    return grau_id
+
+
+def _conflicts(db):
+    return [tuple(row) for row in db.execute("SELECT table_name, row_id, kind FROM sync_conflicts ORDER BY id")]
+
+
+def test_get_changes_lists_the_current_state_since_a_seq(empty_db):
+    order_id = _order(empty_db, '1')
+    grau_id = _grau(empty_db, order_id)
+    batch = get_changes(empty_db, 0)
+    assert batch['node'] == get_node_id(empty_db)
+    assert not batch['more']
+    orders = batch['tables']['orders']
+    assert [dict(zip(orders['columns'], row))['os_number'] for row in orders['rows']] == ['1']
+    assert batch['tables']['graus']['rows'][0][0] == grau_id
+
+    assert get_changes(empty_db, batch['to'])['tables'] == {}
+    first = get_changes(empty_db, 0, limit=1)
+    assert first['more'] and list(first['tables']) == ['orders']
+    assert get_changes(empty_db, first['to'])['tables'].keys() == {'graus'}
+
+    empty_db.execute("DELETE FROM graus WHERE id = ?", (grau_id,))
+    empty_db.commit()
+    graus = get_changes(empty_db, batch['to'])['tables']['graus']
+    assert (graus['rows'], graus['deletes']) == ([], [grau_id])
+
+
+def test_apply_changes_copies_rows_and_does_not_echo_them_back(empty_db, peer):
+    order_id = _order(empty_db, '1')
+    grau_id = _grau(empty_db, order_id)
+    batch = get_changes(empty_db, 0)
+
+    result = apply_changes(peer, batch)
+    assert result == {'applied': 2, 'unchanged': 0, 'conflicts': 0, 'received': batch['to']}
+    assert peer.execute("SELECT os_number FROM orders WHERE id = ?", (order_id,)).fetchone()[0] == '1'
+    assert peer.execute("SELECT order_id FROM graus WHERE id = ?", (grau_id,)).fetchone()[0] == order_id
+    origin = batch['node']
+    assert get_changes(peer, 0, exclude_origin=origin)['tables'] == {}
+    assert peer.execute("SELECT received_seq FROM sync_peers WHERE node_id = ?", (origin,)).fetchone()[0] == batch['to']
+    assert apply_changes(peer, batch)['unchanged'] == 2
+
+    empty_db.execute("UPDATE orders SET client_name = 'Ana Maria' WHERE id = ?", (order_id,))
+    empty_db.execute("DELETE FROM graus WHERE id = ?", (grau_id,))
+    empty_db.commit()
+    assert apply_changes(peer, get_changes(empty_db, batch['to']))['applied'] == 2
+    assert peer.execute("SELECT client_name FROM orders WHERE id = ?", (order_id,)).fetchone()[0] == 'Ana Maria'
+    assert peer.execute("SELECT COUNT(*) FROM graus").fetchone()[0] == 0
+
+
+def test_apply_changes_rejects_batches_from_itself(empty_db):
+    _order(empty_db, '1')
+    with pytest.raises(SyncError):
+        apply_changes(empty_db, get_changes(empty_db, 0))
+
+
+def test_conflicting_records_are_kept_aside(empty_db, peer):
+    same_id = _order(empty_db, '1')
+    duplicate = _order(empty_db, '2')
+    _order(peer, '9')                     # mesmo id de same_id, outra OS
+    peer.execute("INSERT INTO orders (id, os_number, client_name, store) VALUES (?, '2', 'Bia', 'Centro')",
+                 (duplicate + 10,))
+    peer.commit()
+
+    result = apply_changes(peer, get_changes(empty_db, 0))
+    assert result['applied'] == 0 and result['conflicts'] == 2
+    assert _conflicts(peer) == [('orders', same_id, 'id'), ('orders', duplicate, 'os_number')]
+    assert peer.execute("SELECT os_number FROM orders WHERE id = ?", (same_id,)).fetchone()[0] == '9'
+
+
+def test_concurrent_edits_are_not_overwritten(empty_db, peer):
+    order_id = _order(empty_db, '1')
+    batch = get_changes(empty_db, 0)
+    apply_changes(peer, batch)
+
+    peer.execute("UPDATE orders SET phone = '9999' WHERE id = ?", (order_id,))
+    peer.commit()
+    empty_db.execute("UPDATE orders SET phone = '8888' WHERE id = ?", (order_id,))
+    empty_db.commit()
+    assert apply_changes(peer, get_changes(empty_db, batch['to']))['conflicts'] == 1
+    assert _conflicts(peer) == [('orders', order_id, 'modified')]
+    assert peer.execute("SELECT phone FROM orders WHERE id = ?", (order_id,)).fetchone()[0] == '9999'
+
+
+def test_pending_conflicts_are_retried_on_the_last_batch(empty_db, peer):
+    order_id = _order(empty_db, '1')
+    grau_id = _grau(empty_db, order_id)
+    batch = get_changes(empty_db, 0)
+    orders = batch['tables'].pop('orders')
+    batch['more'] = True
+    # Grau sem a ordem: chave estrangeira
+    assert apply_changes(peer, batch)['conflicts'] == 1
+    assert _conflicts(peer) == [('graus', grau_id, 'constraint')]
+
+    batch['tables'] = {'orders': orders}
+    batch['more'] = False
+    assert apply_changes(peer, batch)['applied'] == 2
+    assert _conflicts(peer) == []
+    assert peer.execute("SELECT order_id FROM graus WHERE id = ?", (grau_id,)).fetchone()[0] == order_id
+
+
+def test_serve_changes_clamps_the_batch_size(empty_db, monkeypatch):
+    for number in range(3):
+        _order(empty_db, str(number))
+    assert len(serve_changes(0, limit=-1)['tables']['orders']['rows']) == 1
+    monkeypatch.setattr(sync_service, 'SYNC_BATCH_SIZE', 2)
+    assert len(serve_changes(0, limit=100)['tables']['orders']['rows']) == 2
+
+    batch = serve_changes(0, node='loja-b', limit=100)
+    serve_changes(batch['to'], node='loja-b')
+    assert empty_db.execute("SELECT sent_seq FROM sync_peers WHERE node_id = 'loja-b'").fetchone()[0] == batch['to']
+
+
+def test_sync_routes_require_the_token(client, empty_db, monkeypatch):
+    assert client.get('/sync/status').status_code == 404
+    monkeypatch.setattr(sync_routes, 'SYNC_TOKEN', 's3cret')
+    assert client.get('/sync/status').status_code == 401
+    assert client.get('/sync/status', headers={'Authorization': 'Bearer errado'}).status_code == 401
+
+    for number in range(3):
+        _order(empty_db, str(number))
+    auth = {'Authorization': 'Bearer s3cret'}
+    response = client.get('/sync/changes?since=0&limit=-1', headers=auth)
+    assert response.status_code == 200
+    assert len(response.get_json()['tables']['orders']['rows']) == 1
+    assert client.get('/sync/status', headers=auth).get_json()['node'] == get_node_id(empty_db)